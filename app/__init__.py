@@ -1,5 +1,4 @@
 from flask import Flask
-from flask_compress import Compress # Import Compress
 
 # this defines the app that is created for the entrypoint (run.py) to run.
 
@@ -7,28 +6,231 @@ from flask_compress import Compress # Import Compress
 # In this case, each API endpoint and the frontend are separate blueprints
 
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
+    # JSON provider using orjson when it is installed
+    from .encoding import JSONProvider
+    app.json = JSONProvider(app)
     app.config['SECRET_KEY'] = 'dev'  # Secret key for session management
+    app.config['USER_STORE'] = 'json'  # 'json' (app/users.json) or 'sqlite' (USER_DB)
 
-    # Initialize compression
-    Compress(app)
-
-    # API endpoints, the rest will be added when they are created
-    from .api import network, server_logs, video_surveillance, biometric_access, physical_security, internal_comms, inmate_threats, sample_logs
-    app.register_blueprint(network.bp)
-    app.register_blueprint(server_logs.bp)
-    app.register_blueprint(video_surveillance.bp)
-    app.register_blueprint(biometric_access.bp)
-    app.register_blueprint(physical_security.bp)
-    app.register_blueprint(internal_comms.bp)
-    app.register_blueprint(inmate_threats.bp)
+    # Password hashing pool settings
+    app.config['PASSWORD_HASH_WORKERS'] = 2  # Hashing processes, 0 hashes on the request thread
+    app.config['PASSWORD_HASH_QUEUE'] = 16  # Jobs allowed to wait before answering 503
+    app.config['PASSWORD_HASH_TIMEOUT'] = 5.0  # Seconds a request waits for its hash
+
+    # Log categories served (see app/api/categories.py), e.g. ['network', 'server_logs']
+    app.config['CATEGORIES'] = None  # None serves every category of the registry
+
+    # Event store settings
+    app.config['EVENT_STORE_CAPACITY'] = 1000  # Events retained per category
+    app.config['EVENT_STORE_MEMORY_BUDGET'] = 16 * 1024 * 1024  # Bytes retained per category
+    app.config['EVENT_STORE_RETENTION'] = 3600  # Seconds of full-fidelity events, aggregates are kept longer
+    app.config['EVENT_STORE_TEXT_INDEX'] = True  # Index the free-text fields for ?q= and /api/search
+    app.config['EVENT_STORE_FIELD_INDEXES'] = True  # Index the entity fields for ?<field>=<value> filters
+    app.config['EVENT_STORE_BACKFILL'] = 50  # Events generated per category at startup
+    app.config['SAMPLE_PRODUCER'] = True  # Keep feeding the stores with sample data
+    app.config['SAMPLE_PRODUCER_INTERVAL'] = 1.0  # Seconds between sample batches
+
+    # Write pipeline settings (see app/api/writer.py)
+    app.config['EVENT_WRITER_QUEUE'] = 100000  # Events waiting to be written before producers are pushed back
+    app.config['EVENT_WRITER_BATCH_SIZE'] = 5000  # Most events applied per batch
+    app.config['EVENT_WRITER_BATCH_DELAY'] = 0.005  # Seconds a batch may wait to fill up
+
+    # On-disk event history (see app/api/segment_log.py), disabled without a directory
+    app.config['EVENT_LOG_DIR'] = None  # One sub-directory of segment files per category
+    app.config['EVENT_LOG_SEGMENT_BYTES'] = 64 * 1024 * 1024  # Segment size before rolling
+    app.config['EVENT_LOG_SEGMENT_SECONDS'] = 3600  # Event time a segment spans before rolling
+    app.config['EVENT_LOG_FSYNC'] = 'interval'  # 'always', 'interval' or 'never'
+    app.config['EVENT_LOG_FLUSH_INTERVAL'] = 1.0  # Seconds between batched writes (and fsyncs)
+    app.config['EVENT_LOG_MAX_BYTES'] = 1024 * 1024 * 1024  # Bytes kept per category, None for no limit
+    app.config['EVENT_LOG_MAX_AGE'] = 30 * 86400  # Seconds of history kept, None for no limit
+
+    # Compression settings (see app/compression.py), e.g. {'network_api': {'gzip': 1, 'br': 1}}
+    app.config['COMPRESS_ROUTE_LEVELS'] = {}  # Per endpoint or blueprint compression levels
+    app.config['COMPRESS_CACHE_SIZE'] = 8 * 1024 * 1024  # Bytes of compressed responses cached
+    app.config['RESPONSE_STREAM_THRESHOLD'] = 256 * 1024  # Larger JSON bodies are sent (and compressed) as a stream
+
+    # Bulk ingestion settings (see app/api/ingest.py)
+    app.config['INGEST_TOKEN'] = None  # When set, POST /api/ingest needs 'Authorization: Bearer <token>'
+    app.config['INGEST_QUEUE_TIMEOUT'] = 1.0  # Seconds an ingest request waits for room in the write queue before 429
+    app.config['INGEST_RETRY_AFTER'] = 1  # Seconds a throttled client is told to wait
+
+    # Request metrics served at /metrics (see app/metrics.py)
+    app.config['METRICS'] = True  # Time every request, per endpoint and phase
+
+    # Profiling (see app/profiling.py), everything off by default
+    app.config['PROFILE_DIR'] = None  # Where profiles are written, defaults to <instance>/profiles
+    app.config['PROFILE_SECRET'] = None  # Profiles requests with an X-Profile-Token signed with it
+    app.config['PROFILE_ADMINS'] = ()  # Users who may profile a request with ?profile=1
+    app.config['PROFILE_SAMPLE_INTERVAL'] = 0  # Seconds between stack samples of the requests, 0 disables
+    app.config['PROFILE_SAMPLE_FLUSH'] = 60.0  # Seconds between writes of the collapsed stacks
+
+    # Pre-fork server (see app/server.py), set by the server for its processes
+    app.config['SERVER_ROLE'] = None  # None (single process), 'writer' or 'worker'
+    app.config['SERVER_SHARED_LOG'] = None  # SharedLog the writer publishes the stored events to
+    app.config['SERVER_INGEST_QUEUE'] = None  # Queue of the ingested events the workers forward to the writer
+    app.config['SERVER_FOLLOW_INTERVAL'] = 0.01  # Seconds between polls of the shared log by a worker
+
+    # Server-Sent Events settings
+    app.config['STREAM_REPLAY_CAPACITY'] = 5000  # Frames kept for Last-Event-ID resume
+    app.config['STREAM_KEEPALIVE'] = 15.0  # Seconds between keepalive comments
+
+    if test_config is not None:
+        app.config.update(test_config)
+
+    # Opt-in profiling, first so that it covers the other request hooks
+    from .profiling import init_profiling
+    init_profiling(app)
+
+    # Request timing, set up around compression so that it can be timed as a phase
+    metrics = None
+    if app.config['METRICS']:
+        from .metrics import RequestMetrics
+        metrics = RequestMetrics(app)
+
+    # Initialize compression (Flask-Compress with a cache of compressed bodies)
+    from .compression import CachingCompress
+    CachingCompress(app)
+    if metrics is not None:
+        metrics.time_compression(app)
+
+    # Shared event stores of the enabled categories, read by the category API blueprints
+    from .api.categories import enabled_categories
+    from .api.event_store import create_stores
+    from .api.sample_producer import SampleProducer, backfill
+    categories = enabled_categories(app.config['CATEGORIES'])
+    stores = create_stores(
+        app.config['EVENT_STORE_CAPACITY'],
+        app.config['EVENT_STORE_MEMORY_BUDGET'],
+        app.config['EVENT_STORE_RETENTION'],
+        categories=[category.name for category in categories],
+    )
+
+    # Indexes of the free-text and entity fields, kept in step with the retained events
+    if app.config['EVENT_STORE_TEXT_INDEX']:
+        from .api.text_index import attach_text_indexes
+        attach_text_indexes(stores)
+    if app.config['EVENT_STORE_FIELD_INDEXES']:
+        from .api.indexes import attach_field_indexes
+        attach_field_indexes(stores)
+
+    # Overview counts and the aggregate retention tiers, updated as events are stored
+    # (backfilled ones included)
+    from .api.rollups import Rollups
+    rollups = Rollups({category.name: category.rollup_fields for category in categories})
+    rollups.attach(stores)
+    app.extensions['rollups'] = rollups
+
+    # Under the pre-fork server only the writer process stores events; it publishes them
+    # (restored and backfilled ones included) to the workers, which replicate them
+    role = app.config['SERVER_ROLE']
+    if role == 'writer':
+        app.config['SERVER_SHARED_LOG'].attach(stores)
+
+    # Reload the retained history from the event log, then log every new event
+    restored = False
+    logs = None
+    if app.config['EVENT_LOG_DIR'] and role != 'worker':
+        from .api.segment_log import LogLocked, open_logs
+        try:
+            logs = open_logs(
+                app.config['EVENT_LOG_DIR'],
+                stores,
+                segment_bytes=app.config['EVENT_LOG_SEGMENT_BYTES'],
+                segment_seconds=app.config['EVENT_LOG_SEGMENT_SECONDS'],
+                fsync=app.config['EVENT_LOG_FSYNC'],
+                max_bytes=app.config['EVENT_LOG_MAX_BYTES'],
+                max_age=app.config['EVENT_LOG_MAX_AGE'],
+            )
+        except LogLocked as e:
+            # Only one process may write the log, e.g. not every worker of gunicorn -w N
+            app.logger.warning("not keeping the event history on disk: %s", e)
+    if app.config['EVENT_LOG_DIR'] and role == 'worker':
+        # History queries reach back into the log the writer process keeps
+        from .api.segment_log import open_logs
+        app.extensions['event_logs'] = open_logs(app.config['EVENT_LOG_DIR'], stores, read_only=True)
+    if logs is not None:
+        from .api.segment_log import LogFlusher, restore
+        restore(stores, logs)
+        restored = any(len(store) for store in stores.values())
+        for category, store in stores.items():
+            store.subscribe(logs[category].append_events)
+        flusher = LogFlusher(logs, app.config['EVENT_LOG_FLUSH_INTERVAL'])
+        flusher.start()
+        app.extensions['event_logs'] = logs
+        app.extensions['event_log_flusher'] = flusher
+
+    if not restored and role != 'worker':
+        backfill(stores, app.config['EVENT_STORE_BACKFILL'])
+    app.extensions['event_stores'] = stores
+
+    # Column orderings for DataTables server-side requests, shared by all clients
+    from .api.datatables import Orderings
+    app.extensions['datatables_orderings'] = Orderings()
+
+    # Push new events to /api/stream subscribers
+    from .api.stream import EventHub
+    hub = EventHub(app.config['STREAM_REPLAY_CAPACITY'])
+    hub.attach(stores)
+    app.extensions['event_hub'] = hub
+
+    if role == 'worker':
+        from .api.shared_log import Follower
+        follower = Follower(app.config['SERVER_SHARED_LOG'], stores, hub, app.config['SERVER_FOLLOW_INTERVAL'])
+        follower.poll()  # Catch up before serving
+        follower.start()
+        app.extensions['shared_log_follower'] = follower
+
+    # Producers queue their events; a single writer thread applies them in batches
+    if role == 'worker':
+        from .api.writer import ForwardingWriter
+        writer = ForwardingWriter(app.config['SERVER_INGEST_QUEUE'])
+    else:
+        from .api.writer import EventWriter
+        writer = EventWriter(
+            stores,
+            app.config['EVENT_WRITER_QUEUE'],
+            app.config['EVENT_WRITER_BATCH_SIZE'],
+            app.config['EVENT_WRITER_BATCH_DELAY'],
+        )
+        writer.start()
+    app.extensions['event_writer'] = writer
+    if role == 'writer':
+        from .api.writer import SubmissionReceiver
+        receiver = SubmissionReceiver(app.config['SERVER_INGEST_QUEUE'], writer)
+        receiver.start()
+        app.extensions['submission_receiver'] = receiver
+
+    # Counters of POST /api/ingest
+    from .api.ingest import IngestStats
+    app.extensions['ingest_stats'] = IngestStats(stores)
+
+    if app.config['SAMPLE_PRODUCER'] and role != 'worker':
+        producer = SampleProducer(stores, app.config['SAMPLE_PRODUCER_INTERVAL'], writer=writer)
+        producer.start()
+        app.extensions['sample_producer'] = producer
+
+    # API endpoints: one per enabled category, then the cross-category ones
+    from .api import sample_logs, stream, rollups, search, ingest
+    from .api.logs import create_blueprint
+    for category in categories:
+        app.register_blueprint(create_blueprint(category))
     app.register_blueprint(sample_logs.bp) # Re-added for dashboard aggregation
+    app.register_blueprint(stream.bp)
+    app.register_blueprint(rollups.bp)
+    app.register_blueprint(search.bp)
+    app.register_blueprint(ingest.bp)
 
     # Auth blueprint
     from . import auth
     app.register_blueprint(auth.bp)
 
+    # Precompressed, content-hashed static files, linked with asset_url() in the templates
+    from . import assets
+    app.register_blueprint(assets.bp)
+    app.add_template_global(assets.asset_url)
+
     # Frontend route
     from . import routes
     app.register_blueprint(routes.bp)
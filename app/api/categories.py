@@ -0,0 +1,208 @@
+import importlib
+from app.api.schemas import ENUM, ENUM_LIST, INT, IP, TEXT, TIMESTAMP
+
+# Registry of the log categories.
+# Everything the app needs to know about a category is declared once, here: its field
+# schema, its sample generators, the URL of its endpoint, the fields that are indexed,
+# searched and counted, its retention and its simulated event rate. The event stores,
+# the indexes, the rollups, the endpoints, the sample producer and the simulation all
+# read this registry, so a new category is one more entry and a feature written for one
+# category works for all of them.
+#
+# A deployment serves the categories listed in the CATEGORIES setting (all by default);
+# create_app() only builds stores, indexes and endpoints for those, and the generators
+# are only imported when sample data is needed.
+
+GENERATOR_MODULE = 'app.api.sample_log_generator'
+
+
+class Category:
+    """Declaration of one log category, see REGISTRY."""
+
+    def __init__(self, name, url_prefix, blueprint, view, response_key, schema, generator, optional=(),
+                 indexed_fields=(), address_fields=None, text_fields=(), rollup_fields=(), retention=None,
+                 rate=None):
+        self.name = name
+        self.url_prefix = url_prefix  # of the category endpoint
+        self.blueprint = blueprint  # blueprint and view names, i.e. the endpoint 'network_api.get_network_logs'
+        self.view = view
+        self.response_key = response_key  # key of the category in /api/sample-logs and /api/search
+        self.schema = schema  # field -> kind, see app/api/schemas.py
+        self.optional = frozenset(optional)  # fields an event may lack
+        self.generator = generator  # generate_<generator>() and generate_<generator>s() of GENERATOR_MODULE
+        self.indexed_fields = tuple(indexed_fields)  # equality indexes, ?<field>=<value>
+        self.address_fields = dict(address_fields or {})  # CIDR indexes, {field: query alias}
+        self.text_fields = tuple(text_fields)  # full-text index, ?q=<terms>
+        self.rollup_fields = tuple(rollup_fields)  # counted per value by the rollups
+        self.retention = retention  # seconds, None for EVENT_STORE_RETENTION
+        self.rate = rate  # simulated (events per hour, daily swing, peak UTC hour), see app/api/simulation.py
+
+    def __repr__(self):
+        return f"Category({self.name!r})"
+
+    @property
+    def generate(self):
+        """The per-record sample generator."""
+        return getattr(importlib.import_module(GENERATOR_MODULE), f"generate_{self.generator}")
+
+    @property
+    def generate_batch(self):
+        """The bulk (columnar) sample generator, generate_batch(n, seed=None, now=None)."""
+        return getattr(importlib.import_module(GENERATOR_MODULE), f"generate_{self.generator}s")
+
+
+REGISTRY = {category.name: category for category in (
+    Category(
+        "network",
+        url_prefix='/api/network-monitoring',
+        blueprint='network_api',
+        view='get_network_logs',
+        response_key="network_log",
+        schema={
+            "source_ip": IP,
+            "destination_ip": IP,
+            "protocol": ENUM,
+            "port": INT,
+            "action": ENUM,
+            "threat_level": ENUM,
+            "details": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        optional=("details",),
+        generator='network_log',
+        indexed_fields=("protocol", "port", "action", "threat_level"),
+        address_fields={"source_ip": "src_cidr", "destination_ip": "dst_cidr"},
+        text_fields=("details",),
+        rollup_fields=("threat_level", "action"),
+        rate=(10000, 0.6, 14),
+    ),
+    Category(
+        "server_logs",
+        url_prefix='/api/server-logs',
+        blueprint='server_logs_api',
+        view='get_server_logs',
+        response_key="server_log",
+        schema={
+            "server": ENUM,
+            "event": ENUM,
+            "attempts": INT,
+            "status": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='server_log',
+        indexed_fields=("server", "status"),
+        text_fields=("event",),
+        rollup_fields=("status",),
+        rate=(600, 0.3, 2),  # nightly jobs
+    ),
+    Category(
+        "video_surveillance",
+        url_prefix='/api/video-surveillance',
+        blueprint='video_surveillance_api',
+        view='get_video_surveillance_logs',
+        response_key="video_surveillance_log",
+        schema={
+            "location": ENUM,
+            "level": ENUM,
+            "activity": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='video_surveillance_log',
+        indexed_fields=("location", "level"),
+        text_fields=("activity",),
+        rollup_fields=("level", "location"),
+        rate=(3600, 0.5, 13),
+    ),
+    Category(
+        "biometric_access",
+        url_prefix='/api/biometric-access',
+        blueprint='biometric_access',
+        view='get_biometric_access_logs',
+        response_key="biometric_access_log",
+        schema={
+            "scanner_id": ENUM,
+            "user_id": ENUM,
+            "access_result": ENUM,
+            "reason": ENUM,
+            "location": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='biometric_access_log',
+        indexed_fields=("scanner_id", "user_id", "access_result", "location"),
+        rollup_fields=("access_result", "location"),
+        rate=(900, 0.8, 8),  # shift changes
+    ),
+    Category(
+        "physical_security",
+        url_prefix='/api/physical-security',
+        blueprint='physical_security_api',
+        view='get_physical_security_logs',
+        response_key="physical_security_log",
+        schema={
+            "system": ENUM,
+            "location": ENUM,
+            "status": ENUM,
+            "trigger_reason": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='physical_security_log',
+        indexed_fields=("system", "location", "status"),
+        text_fields=("trigger_reason",),
+        rollup_fields=("status", "location"),
+        rate=(300, 0.3, 20),
+    ),
+    Category(
+        "internal_comms",
+        url_prefix='/api/internal-comms',
+        blueprint='internal_comms_api',
+        view='get_internal_comms_logs',
+        response_key="internal_comms_log",
+        schema={
+            "type": ENUM,
+            "recipients": ENUM_LIST,
+            "message": TEXT,
+            "sent_by": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='internal_comms_log',
+        indexed_fields=("type", "sent_by"),
+        text_fields=("message",),
+        rollup_fields=("type",),
+        rate=(120, 0.7, 10),
+    ),
+    Category(
+        "inmate_threats",
+        url_prefix='/api/inmate-threats',
+        blueprint='inmate_threats_api',
+        view='get_inmate_threats_logs',
+        response_key="inmate_threat_log",
+        schema={
+            "inmate_id": ENUM,
+            "name": ENUM,
+            "threat_level": ENUM,
+            "last_known_location": ENUM,
+            "incident_flag": ENUM,
+            "recommendation": ENUM,
+            "timestamp": TIMESTAMP,
+        },
+        generator='inmate_threat_log',
+        indexed_fields=("inmate_id", "threat_level", "last_known_location"),
+        text_fields=("incident_flag",),
+        rollup_fields=("threat_level",),
+        rate=(60, 0.5, 22),
+    ),
+)}
+
+# Field schemas and optional fields per category
+SCHEMAS = {name: category.schema for name, category in REGISTRY.items()}
+OPTIONAL = {name: category.optional for name, category in REGISTRY.items() if category.optional}
+
+
+def enabled_categories(names=None):
+    """The Category of each name in `names` (all of them when None), in registry order."""
+    if names is None:
+        return list(REGISTRY.values())
+    unknown = set(names) - set(REGISTRY)
+    if unknown:
+        raise ValueError(f"unknown categories: {', '.join(sorted(unknown))}")
+    return [category for name, category in REGISTRY.items() if name in names]
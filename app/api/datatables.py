@@ -0,0 +1,244 @@
+import bisect
+import re
+import threading
+from collections import deque
+from itertools import groupby
+from operator import itemgetter
+from app.encoding import dumps
+
+# Server-side processing for DataTables (serverSide: true).
+# The table sends draw/start/length/order[]/search[]/columns[] with every redraw and we
+# answer with only the visible page plus recordsTotal/recordsFiltered, so the browser
+# never has to download the whole category.
+# See https://datatables.net/manual/server-side
+
+_column_param = re.compile(r'^columns\[(\d+)\]\[(\w+)\](?:\[(\w+)\])?$')
+
+
+def is_datatables_request(args):
+    """DataTables always sends a `draw` counter, plain API clients never do."""
+    return 'draw' in args
+
+
+def cell_text(value):
+    """Text used to search a cell, matching how the table renders it."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ','.join(str(v) for v in value)
+    return str(value)
+
+
+def sort_key(value):
+    # Numbers sort numerically, everything else by its text
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, '')
+    return (1, 0, cell_text(value).lower())
+
+
+def parse_request(args):
+    """Parses the DataTables query string, raises ValueError on malformed input."""
+    draw = int(args['draw'])
+    start = int(args.get('start', 0))
+    length = int(args.get('length', 10))
+    if draw < 0 or start < 0 or length < -1:
+        raise ValueError("draw, start and length must not be negative")
+
+    columns = {}
+    for name, value in args.items():
+        match = _column_param.match(name)
+        if match:
+            index, field, sub = match.groups()
+            column = columns.setdefault(int(index), {'data': None, 'searchable': True, 'orderable': True, 'search': ''})
+            if field == 'data':
+                column['data'] = value
+            elif field in ('searchable', 'orderable'):
+                column[field] = value != 'false'
+            elif field == 'search' and sub == 'value':
+                column['search'] = value
+    columns = [columns[i] for i in sorted(columns)]
+
+    order = []
+    i = 0
+    while f'order[{i}][column]' in args:
+        index = int(args[f'order[{i}][column]'])
+        direction = args.get(f'order[{i}][dir]', 'asc')
+        if direction not in ('asc', 'desc'):
+            raise ValueError("order direction must be asc or desc")
+        if 0 <= index < len(columns) and columns[index]['orderable'] and columns[index]['data']:
+            order.append((columns[index]['data'], direction))
+        i += 1
+
+    return {
+        'draw': draw,
+        'start': start,
+        'length': length,
+        'search': args.get('search[value]', ''),
+        'columns': columns,
+        'order': order,
+    }
+
+
+class ColumnOrdering:
+    """Sequence numbers of the retained events sorted by one column, kept in step with the
+    store like the indexes of app/api/indexes.py (see EventStore.add_index).
+
+    Entries are (sort key, seq) pairs in a sorted list: an appended event is inserted by
+    binary search, and an evicted one removed the same way, so a table ordered by the
+    column never sorts (or decodes) the retained events again.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self._entries = []  # (sort key, seq), sorted
+        self._events = deque()  # entry of each indexed event, oldest first
+
+    def add(self, seq, event):
+        entry = (sort_key(event.get(self.field)), seq)
+        self._events.append(entry)
+        bisect.insort(self._entries, entry)
+
+    def expire(self, first_seq):
+        events = self._events
+        expired = 0
+        while expired < len(events) and events[expired][1] < first_seq:
+            expired += 1
+        if not expired:
+            return
+        if expired * 64 < len(self._entries):
+            for _ in range(expired):
+                del self._entries[bisect.bisect_left(self._entries, events.popleft())]
+        else:
+            # A whole block expired: one pass instead of many deletions
+            for _ in range(expired):
+                events.popleft()
+            self._entries = [entry for entry in self._entries if entry[1] >= first_seq]
+
+    def clear(self):
+        self._entries = []
+        self._events = deque()
+
+    def seqs(self, start, count, descending):
+        """Sequence numbers at positions [start, start + count) of the ordering. Ties are
+        newest first in both directions, like the sort of a newest-first table. (The
+        timestamp order is the store order instead: events with the same timestamp are
+        oldest first when it is ascending.)"""
+        entries = self._entries
+        end = min(len(entries), start + count)
+        if start >= end:
+            return []
+        if descending:
+            return [entries[-1 - i][1] for i in range(start, end)]
+        # Ascending: reverse each run of equal keys the page touches
+        lo = bisect.bisect_left(entries, (entries[start][0],))
+        hi = bisect.bisect_right(entries, (entries[end - 1][0], float('inf')))
+        seqs = []
+        for _, run in groupby(entries[lo:hi], key=itemgetter(0)):
+            seqs.extend(seq for _, seq in reversed(list(run)))
+        return seqs[start - lo:end - lo]
+
+
+class Orderings:
+    """Adds the ColumnOrdering of a store column the first time a table is ordered by it.
+
+    From then on the store keeps it up to date, so it always matches the store version
+    and is shared by every client. Only schema fields get one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def get(self, store, field):
+        """Name of the store index ordering by `field`, None if it cannot have one."""
+        if field not in store.schema:
+            return None
+        name = f'order:{field}'
+        with self._lock:
+            try:
+                store.index(name)
+            except KeyError:
+                store.add_index(name, ColumnOrdering(field))
+        return name
+
+
+def order_rows(rows, order):
+    """Orders `rows` (newest first) by the requested columns, ties staying newest first,
+    except in ascending timestamp order, which is the store order (ties oldest first)."""
+    if is_timestamp_order(order):
+        return rows if order != [('timestamp', 'asc')] else rows[::-1]
+    # Stable sorts, least significant column first
+    rows = list(rows)
+    for field, direction in reversed(order):
+        rows.sort(key=lambda row: sort_key(row.get(field)), reverse=direction == 'desc')
+    return rows
+
+
+def is_timestamp_order(order):
+    return order in ([], [('timestamp', 'desc')], [('timestamp', 'asc')])
+
+
+def row_filter(params):
+    """Predicate applying the global search (all words, any searchable column) and the
+    per-column searches to a row, None when the request searches nothing."""
+    fields = [c['data'] for c in params['columns'] if c['searchable'] and c['data']]
+    words = params['search'].lower().split()
+    column_searches = [(c['data'], c['search'].lower()) for c in params['columns']
+                       if c['searchable'] and c['data'] and c['search']]
+    if not words and not column_searches:
+        return None
+
+    def match(row):
+        if words:
+            text = ' '.join(cell_text(row.get(f)) for f in fields).lower()
+            if not all(word in text for word in words):
+                return False
+        return all(value in cell_text(row.get(field)).lower() for field, value in column_searches)
+
+    return match
+
+
+def filter_rows(rows, params):
+    """Applies the searches of the request to `rows`."""
+    match = row_filter(params)
+    return rows if match is None else [row for row in rows if match(row)]
+
+
+def datatables_page(store, params, orderings):
+    """Returns the DataTables response body for one draw, rows as JSON encoded bytes.
+
+    Timestamp order is the store order and a single column order is read from the
+    column's ColumnOrdering, so only a search looks at every retained row; either
+    way only the rows of the page are read out, as their cached encodings.
+    """
+    start, length = params['start'], params['length']
+    count = None if length == -1 else length
+    order = params['order']
+    match = row_filter(params)
+
+    if is_timestamp_order(order):
+        ordering, descending = None, order != [('timestamp', 'asc')]
+    elif len(order) == 1:
+        ordering, descending = orderings.get(store, order[0][0]), order[0][1] == 'desc'
+    else:
+        ordering = None
+
+    if is_timestamp_order(order) or ordering is not None:
+        rows, filtered, total = store.ordered(ordering, start, count, descending, match, raw=True)
+        return {
+            'draw': params['draw'],
+            'recordsTotal': total,
+            'recordsFiltered': filtered,
+            'data': rows,
+        }
+
+    # Several columns (or one outside the schema): sort a decoded copy
+    rows, _ = store.tail()
+    total = len(rows)
+    rows = order_rows(filter_rows(rows, params), order)
+    end = len(rows) if length == -1 else start + length
+    return {
+        'draw': params['draw'],
+        'recordsTotal': total,
+        'recordsFiltered': len(rows),
+        'data': [dumps(row) for row in rows[start:end]],
+    }
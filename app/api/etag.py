@@ -0,0 +1,45 @@
+import hashlib
+from urllib.parse import urlencode
+from flask import current_app, request
+
+# Conditional GET support for the /api/* endpoints.
+# ETags are strong and derived from the store versions a response was built from plus
+# the query parameters, so they can be computed before any data is read. A poll that
+# sends a matching If-None-Match gets a bodiless 304: no serialization, no compression.
+
+# Flask-Compress appends the content coding to strong ETags ("abc" -> "abc:gzip")
+COMPRESSION_SUFFIXES = (':gzip', ':br', ':deflate', ':zstd')
+
+
+def make_etag(*versions):
+    """Strong ETag for a response built from `versions` with the current query parameters."""
+    key = '|'.join(versions) + '?' + urlencode(sorted(request.args.items(multi=True)))
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def _strip_coding(tag):
+    for suffix in COMPRESSION_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def not_modified(etag):
+    """Returns a 304 response when the client's If-None-Match matches `etag`, else None."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag or etag in {_strip_coding(t) for t in if_none_match.as_set(include_weak=True)}:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def tag_response(response, etag):
+    """Adds the ETag to a successful response; clients must revalidate before reuse."""
+    if response.status_code == 200:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
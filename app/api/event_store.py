@@ -0,0 +1,706 @@
+import datetime
+import secrets
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+from flask import current_app
+from app.encoding import dumps
+from app.api.indexes import intersect
+from app.api.categories import OPTIONAL, REGISTRY, SCHEMAS, enabled_categories
+from app.api.schemas import ENUM, ENUM_LIST, TEXT, INT, INT_MAX, INT_MIN, IP, TIMESTAMP, ip_to_int, int_to_ip
+
+# Shared in-process event store for the category APIs.
+# Producers (the sample producer today, real feeds later) append events here and the
+# blueprints only read slices of it, so a request costs O(rows returned) instead of
+# generating and sorting a fresh batch of logs on every poll.
+
+# Category keys, matching the log store keys used by the frontend (core.js)
+CATEGORIES = list(REGISTRY)
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024  # Bytes of retained events per category
+MAX_CLOCK_SKEW = 300  # Seconds an event may be stamped ahead of the server clock
+
+# Events are stored column-wise in blocks of BLOCK_ROWS rows, see EventStore
+BLOCK_SHIFT = 10
+BLOCK_ROWS = 1 << BLOCK_SHIFT
+BLOCK_MASK = BLOCK_ROWS - 1
+
+# array typecodes of the fixed-width column kinds, text columns are plain lists
+TYPECODES = {ENUM: 'H', ENUM_LIST: 'H', INT: 'q', IP: 'I', TIMESTAMP: 'q'}
+POINTER_SIZE = 8
+# Per row bookkeeping: missing-fields mask, sort key, the extras and encoded JSON list slots
+ROW_OVERHEAD = 4 + 8 + 2 * POINTER_SIZE
+
+SNAPSHOT_ROWS = 256  # Newest encoded events published for lock-free readers
+
+# What readers may use without the lock: the store version, the newest sequence number,
+# the number of retained events and the encodings of the newest events, newest first
+Snapshot = namedtuple('Snapshot', ('version', 'last_seq', 'size', 'tail'))
+
+
+_parsed_timestamps = {}
+
+def parse_timestamp(value):
+    """Converts an ISO timestamp string (as produced by the generators) to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    # Events of the same second share their timestamp, and an event is parsed several
+    # times on its way in (validation, the store, the rollups)
+    epoch = _parsed_timestamps.get(value)
+    if epoch is None:
+        if len(_parsed_timestamps) > 4096:
+            _parsed_timestamps.clear()
+        epoch = _parsed_timestamps[value] = _parse_timestamp(value)
+    return epoch
+
+
+def _parse_timestamp(value):
+    text = value.strip()
+    # Generators emit e.g. '2025-04-30T12:00:00+00:00Z', strip the redundant 'Z'
+    if text.endswith('Z'):
+        text = text[:-1]
+        if '+' not in text[10:] and '-' not in text[10:]:
+            text += '+00:00'
+    ts = datetime.datetime.fromisoformat(text)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.timestamp()
+
+
+_formatted_timestamps = {}
+
+def format_timestamp(epoch):
+    """Formats epoch seconds the way the generators do, e.g. '2025-04-30T12:00:00+00:00Z'."""
+    text = _formatted_timestamps.get(epoch)
+    if text is None:
+        if len(_formatted_timestamps) > 4096:
+            _formatted_timestamps.clear()
+        text = datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat() + 'Z'
+        _formatted_timestamps[epoch] = text
+    return text
+
+
+class _Dictionary:
+    """Dictionary encoding of one enum column: value <-> small integer code.
+
+    Codes are reference counted by the retained rows. Once no row uses a value its code
+    is freed and given to the next new value, so the dictionary only holds (and
+    bytes_used only counts) the values of the retained events.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        self.refs = []  # retained rows using each code
+        self.nbytes = 0
+        self._free = []  # codes of the values no row uses
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self.values[code] = value
+            else:
+                code = len(self.values)
+                self.values.append(value)
+                self.refs.append(0)
+            self.codes[value] = code
+            self.nbytes += self._bytes_of(value)
+        self.refs[code] += 1
+        return code
+
+    def release(self, code, count=1):
+        """Drops `count` references to `code`, freeing it with the last one."""
+        refs = self.refs[code] = self.refs[code] - count
+        if not refs:
+            value = self.values[code]
+            del self.codes[value]
+            self.values[code] = None
+            self._free.append(code)
+            self.nbytes -= self._bytes_of(value)
+
+    def clear(self):
+        # In place: the decoders hold on to self.values
+        self.values.clear()
+        self.codes.clear()
+        self.refs.clear()
+        self._free.clear()
+        self.nbytes = 0
+
+    @staticmethod
+    def _bytes_of(value):
+        # the value itself, its list slot and its hash table entry
+        return sys.getsizeof(value) + POINTER_SIZE + 3 * POINTER_SIZE
+
+
+class _Block:
+    """BLOCK_ROWS events stored column-wise."""
+    __slots__ = ('columns', 'code_counts', 'missing', 'keys', 'extras', 'encoded', 'nbytes', 'encoded_nbytes')
+
+    def __init__(self, kinds):
+        kinds = list(kinds)
+        self.columns = [array(TYPECODES[kind]) if kind in TYPECODES else [] for kind in kinds]
+        # per enum column, retained rows of the block using each dictionary code
+        self.code_counts = [{} if kind in (ENUM, ENUM_LIST) else None for kind in kinds]
+        self.missing = array('I')  # bit i set when field i is absent from the event
+        self.keys = array('d')  # sort key (epoch seconds) of each row
+        self.extras = []  # fields outside the schema, dict or None
+        self.encoded = []  # the event encoded as JSON bytes
+        self.nbytes = 0  # bytes of the retained rows, see EventStore._bytes_of
+        self.encoded_nbytes = 0  # part of nbytes used by the JSON encodings
+
+
+class EventStore:
+    """Bounded, memory-budgeted store of the events of a single category.
+
+    Events are kept in timestamp order. Every appended event gets a monotonic
+    sequence number; once `capacity` events (or `memory_budget` bytes) are
+    retained, the oldest events are evicted first. An event that arrives late
+    (older than the newest retained event) is filed under the newest timestamp
+    so that cursors never skip it.
+
+    Storage is columnar: events are split into blocks of BLOCK_ROWS rows holding
+    one array per schema field. Enum fields are dictionary-encoded to 16-bit
+    codes, timestamps are epoch seconds and IPs 32-bit integers, so a retained
+    event costs tens of bytes instead of a dict of strings. Rows are only turned
+    back into dicts when they are read.
+
+    Each event is also encoded to JSON once, when it is appended, and readers can
+    ask for those bytes (`raw=True`) to build responses without re-encoding.
+
+    With `retention` (seconds) events older than the newest event by more than that
+    are expired as well. Time is measured in event time, so a quiet store keeps its
+    last events, but never from later than MAX_CLOCK_SKEW past the server clock, so
+    that one event stamped in the future cannot expire the others. Blocks whose
+    events have all expired are dropped whole, in O(distinct enum values of the
+    block): each block counts the rows using each dictionary code.
+
+    Indexes (see add_index) are updated under the same lock as the events, so an
+    index never refers to an event that is not retained.
+
+    After every extend() the store publishes an immutable Snapshot of its newest
+    SNAPSHOT_ROWS events. Polls of the newest events (tail, since_seq with a recent
+    cursor) and the version are answered from it without taking the lock, so they
+    never wait behind a writer.
+    """
+
+    def __init__(self, category, capacity=DEFAULT_CAPACITY, memory_budget=None, schema=None, optional=None,
+                 retention=None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.category = category
+        self.capacity = capacity
+        self.memory_budget = memory_budget
+        self.retention = retention
+        schema = SCHEMAS.get(category, {"timestamp": TIMESTAMP}) if schema is None else schema
+        if len(schema) > 32:
+            raise ValueError("schemas are limited to 32 fields")
+        self.schema = schema
+        self.optional = set(OPTIONAL.get(category, ()) if optional is None else optional)
+        self._fields = list(schema.items())
+        self._field_names = set(schema)
+        self._dictionaries = [_Dictionary() if kind in (ENUM, ENUM_LIST) else None for _, kind in self._fields]
+        self._enum_columns = [i for i, dictionary in enumerate(self._dictionaries) if dictionary is not None]
+        self._decoders = self._build_decoders()
+        self._blocks = []
+        self._head = 0  # row of the oldest event inside self._blocks[0]
+        self._size = 0
+        self._row_bytes = 0  # bytes used by the retained rows, dictionaries excluded
+        self._encoded_bytes = 0  # part of _row_bytes used by the JSON encodings
+        self._next_seq = 1  # sequence number the next appended event will get
+        self._lock = threading.Lock()
+        self._listeners = []  # callbacks notified with the newly appended events
+        self._indexes = {}  # name -> index kept in step with the retained events
+        # Distinguishes this store's sequence numbers from those of a previous process
+        self.epoch = secrets.token_hex(4)
+        self._snapshot = Snapshot(f"{category}.{self.epoch}.0", 0, 0, ())
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest event (0 if nothing was appended yet)."""
+        return self._next_seq - 1
+
+    @property
+    def version(self):
+        """Changes whenever the store content changes, e.g. 'network.3f9a0c1e.1234'."""
+        return self._snapshot.version
+
+    def snapshot(self):
+        """The Snapshot published by the last write, read without the lock."""
+        return self._snapshot
+
+    @property
+    def bytes_used(self):
+        """Estimated bytes used by the retained events, including the enum dictionaries."""
+        return self._row_bytes + sum(d.nbytes for d in self._dictionaries if d is not None)
+
+    @property
+    def encoded_bytes(self):
+        """Part of bytes_used spent on the cached JSON encodings of the events."""
+        return self._encoded_bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "category": self.category,
+                "events": self._size,
+                "capacity": self.capacity,
+                "memory_budget": self.memory_budget,
+                "retention": self.retention,
+                "bytes_used": self.bytes_used,
+                "encoded_bytes": self._encoded_bytes,
+                "first_seq": self._next_seq - self._size,
+                "last_seq": self._next_seq - 1,
+            }
+
+    def add_index(self, name, index):
+        """Adds an index, filled with the retained events and kept up to date from then on.
+
+        An index has add(seq, event), expire(first_seq) and clear() methods, called
+        under the store lock with every appended event, after every eviction and on
+        clear().
+        """
+        with self._lock:
+            first_seq = self._next_seq - self._size
+            for position in range(self._size):
+                index.add(first_seq + position, self._row(position))
+            self._indexes[name] = index
+
+    def index(self, name):
+        return self._indexes[name]
+
+    def subscribe(self, listener):
+        """Registers `listener(category, events, encoded)`, called after every append with the
+        new events and their JSON encodings."""
+        self._listeners.append(listener)
+
+    def append(self, event):
+        """Appends an event and returns its sequence number."""
+        return self.extend([event])
+
+    def extend(self, events, encoded=None):
+        """Appends several events under one lock acquisition, returns the last sequence number.
+
+        `encoded` are the JSON encodings of the events when another store already made
+        them (a replica, see app/api/shared_log.py); they are kept instead of re-encoding.
+        """
+        keyed = [(event, parse_timestamp(event['timestamp'])) for event in events]
+        with self._lock:
+            if encoded is None:
+                encoded = [self._append(event, key) for event, key in keyed]
+            else:
+                encoded = [self._append(event, key, payload) for (event, key), payload in zip(keyed, encoded)]
+            last_seq = self._next_seq - 1
+            self._publish(encoded)
+        # Notify outside the lock so slow listeners never block readers
+        for listener in self._listeners:
+            listener(self.category, events, encoded)
+        return last_seq
+
+    def _publish(self, encoded):
+        # caller must hold the lock; `encoded` are the events just appended, oldest first
+        tail = (tuple(reversed(encoded[-SNAPSHOT_ROWS:])) + self._snapshot.tail)[:min(SNAPSHOT_ROWS, self._size)]
+        last_seq = self._next_seq - 1
+        self._snapshot = Snapshot(f"{self.category}.{self.epoch}.{last_seq}", last_seq, self._size, tail)
+
+    def _append(self, event, key, encoded=None):
+        # caller must hold the lock; returns the event's JSON encoding
+        # Convert first: an invalid value raises before the store is touched
+        values, missing = self._convert(event)
+        if self._size:
+            newest = self._key_at(self._size - 1)
+            if key < newest:
+                key = newest
+        if self._size >= self.capacity:
+            self._evict_oldest()
+
+        if not self._blocks or len(self._blocks[-1].keys) == BLOCK_ROWS:
+            self._blocks.append(_Block(kind for _, kind in self._fields))
+        block = self._blocks[-1]
+        self._encode(event, key, block, values, missing)
+        # Encode (and index) what readers will get back, i.e. the normalized row
+        row = self._row(self._size)
+        if encoded is None:
+            encoded = dumps(row)
+        for index in self._indexes.values():
+            index.add(self._next_seq, row)
+        block.encoded.append(encoded)
+        encoded_nbytes = sys.getsizeof(encoded)
+        nbytes = self._bytes_of(block, len(block.keys) - 1)
+        block.nbytes += nbytes
+        block.encoded_nbytes += encoded_nbytes
+        self._row_bytes += nbytes
+        self._encoded_bytes += encoded_nbytes
+        self._size += 1
+        self._next_seq += 1
+
+        if self.retention is not None:
+            self._expire(min(key, time.time() + MAX_CLOCK_SKEW) - self.retention)
+
+        if self.memory_budget is not None:
+            while self._size > 1 and self.bytes_used > self.memory_budget:
+                self._evict_oldest()
+
+        if self._indexes:
+            first_seq = self._next_seq - self._size
+            for index in self._indexes.values():
+                index.expire(first_seq)
+        return encoded
+
+    def _convert(self, event):
+        # the column values of `event` and its missing-fields mask; raises ValueError,
+        # TypeError or OverflowError on a value its column cannot hold
+        values = []
+        missing = 0
+        for i, (name, kind) in enumerate(self._fields):
+            value = event.get(name)
+            if value is None:
+                missing |= 1 << i
+                value = '' if kind == TEXT else 0
+            elif kind == ENUM or kind == ENUM_LIST:
+                if kind == ENUM_LIST:
+                    value = tuple(value)
+                hash(value)  # Dictionary key, checked before any code is taken
+            elif kind == TEXT:
+                value = str(value)
+            elif kind == INT:
+                value = int(value)
+                if not INT_MIN <= value <= INT_MAX:
+                    raise OverflowError(f"{name} does not fit in 64 bits: {value}")
+            elif kind == IP:
+                value = ip_to_int(value)
+            elif kind == TIMESTAMP:
+                value = int(parse_timestamp(value))
+            values.append(value)
+        return values, missing
+
+    def _encode(self, event, key, block, values, missing):
+        # appends the row converted by _convert(); nothing in here may fail halfway
+        for i in self._enum_columns:
+            if missing & (1 << i):
+                continue
+            code = values[i] = self._dictionaries[i].encode(values[i])
+            column = block.columns[i]
+            if code > 0xFFFF and column.typecode == 'H':
+                # Dictionary outgrew 16-bit codes, widen this block's column
+                live = len(column) - (self._head if block is self._blocks[0] else 0)
+                self._row_bytes += live * 2
+                block.nbytes += live * 2
+                block.columns[i] = array('I', column)
+            counts = block.code_counts[i]
+            counts[code] = counts.get(code, 0) + 1
+        for column, value in zip(block.columns, values):
+            column.append(value)
+        block.missing.append(missing)
+        block.keys.append(key)
+        extras = {k: v for k, v in event.items() if k not in self._field_names}
+        block.extras.append(extras or None)
+
+    def _bytes_of(self, block, row):
+        nbytes = ROW_OVERHEAD
+        for column in block.columns:
+            if isinstance(column, array):
+                nbytes += column.itemsize
+            else:
+                nbytes += POINTER_SIZE + sys.getsizeof(column[row])
+        extras = block.extras[row]
+        if extras:
+            nbytes += sys.getsizeof(extras) + sum(sys.getsizeof(v) for v in extras.values())
+        return nbytes + sys.getsizeof(block.encoded[row])
+
+    def _evict_oldest(self):
+        # caller must hold the lock
+        block = self._blocks[0]
+        nbytes = self._bytes_of(block, self._head)
+        encoded_nbytes = sys.getsizeof(block.encoded[self._head])
+        block.nbytes -= nbytes
+        block.encoded_nbytes -= encoded_nbytes
+        self._row_bytes -= nbytes
+        self._encoded_bytes -= encoded_nbytes
+        block.encoded[self._head] = None  # release it now rather than with the whole block
+        self._release_row(block, self._head)
+        self._head += 1
+        self._size -= 1
+        if self._head == BLOCK_ROWS:
+            del self._blocks[0]
+            self._head = 0
+
+    def _release_row(self, block, row):
+        # caller must hold the lock; drops the dictionary references of one row
+        missing = block.missing[row]
+        for i in self._enum_columns:
+            if not missing & (1 << i):
+                code = block.columns[i][row]
+                self._dictionaries[i].release(code)
+                counts = block.code_counts[i]
+                counts[code] -= 1
+                if not counts[code]:
+                    del counts[code]
+
+    def _release_block(self, block):
+        # caller must hold the lock; drops the dictionary references of the block's rows
+        for i in self._enum_columns:
+            release = self._dictionaries[i].release
+            for code, count in block.code_counts[i].items():
+                release(code, count)
+
+    def _expire(self, cutoff):
+        # caller must hold the lock; evicts the events filed before `cutoff`
+        while self._size:
+            block = self._blocks[0]
+            if block.keys[-1] < cutoff and len(self._blocks) > 1:
+                # Every event of the block expired, drop it without visiting its rows
+                self._row_bytes -= block.nbytes
+                self._encoded_bytes -= block.encoded_nbytes
+                self._size -= len(block.keys) - self._head
+                self._release_block(block)
+                del self._blocks[0]
+                self._head = 0
+            elif block.keys[self._head] < cutoff:
+                self._evict_oldest()
+            else:
+                break
+
+    def _build_decoders(self):
+        decoders = []
+        for i, (name, kind) in enumerate(self._fields):
+            if kind == ENUM:
+                decode = self._dictionaries[i].values.__getitem__
+            elif kind == ENUM_LIST:
+                values = self._dictionaries[i].values
+                decode = lambda code, values=values: list(values[code])
+            elif kind == IP:
+                decode = int_to_ip
+            elif kind == TIMESTAMP:
+                decode = format_timestamp
+            else:
+                decode = None
+            decoders.append((i, 1 << i, name, decode))
+        return decoders
+
+    def _row(self, position):
+        # caller must hold the lock; position is a logical index, 0 being the oldest event
+        absolute = self._head + position
+        block = self._blocks[absolute >> BLOCK_SHIFT]
+        row = absolute & BLOCK_MASK
+        missing = block.missing[row]
+        columns = block.columns
+        event = {}
+        for i, bit, name, decode in self._decoders:
+            if missing & bit:
+                continue
+            value = columns[i][row]
+            event[name] = decode(value) if decode is not None else value
+        extras = block.extras[row]
+        if extras:
+            event.update(extras)
+        return event
+
+    def _encoded(self, position):
+        # caller must hold the lock
+        absolute = self._head + position
+        return self._blocks[absolute >> BLOCK_SHIFT].encoded[absolute & BLOCK_MASK]
+
+    def _key_at(self, position):
+        absolute = self._head + position
+        return self._blocks[absolute >> BLOCK_SHIFT].keys[absolute & BLOCK_MASK]
+
+    def latest(self, limit=None, raw=False):
+        """Returns up to `limit` newest events, newest first."""
+        return self.tail(limit, raw)[0]
+
+    def tail(self, limit=None, raw=False):
+        """Returns (events, cursor): up to `limit` newest events, newest first, and the
+        sequence number of the newest one, read consistently under the lock.
+
+        With `raw=True` events are returned as their JSON encodings (bytes); the
+        other read methods take the same flag.
+        """
+        if raw and limit is not None:
+            snapshot = self._snapshot
+            if limit <= len(snapshot.tail) or len(snapshot.tail) == snapshot.size:
+                return list(snapshot.tail[:max(0, limit)]), snapshot.last_seq
+        read = self._encoded if raw else self._row
+        with self._lock:
+            count = self._size if limit is None else max(0, min(limit, self._size))
+            last = self._size - 1
+            events = [read(last - i) for i in range(count)]
+            return events, self._next_seq - 1
+
+    def window(self, start, count=None, newest_first=True, raw=False):
+        """Returns (events, total): `count` events starting at position `start` of the
+        timestamp ordering (newest first by default) and the number of retained events."""
+        read = self._encoded if raw else self._row
+        with self._lock:
+            total = self._size
+            start = min(max(start, 0), total)
+            count = total - start if count is None else max(0, min(count, total - start))
+            if newest_first:
+                last = total - 1 - start
+                events = [read(last - i) for i in range(count)]
+            else:
+                events = [read(start + i) for i in range(count)]
+            return events, total
+
+    def ordered(self, ordering, start, count=None, descending=True, match=None, raw=False):
+        """Returns (events, matched, total): `count` events starting at position `start` of
+        an ordering, the number of events in it and the number of retained events.
+
+        The ordering is the timestamp order when `ordering` is None, else that of the
+        index named `ordering`, which has seqs(start, count, descending) (see
+        ColumnOrdering in app/api/datatables.py). With `match`, a predicate on events,
+        only the matching events are in it: every retained event is decoded to test it,
+        while without one only the returned events are read.
+        """
+        read = self._encoded if raw else self._row
+        with self._lock:
+            total = self._size
+            first_seq = self._next_seq - total
+            start = max(start, 0)
+            if match is None:
+                count = total if count is None else max(0, count)
+                if ordering is not None:
+                    positions = [seq - first_seq for seq in self._indexes[ordering].seqs(start, count, descending)]
+                elif descending:
+                    positions = range(total - 1 - start, max(total - 1 - start - count, -1), -1)
+                else:
+                    positions = range(start, min(start + count, total))
+                return [read(p) for p in positions], total, total
+            if ordering is not None:
+                positions = [seq - first_seq for seq in self._indexes[ordering].seqs(0, total, descending)]
+            else:
+                positions = range(total - 1, -1, -1) if descending else range(total)
+            matched = [p for p in positions if match(self._row(p))]
+            end = len(matched) if count is None else start + max(0, count)
+            return [read(p) for p in matched[start:end]], len(matched), total
+
+    def since_seq(self, seq, limit=None, raw=False):
+        """Returns events appended after sequence number `seq`, oldest first.
+
+        Sequence numbers are contiguous, so the cursor position is found in O(1).
+        Returns (events, cursor, truncated) where `cursor` is the sequence number of
+        the last returned event and `truncated` tells whether events after `seq`
+        were already evicted from the buffer.
+        """
+        if raw:
+            snapshot = self._snapshot
+            newer = snapshot.last_seq - seq
+            if 0 <= newer <= len(snapshot.tail):
+                # Every event after the cursor is in the snapshot
+                events = snapshot.tail[:newer][::-1]
+                if limit is not None:
+                    events = events[:max(0, limit)]
+                return list(events), seq + len(events), False
+        with self._lock:
+            first_seq = self._next_seq - self._size
+            offset = seq + 1 - first_seq
+            truncated = offset < 0
+            return self._read_from(max(offset, 0), limit, raw) + (truncated,)
+
+    def since_time(self, timestamp, limit=None, raw=False):
+        """Returns events filed after `timestamp` (ISO string or epoch seconds), oldest first.
+
+        The cursor position is found by binary search over the sort keys, O(log n).
+        Returns (events, cursor, truncated) like since_seq().
+        """
+        key = parse_timestamp(timestamp)
+        with self._lock:
+            lo = self._bisect(key, after=True)
+            truncated = lo == 0 and self._next_seq - self._size > 1
+            return self._read_from(lo, limit, raw) + (truncated,)
+
+    def between(self, start, end, limit=None, raw=False):
+        """Returns (events, truncated): the events filed from `start` to `end` inclusive
+        (ISO strings or epoch seconds), oldest first, at most `limit` of them;
+        `truncated` tells whether more matched."""
+        start, end = parse_timestamp(start), parse_timestamp(end)
+        read = self._encoded if raw else self._row
+        with self._lock:
+            lo = self._bisect(start, after=False)
+            hi = self._bisect(end, after=True)
+            count = max(0, hi - lo)
+            truncated = limit is not None and count > limit
+            if truncated:
+                count = limit
+            return [read(lo + i) for i in range(count)], truncated
+
+    def search(self, filters, limit=None, raw=False):
+        """Returns (events, total): the events matching every {index name: query} of
+        `filters` (or (index name, query) pairs, to query an index twice), newest first,
+        at most `limit` of them, and the number of matches.
+
+        The queries are planned together: the posting lists of all their terms are
+        intersected, starting from the smallest (see app/api/indexes.py).
+        """
+        read = self._encoded if raw else self._row
+        with self._lock:
+            terms = []
+            for name, query in (filters.items() if isinstance(filters, dict) else filters):
+                terms.extend(self._indexes[name].terms(query))
+            seqs = intersect(terms)
+            first_seq = self._next_seq - self._size
+            count = len(seqs) if limit is None else max(0, min(limit, len(seqs)))
+            return [read(seqs[i] - first_seq) for i in range(count)], len(seqs)
+
+    def _bisect(self, key, after):
+        # caller must hold the lock; position of the first event filed after `key`
+        # (after=True) or at/after `key` (after=False), by binary search over the sort keys
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key or (after and self._key_at(mid) == key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_from(self, offset, limit, raw):
+        # caller must hold the lock
+        offset = min(offset, self._size)
+        count = self._size - offset
+        if limit is not None:
+            count = max(0, min(count, limit))
+        read = self._encoded if raw else self._row
+        events = [read(offset + i) for i in range(count)]
+        cursor = self._next_seq - self._size + offset + count - 1
+        return events, cursor
+
+    def clear(self, epoch=None, next_seq=None):
+        """Drops every event. The sequence continues unless `next_seq` is given, under a new
+        epoch unless `epoch` is given (a replica taking over the sequence of its source)."""
+        with self._lock:
+            self._blocks = []
+            self._head = 0
+            self._size = 0
+            self._row_bytes = 0
+            self._encoded_bytes = 0
+            for dictionary in self._dictionaries:
+                if dictionary is not None:
+                    dictionary.clear()
+            for index in self._indexes.values():
+                index.clear()
+            if next_seq is not None:
+                self._next_seq = next_seq
+            self.epoch = secrets.token_hex(4) if epoch is None else epoch
+            self._publish([])
+
+
+def create_stores(capacity=DEFAULT_CAPACITY, memory_budget=DEFAULT_MEMORY_BUDGET, retention=None, categories=None):
+    """Creates one EventStore per category (of `categories`, all by default)."""
+    return {
+        category.name: EventStore(category.name, capacity, memory_budget,
+                                  retention=retention if category.retention is None else category.retention)
+        for category in enabled_categories(categories)
+    }
+
+
+def get_store(category):
+    """Returns the EventStore of a category for the current app."""
+    return current_app.extensions['event_stores'][category]
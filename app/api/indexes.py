@@ -0,0 +1,264 @@
+import bisect
+from array import array
+from collections import deque
+from app.api.categories import REGISTRY
+from app.api.schemas import INT, ip_to_int
+
+# Secondary indexes of the event stores.
+# An index maps keys (a field value, a text token) to posting lists: the sorted sequence
+# numbers of the retained events having that key. Postings are appended in sequence
+# order, so they stay sorted for free, and events leave an index in the order they leave
+# the store: the oldest entry of every posting list of an evicted event is that event,
+# so expiring it only advances a start offset per key.
+#
+# A query is planned as a list of terms that must all match, each term being a union of
+# posting lists (a prefix query, several accepted values). intersect() walks the
+# smallest term newest first and probes the posting lists of the others, so its cost
+# follows the sizes of the posting lists involved, never the number of retained events.
+
+# Entity fields with an equality index per category, queried as ?<field>=<value>
+INDEXED_FIELDS = {name: category.indexed_fields for name, category in REGISTRY.items() if category.indexed_fields}
+
+# Address fields with a CIDR range index, queried as ?<field>=<address> or ?<alias>=<CIDR>
+ADDRESS_FIELDS = {name: category.address_fields for name, category in REGISTRY.items() if category.address_fields}
+
+ADDRESS_BUCKET_SHIFT = 16  # Addresses are bucketed by /16
+
+
+class Postings:
+    """Sorted sequence numbers of the events having one key; entries before `start` expired."""
+    __slots__ = ('seqs', 'start')
+
+    def __init__(self):
+        self.seqs = array('q')
+        self.start = 0
+
+    def __len__(self):
+        return len(self.seqs) - self.start
+
+    def __contains__(self, seq):
+        i = bisect.bisect_left(self.seqs, seq, self.start)
+        return i < len(self.seqs) and self.seqs[i] == seq
+
+    def newest_first(self):
+        seqs = self.seqs
+        return (seqs[i] for i in range(len(seqs) - 1, self.start - 1, -1))
+
+    def pop_oldest(self):
+        self.start += 1
+        # Give the expired prefix back once it is the larger half
+        if self.start >= 1024 and self.start * 2 >= len(self.seqs):
+            self.compact()
+
+    def compact(self):
+        del self.seqs[:self.start]
+        self.start = 0
+
+
+class _AddressPostings(Postings):
+    """Postings of an address bucket, with the address of each entry."""
+    __slots__ = ('ips',)
+
+    def __init__(self):
+        super().__init__()
+        self.ips = array('I')
+
+    def compact(self):
+        del self.ips[:self.start]
+        super().compact()
+
+    def within(self, first, last):
+        """Postings of the entries with an address from `first` to `last`."""
+        matching = Postings()
+        seqs, ips = self.seqs, self.ips
+        matching.seqs.extend(seqs[i] for i in range(self.start, len(seqs)) if first <= ips[i] <= last)
+        return matching
+
+
+class PostingIndex:
+    """Base of the indexes: key -> Postings, kept in step with the store.
+
+    The store calls add() for every appended event, expire() once events are evicted
+    and clear() with it, all under its lock. Subclasses define keys(event), the keys
+    of an event, and terms(query), the query as a list of Postings unions.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._events = deque()  # keys of each indexed event, oldest first
+        self._first_seq = 0  # sequence number of self._events[0]
+
+    def keys(self, event):
+        raise NotImplementedError
+
+    def terms(self, query):
+        raise NotImplementedError
+
+    def _key_added(self, key):
+        pass
+
+    def _key_removed(self, key):
+        pass
+
+    def add(self, seq, event):
+        if not self._events:
+            self._first_seq = seq
+        keys = self.keys(event)
+        self._events.append(keys)
+        for key in keys:
+            postings = self._postings.get(key)
+            if postings is None:
+                postings = self._postings[key] = Postings()
+                self._key_added(key)
+            postings.seqs.append(seq)
+
+    def expire(self, first_seq):
+        """Drops the events with a sequence number below `first_seq`."""
+        events = self._events
+        while events and self._first_seq < first_seq:
+            for key in events.popleft():
+                postings = self._postings[key]
+                postings.pop_oldest()
+                if not postings:
+                    del self._postings[key]
+                    self._key_removed(key)
+            self._first_seq += 1
+
+    def clear(self):
+        self._postings = {}
+        self._events = deque()
+
+    def search(self, query):
+        """Sequence numbers of the events matching `query`, newest first."""
+        return intersect(self.terms(query))
+
+    def stats(self):
+        return {
+            "events": len(self._events),
+            "keys": len(self._postings),
+            "postings": sum(len(p) for p in self._postings.values()),
+        }
+
+
+class FieldIndex(PostingIndex):
+    """Equality index of one field. A query is a list of accepted values."""
+
+    def __init__(self, field, kind=None):
+        super().__init__()
+        self.field = field
+        self.kind = kind
+
+    def keys(self, event):
+        value = event.get(self.field)
+        return () if value is None else (value,)
+
+    def parse(self, value):
+        """Converts a query string value to the field's type."""
+        if self.kind == INT:
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"{self.field} must be an integer") from None
+        return value
+
+    def terms(self, values):
+        matches = [self._postings[value] for value in values if value in self._postings]
+        return [matches]
+
+
+def parse_cidr(value):
+    """Parses '10.0.0.0/8' (or a single address) into the first and last addresses it covers, as integers."""
+    address, _, bits = value.strip().partition('/')
+    try:
+        bits = int(bits) if bits else 32
+        if not 0 <= bits <= 32:
+            raise ValueError
+        mask = (0xFFFFFFFF << (32 - bits)) & 0xFFFFFFFF
+        first = ip_to_int(address) & mask
+    except ValueError:
+        raise ValueError(f"invalid CIDR range: {value}") from None
+    return first, first | (~mask & 0xFFFFFFFF)
+
+
+class CidrIndex(PostingIndex):
+    """Range index of an IPv4 address field, the addresses kept as integers.
+
+    Entries are bucketed by /16 prefix. A range query takes the buckets it covers
+    whole as they are and filters the addresses of the (at most two) buckets it
+    covers in part. A query is a list of ranges, see parse_cidr().
+    """
+
+    def __init__(self, field):
+        super().__init__()
+        self.field = field
+
+    def add(self, seq, event):
+        if not self._events:
+            self._first_seq = seq
+        value = event.get(self.field)
+        if value is None:
+            self._events.append(())
+            return
+        ip = ip_to_int(value)
+        bucket = ip >> ADDRESS_BUCKET_SHIFT
+        self._events.append((bucket,))
+        postings = self._postings.get(bucket)
+        if postings is None:
+            postings = self._postings[bucket] = _AddressPostings()
+        postings.seqs.append(seq)
+        postings.ips.append(ip)
+
+    def parse(self, value):
+        return parse_cidr(value)
+
+    def terms(self, ranges):
+        matches = []
+        for first, last in ranges:
+            low, high = first >> ADDRESS_BUCKET_SHIFT, last >> ADDRESS_BUCKET_SHIFT
+            if high - low + 1 > len(self._postings):
+                buckets = sorted(b for b in self._postings if low <= b <= high)
+            else:
+                buckets = [b for b in range(low, high + 1) if b in self._postings]
+            for bucket in buckets:
+                postings = self._postings[bucket]
+                bucket_first = bucket << ADDRESS_BUCKET_SHIFT
+                bucket_last = bucket_first | ((1 << ADDRESS_BUCKET_SHIFT) - 1)
+                if first <= bucket_first and bucket_last <= last:
+                    matches.append(postings)
+                else:
+                    matches.append(postings.within(first, last))
+        return [matches]
+
+
+def intersect(terms):
+    """Sequence numbers in every term (a list of Postings, any of which may match), newest first."""
+    if not terms:
+        return []
+    terms = sorted(terms, key=lambda lists: sum(len(p) for p in lists))
+    first, rest = terms[0], terms[1:]
+    if not first:
+        return []
+    if len(first) == 1:
+        seqs = first[0].newest_first()
+    else:
+        seqs = sorted({seq for postings in first for seq in postings.newest_first()}, reverse=True)
+    # A union of several lists (an address range, a prefix) is probed as a set
+    probes = [lists[0] if len(lists) == 1 else {seq for p in lists for seq in p.newest_first()} for lists in rest]
+    return [seq for seq in seqs if all(seq in probe for probe in probes)]
+
+
+def filter_params(category):
+    """Query parameters answered by the field indexes of `category`, as {parameter: index name}."""
+    params = {field: field for field in INDEXED_FIELDS.get(category, ())}
+    for field, alias in ADDRESS_FIELDS.get(category, {}).items():
+        params[field] = params[alias] = field
+    return params
+
+
+def attach_field_indexes(stores):
+    """Adds an index named after the field for every INDEXED_FIELDS and ADDRESS_FIELDS entry."""
+    for category, store in stores.items():
+        for field in INDEXED_FIELDS.get(category, ()):
+            store.add_index(field, FieldIndex(field, store.schema.get(field)))
+        for field in ADDRESS_FIELDS.get(category, {}):
+            store.add_index(field, CidrIndex(field))
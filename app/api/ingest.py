@@ -0,0 +1,240 @@
+import hmac
+import threading
+import time
+import zlib
+from flask import Blueprint, current_app, jsonify, request
+from app.api.categories import OPTIONAL, SCHEMAS
+from app.api.event_store import MAX_CLOCK_SKEW, parse_timestamp
+from app.api.query import error_response
+from app.api.schemas import ENUM, ENUM_LIST, INT, INT_MAX, INT_MIN, IP, TEXT, TIMESTAMP, ip_to_int
+from app.api.writer import QueueFull
+from app.encoding import loads
+
+# Bulk ingestion for real sensor feeds (firewalls, biometric scanners, camera analytics).
+# POST /api/ingest/<category> takes newline-delimited JSON, gzip-compressed when sent
+# with Content-Encoding: gzip. The body is decompressed and parsed as it is read, in
+# bounded memory whatever its size, and valid events are stored in batches of
+# BATCH_SIZE. Each event is checked against the category schema (app/api/categories.py);
+# invalid lines are skipped and reported, the rest of the body is still ingested.
+#
+# Events are handed to the write pipeline (app/api/writer.py), so "accepted" means
+# queued; they become visible once the writer applies them, normally within
+# milliseconds. When the queue stays full for INGEST_QUEUE_TIMEOUT seconds the stores
+# cannot keep up and the request gets a 429 with Retry-After.
+
+bp = Blueprint('ingest_api', __name__, url_prefix='/api/ingest')
+
+READ_SIZE = 64 * 1024
+MAX_LINE_BYTES = 64 * 1024
+BATCH_SIZE = 1000  # Events per submission to the writer
+MAX_REPORTED_ERRORS = 20
+
+
+def validate(category, event, now=None):
+    """Returns why `event` does not match the category schema, or None if it does.
+
+    Timestamps may not be more than MAX_CLOCK_SKEW seconds ahead of `now` (the server
+    clock by default): the stores file events in timestamp order and expire them
+    relative to the newest one, so a single future event would push the others out.
+    """
+    if not isinstance(event, dict):
+        return "event must be a JSON object"
+    schema = SCHEMAS[category]
+    for field in event:
+        if field not in schema:
+            return f"unknown field: {field}"
+    optional = OPTIONAL.get(category, ())
+    for field, kind in schema.items():
+        value = event.get(field)
+        if value is None:
+            if field in optional:
+                continue
+            return f"missing field: {field}"
+        if kind == ENUM or kind == TEXT:
+            valid = isinstance(value, str)
+        elif kind == ENUM_LIST:
+            valid = isinstance(value, list) and all(isinstance(v, str) for v in value)
+        elif kind == INT:
+            valid = isinstance(value, int) and not isinstance(value, bool) and INT_MIN <= value <= INT_MAX
+        elif kind == IP:
+            try:
+                valid = isinstance(value, str) and ip_to_int(value) >= 0
+            except ValueError:
+                valid = False
+        elif kind == TIMESTAMP:
+            try:
+                valid = isinstance(value, str) and parse_timestamp(value) is not None
+            except ValueError:
+                valid = False
+            if valid and parse_timestamp(value) > (time.time() if now is None else now) + MAX_CLOCK_SKEW:
+                return f"{field} is more than {MAX_CLOCK_SKEW} seconds in the future"
+        else:
+            valid = True
+        if not valid:
+            return f"invalid {kind} value for {field}"
+    return None
+
+
+class _CountingStream:
+    """Wraps the request stream, counting the bytes read."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def read(self, size):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def decompressed(stream, gzipped):
+    """Yields the body in chunks of at most READ_SIZE bytes, gunzipped if `gzipped`."""
+    read = lambda: stream.read(READ_SIZE)
+    if not gzipped:
+        yield from iter(read, b'')
+        return
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    try:
+        for chunk in iter(read, b''):
+            # max_length keeps a highly compressed body from expanding all at once
+            while chunk and not decompressor.eof:
+                data = decompressor.decompress(chunk, READ_SIZE)
+                chunk = decompressor.unconsumed_tail
+                if data:
+                    yield data
+        data = decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"invalid gzip body: {e}") from None
+    if data:
+        yield data
+    if not decompressor.eof:
+        raise ValueError("truncated gzip body")
+
+
+def lines(chunks):
+    """Yields the lines of a chunked body; lines are limited to MAX_LINE_BYTES."""
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        parts = pending.split(b'\n')
+        pending = parts.pop()
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"lines are limited to {MAX_LINE_BYTES} bytes")
+        yield from parts
+    if pending:
+        yield pending
+
+
+class IngestStats:
+    """Per-category ingestion counters, to check the sustained event rate."""
+
+    FIELDS = ('requests', 'throttled', 'accepted', 'rejected', 'bytes_received', 'bytes_decoded', 'seconds')
+
+    def __init__(self, categories):
+        self._counters = {category: dict.fromkeys(self.FIELDS, 0) for category in categories}
+        self._lock = threading.Lock()
+
+    def add(self, category, **counts):
+        with self._lock:
+            counters = self._counters[category]
+            for name, value in counts.items():
+                counters[name] += value
+
+    def snapshot(self):
+        with self._lock:
+            stats = {category: dict(counters) for category, counters in self._counters.items()}
+        for counters in stats.values():
+            # Events accepted per second of request handling (parsing, validation, queueing)
+            seconds = counters['seconds']
+            counters['events_per_second'] = round(counters['accepted'] / seconds) if seconds else 0
+        return stats
+
+
+def _authorized():
+    token = current_app.config['INGEST_TOKEN']
+    if not token:
+        return True
+    expected = f"Bearer {token}".encode()
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected)
+
+
+@bp.route('/<category>', methods=['POST'])
+def ingest(category):
+    """Stores a batch of newline-delimited JSON events, see the module comment."""
+    if category not in current_app.extensions['event_stores']:
+        return error_response(f"unknown category: {category}", 404)
+    if not _authorized():
+        return error_response("invalid ingest token", 401)
+    encoding = request.headers.get('Content-Encoding', 'identity').strip().lower()
+    if encoding not in ('identity', 'gzip'):
+        return error_response(f"unsupported content encoding: {encoding}", 415)
+
+    stats = current_app.extensions['ingest_stats']
+    writer = current_app.extensions['event_writer']
+    if writer.full:
+        # Refuse before reading the body
+        stats.add(category, throttled=1)
+        return _throttled({"error": "ingest queue is full, retry later"})
+
+    timeout = current_app.config['INGEST_QUEUE_TIMEOUT']
+    start = time.perf_counter()
+    stream = _CountingStream(request.stream)
+    accepted = rejected = decoded = 0
+    errors = []
+    batch = []
+    try:
+        for number, line in enumerate(lines(decompressed(stream, encoding == 'gzip')), 1):
+            decoded += len(line) + 1
+            if not line.strip():
+                continue
+            try:
+                event = loads(line)
+            except ValueError:
+                problem = "invalid JSON"
+            else:
+                problem = validate(category, event)
+            if problem is not None:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": number, "error": problem})
+                continue
+            batch.append(event)
+            if len(batch) == BATCH_SIZE:
+                writer.submit(category, batch, timeout)
+                accepted += len(batch)
+                batch = []
+        if batch:
+            writer.submit(category, batch, timeout)
+            accepted += len(batch)
+    except QueueFull:
+        # What was queued before stays queued
+        stats.add(category, throttled=1)
+        return _throttled({"error": "ingest queue is full, retry later", "accepted": accepted,
+                           "rejected": rejected, "errors": errors})
+    except ValueError as e:
+        # The body itself is broken; what was queued before stays queued
+        response = jsonify({"error": str(e), "accepted": accepted, "rejected": rejected, "errors": errors})
+        response.status_code = 400
+        return response
+    finally:
+        stats.add(category, requests=1, accepted=accepted, rejected=rejected, bytes_received=stream.bytes_read,
+                  bytes_decoded=decoded, seconds=time.perf_counter() - start)
+    return jsonify({"accepted": accepted, "rejected": rejected, "errors": errors})
+
+
+def _throttled(body):
+    response = jsonify(body)
+    response.status_code = 429
+    response.headers['Retry-After'] = str(current_app.config['INGEST_RETRY_AFTER'])
+    return response
+
+
+@bp.route('/stats')
+def ingest_stats():
+    """Ingestion counters per category, with the event rate achieved while ingesting, and
+    the write pipeline metrics (queue depth, batch sizes, submission to visible latency)."""
+    return jsonify({
+        "categories": current_app.extensions['ingest_stats'].snapshot(),
+        "writer": current_app.extensions['event_writer'].stats(),
+    })
@@ -0,0 +1,19 @@
+from flask import Blueprint
+from app.api.query import logs_response
+
+# Category endpoints, one blueprint per enabled category of the registry
+# (app/api/categories.py), all answered by the same handler. Blueprint and view names
+# come from the registry, so endpoints keep their names (e.g.
+# 'network_api.get_network_logs') for url_for() and COMPRESS_ROUTE_LEVELS.
+
+
+def get_logs(category):
+    # Newest logs, or only the ones after ?after=<seq> / ?since=<timestamp>
+    return logs_response(category)
+
+
+def create_blueprint(category):
+    """Blueprint serving the logs of `category` (a Category) at its URL prefix."""
+    bp = Blueprint(category.blueprint, __name__, url_prefix=category.url_prefix)
+    bp.add_url_rule('/', category.view, get_logs, defaults={'category': category.name})
+    return bp
@@ -0,0 +1,195 @@
+from flask import current_app, jsonify, request
+from app.api.datatables import datatables_page, is_datatables_request, parse_request
+from app.api.etag import make_etag, not_modified, tag_response
+from app.api.event_store import get_store, parse_timestamp
+from app.api.indexes import filter_params
+from app.encoding import dumps, join_array, join_object
+
+# Shared request handling for the category API blueprints.
+
+DEFAULT_LIMIT = 50  # Rows returned by a plain (non-incremental) request
+HISTORY_LIMIT = 1000  # Default and maximum rows of a time-range request
+CURSOR_HEADER = 'X-Event-Cursor'
+
+
+def error_response(message, status=400):
+    response = jsonify({"error": message})
+    response.status_code = status
+    return response
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def json_bytes_response(body):
+    """Response for an already encoded JSON body, as jsonify() would send it.
+
+    Bodies over RESPONSE_STREAM_THRESHOLD bytes (large history pages) are sent in
+    chunks, so they are compressed as a stream instead of in one piece.
+    """
+    body += b'\n'
+    mimetype = current_app.json.mimetype
+    if len(body) > current_app.config.get('RESPONSE_STREAM_THRESHOLD', float('inf')):
+        chunks = (body[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(body), STREAM_CHUNK_SIZE))
+        return current_app.response_class(chunks, mimetype=mimetype)
+    return current_app.response_class(body, mimetype=mimetype)
+
+
+def logs_response(category):
+    """Builds the response of a category endpoint.
+
+    Without query parameters this returns the 50 newest logs, newest first, and the
+    current cursor in the X-Event-Cursor header. With `after=<seq>` or
+    `since=<timestamp>` it only returns the logs that came after that cursor
+    (oldest first) together with the next cursor, so steady-state polls stay small.
+    DataTables server-side requests (identified by `draw`) get a single page, and
+    `from=<timestamp>` / `to=<timestamp>` asks for a time range of the history, while
+    `q=<terms>` and `<field>=<value>` filters (e.g. inmate_id=ARK-099) are answered
+    from the store's indexes.
+    Responses carry an ETag tied to the store version, or for a time range read from
+    the on-disk event log to the log position; a matching If-None-Match gets a 304
+    without touching the store.
+    """
+    store = get_store(category)
+    handler = _handler(store)
+    # A worker's event log is followed separately from its store, so a history body
+    # read from it is tagged with the log's own position
+    log = event_log(store) if handler is history_response else None
+    # Computed before reading, so the tag never claims a newer version than the body
+    etag = make_etag(store.version if log is None else f"{store.category}.log.{log.version()}")
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return tag_response(handler(store), etag)
+
+
+def _handler(store):
+    if is_datatables_request(request.args):
+        return datatables_response
+    if 'q' in request.args or any(param in request.args for param in filter_params(store.category)):
+        return search_response
+    if 'after' in request.args or 'since' in request.args:
+        return cursor_response
+    if 'from' in request.args or 'to' in request.args:
+        return history_response
+    return latest_response
+
+
+def latest_response(store):
+    """Answers a request without query parameters: the 50 newest logs, newest first."""
+    # Read the 50 newest logs from the shared event store, already JSON encoded.
+    # The store keeps them in timestamp order (newest first here), so no sorting is needed.
+    logs, cursor = store.tail(DEFAULT_LIMIT, raw=True)
+    response = json_bytes_response(join_array(logs))
+    response.headers[CURSOR_HEADER] = str(cursor)
+    return response
+
+
+def cursor_response(store):
+    """Answers an incremental poll: ?after=<seq> or ?since=<timestamp>, optional ?limit=<n>."""
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return error_response("limit must be a non-negative integer")
+
+    if 'after' in request.args:
+        after = request.args.get('after', type=int)
+        if after is None or after < 0:
+            return error_response("after must be a non-negative integer")
+        logs, cursor, truncated = store.since_seq(after, limit, raw=True)
+    else:
+        try:
+            logs, cursor, truncated = store.since_time(request.args['since'], limit, raw=True)
+        except ValueError:
+            return error_response("since must be an ISO 8601 timestamp")
+
+    response = json_bytes_response(join_object([
+        ("cursor", dumps(cursor)),
+        ("logs", join_array(logs)),
+        ("truncated", dumps(truncated)),
+    ]))
+    response.headers[CURSOR_HEADER] = str(cursor)
+    return response
+
+
+def event_log(store):
+    """The on-disk event log of the store's category, None when the app keeps none."""
+    return current_app.extensions.get('event_logs', {}).get(store.category)
+
+
+def history_response(store):
+    """Answers ?from=<timestamp>&to=<timestamp>, optional ?limit=<n>, oldest first.
+
+    Reads the on-disk event log when the app has one, so the range may reach back
+    beyond what the store retains; otherwise the store is searched.
+    """
+    limit = request.args.get('limit', HISTORY_LIMIT, type=int)
+    if limit is None or not 0 <= limit <= HISTORY_LIMIT:
+        return error_response(f"limit must be an integer between 0 and {HISTORY_LIMIT}")
+    try:
+        start = parse_timestamp(request.args.get('from', float('-inf')))
+        end = parse_timestamp(request.args.get('to', float('inf')))
+    except ValueError:
+        return error_response("from and to must be ISO 8601 timestamps")
+
+    log = event_log(store)
+    if log is not None:
+        logs, truncated = log.read(start, end, limit)
+    else:
+        logs, truncated = store.between(start, end, limit, raw=True)
+    return json_bytes_response(join_object([
+        ("logs", join_array(logs)),
+        ("truncated", dumps(truncated)),
+    ]))
+
+
+def search_limit():
+    """The ?limit=<n> of a search (default DEFAULT_LIMIT), None when it is invalid."""
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    if limit is None or not 0 <= limit <= HISTORY_LIMIT:
+        return None
+    return limit
+
+
+def search_response(store):
+    """Answers ?q=<terms> and ?<field>=<value> filters, optional ?limit=<n>: the logs
+    matching all of them, newest first, and their count. A field may be repeated to
+    accept any of several values; address fields take CIDR ranges too
+    (?src_cidr=10.0.0.0/8)."""
+    limit = search_limit()
+    if limit is None:
+        return error_response(f"limit must be an integer between 0 and {HISTORY_LIMIT}")
+    filters = []
+    try:
+        if 'q' in request.args:
+            filters.append(('text', request.args['q']))
+        for param, name in filter_params(store.category).items():
+            if param in request.args:
+                index = store.index(name)
+                filters.append((name, [index.parse(value) for value in request.args.getlist(param)]))
+        logs, total = store.search(filters, limit, raw=True)
+    except KeyError as e:
+        return error_response(f"this category cannot be searched by {e.args[0]}")
+    except ValueError as e:
+        return error_response(str(e))
+    return json_bytes_response(join_object([
+        ("logs", join_array(logs)),
+        ("total", dumps(total)),
+    ]))
+
+
+def datatables_response(store):
+    """Answers a DataTables server-side draw with the visible page only."""
+    try:
+        params = parse_request(request.args)
+    except ValueError as e:
+        return error_response(f"invalid DataTables request: {e}")
+    cursor = store.last_seq
+    body = datatables_page(store, params, current_app.extensions['datatables_orderings'])
+    response = json_bytes_response(join_object([
+        ("data", join_array(body['data'])),
+        ("draw", dumps(body['draw'])),
+        ("recordsFiltered", dumps(body['recordsFiltered'])),
+        ("recordsTotal", dumps(body['recordsTotal'])),
+    ]))
+    response.headers[CURSOR_HEADER] = str(cursor)
+    return response
@@ -0,0 +1,209 @@
+import re
+import threading
+import time
+from array import array
+from flask import Blueprint, current_app, jsonify, request
+from app.api.etag import make_etag, not_modified, tag_response
+from app.api.categories import REGISTRY
+from app.api.event_store import parse_timestamp
+
+# Rollups for the overview dashboard, and the aggregate retention tiers.
+# Instead of the browser counting its cached logs on every refresh, counts per category
+# and per interesting field value are kept server side in time buckets. Every stored
+# event bumps one bucket per tier (O(1) per event), and /api/summary?range=10m sums the
+# buckets covering the range.
+#
+# The event stores keep full-fidelity events for an hour (EVENT_STORE_RETENTION); past
+# that only these aggregates remain: per 10 seconds for an hour, per minute for 7 days
+# and per hour for 90 days. Each tier is a timing wheel with a fixed number of slots, so
+# a bucket expires in O(1) by being reused for a new time range and memory stays flat
+# however long the app runs.
+
+bp = Blueprint('summary_api', __name__, url_prefix='/api/summary')
+
+# Fields counted per category
+ROLLUP_FIELDS = {name: category.rollup_fields for name, category in REGISTRY.items()}
+
+# (name, bucket width in seconds, buckets kept)
+RESOLUTIONS = (
+    ("10s", 10, 360),  # last hour
+    ("1m", 60, 7 * 24 * 60),  # last 7 days
+    ("1h", 3600, 90 * 24),  # last 90 days
+)
+
+MAX_SUMMARY_BUCKETS = 1440  # A summary uses a coarser tier rather than sum more buckets
+MAX_FIELD_VALUES = 100  # Values counted separately per field, the others are counted together
+OTHER = '(other)'  # Value the other values of a field are counted under
+
+DEFAULT_RANGE = '10m'
+_range_pattern = re.compile(r'^(\d+)([smh])$')
+_units = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_range(value):
+    """Parses a range like '30s', '10m' or '24h' into seconds."""
+    match = _range_pattern.match(value.strip())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"invalid range: {value}")
+    return int(match.group(1)) * _units[match.group(2)]
+
+
+class _Ring:
+    """Timing wheel of `size` consecutive time buckets of `width` seconds.
+
+    A slot is reused (and its old bucket dropped) when time reaches it again. Bucket
+    counts are arrays indexed by the key numbers handed out by Rollups.
+    """
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.starts = [None] * size  # bucket number held by each slot
+        self.counts = [None] * size
+
+    def bucket(self, epoch):
+        """Returns the counts of the bucket holding `epoch`, None if it has expired."""
+        number = int(epoch // self.width)
+        slot = number % self.size
+        start = self.starts[slot]
+        if start != number:
+            if start is not None and start > number:
+                return None  # the slot already moved on to a newer bucket
+            self.starts[slot] = number
+            self.counts[slot] = array('I')
+        return self.counts[slot]
+
+    def covering(self, first, last):
+        """Yields the (bucket number, counts) of buckets first..last that hold data."""
+        for number in range(max(first, last - self.size + 1), last + 1):
+            slot = number % self.size
+            if self.starts[slot] == number:
+                yield number, self.counts[slot]
+
+    def nbytes(self):
+        return sum(c.itemsize * len(c) for c in self.counts if c is not None)
+
+
+class Rollups:
+    """Event counts per category and per field value, at several time resolutions.
+
+    The first `max_values` values of a field are counted separately, the values seen
+    after them together under OTHER, so that a field with unbounded values (ingested
+    events may carry anything) cannot grow the buckets without bound.
+    """
+
+    def __init__(self, fields=None, resolutions=RESOLUTIONS, max_values=MAX_FIELD_VALUES):
+        self.fields = ROLLUP_FIELDS if fields is None else fields
+        self.resolutions = [(name, _Ring(width, size)) for name, width, size in resolutions]
+        self.max_values = max_values
+        # Counted keys, (category, None, None) for event totals and
+        # (category, field, value) otherwise, numbered in order of appearance
+        self._keys = []
+        self._key_numbers = {}
+        self._field_values = {}  # (category, field) -> values with a key of their own
+        self._lock = threading.Lock()
+
+    def attach(self, stores):
+        """Subscribes to every store so each stored event is counted."""
+        for store in stores.values():
+            store.subscribe(self.add)
+
+    def _number(self, key):
+        # caller must hold the lock
+        number = self._key_numbers.get(key)
+        if number is None:
+            category, field, value = key
+            if field is not None and value != OTHER:
+                values = self._field_values.get((category, field), 0)
+                if values >= self.max_values:
+                    return self._number((category, field, OTHER))
+                self._field_values[(category, field)] = values + 1
+            number = self._key_numbers[key] = len(self._keys)
+            self._keys.append(key)
+        return number
+
+    def add(self, category, events, encoded=None):
+        fields = self.fields.get(category, ())
+        keyed = [(parse_timestamp(event['timestamp']), event) for event in events]
+        with self._lock:
+            total = self._number((category, None, None))
+            for epoch, event in keyed:
+                numbers = [total]
+                for field in fields:
+                    value = event.get(field)
+                    if value is not None:
+                        numbers.append(self._number((category, field, value)))
+                highest = max(numbers)
+                for _, ring in self.resolutions:
+                    counts = ring.bucket(epoch)
+                    if counts is None:
+                        continue
+                    if len(counts) <= highest:
+                        counts.extend([0] * (highest + 1 - len(counts)))
+                    for number in numbers:
+                        counts[number] += 1
+
+    def resolution_for(self, seconds):
+        """Finest resolution covering `seconds` in at most MAX_SUMMARY_BUCKETS buckets, as (name, ring)."""
+        for name, ring in self.resolutions:
+            if ring.width * ring.size >= seconds and seconds <= ring.width * MAX_SUMMARY_BUCKETS:
+                return name, ring
+        return self.resolutions[-1]
+
+    def summary(self, seconds, now=None):
+        """Counts of the last `seconds` seconds: totals and per-bucket series."""
+        now = time.time() if now is None else now
+        name, ring = self.resolution_for(seconds)
+        seconds = min(seconds, ring.width * ring.size)
+        last = int(now // ring.width)
+        first = int((now - seconds) // ring.width) + 1
+        totals = {category: {"events": 0} for category in self.fields}
+        series = []
+        with self._lock:
+            keys = self._keys
+            for number, counts in ring.covering(first, last):
+                bucket_totals = {}
+                for key_number, count in enumerate(counts):
+                    if not count:
+                        continue
+                    category, field, value = keys[key_number]
+                    category_totals = totals.setdefault(category, {"events": 0})
+                    if field is None:
+                        category_totals["events"] += count
+                        bucket_totals[category] = count
+                    else:
+                        values = category_totals.setdefault(field, {})
+                        values[value] = values.get(value, 0) + count
+                series.append({"start": number * ring.width, "counts": bucket_totals})
+        return {
+            "resolution": name,
+            "bucket_seconds": ring.width,
+            "from": first * ring.width,
+            "to": (last + 1) * ring.width,
+            "totals": totals,
+            "buckets": series,
+        }
+
+    def stats(self):
+        """Bytes held by each tier, for checking that memory stays flat."""
+        with self._lock:
+            return {name: ring.nbytes() for name, ring in self.resolutions}
+
+
+@bp.route('/')
+def get_summary():
+    """Event counts of the last ?range=<n>(s|m|h) (default 10m), for the overview widgets."""
+    try:
+        seconds = parse_range(request.args.get('range', DEFAULT_RANGE))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rollups = current_app.extensions['rollups']
+    now = time.time()
+    _, ring = rollups.resolution_for(seconds)
+    stores = current_app.extensions['event_stores']
+    # Changes with every stored event and whenever the range slides to a new bucket
+    etag = make_etag(*(store.version for store in stores.values()), str(int(now // ring.width)))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return tag_response(jsonify(rollups.summary(seconds, now)), etag)
@@ -10,6 +10,11 @@ def random_timestamp():
     ts = now - delta
     return ts.replace(microsecond=0).isoformat() + 'Z'
 
+def current_timestamp():
+    # Same format as random_timestamp(), for events stamped as they are produced
+    now = datetime.datetime.now(timezone.utc)
+    return now.replace(microsecond=0).isoformat() + 'Z'
+
 def random_ip():
     return ".".join(str(random.randint(1, 254)) for _ in range(4))
 
@@ -211,3 +216,293 @@ def generate_video_surveillance_log():
         "activity": activity,
         "timestamp": random_timestamp()
     }
+
+
+# --- Bulk generation ---
+# The functions above build one dict at a time, redoing list concatenations, random.choice
+# calls and datetime.now() for every record. For load testing and backfill the functions
+# below build whole columns at once: every field is drawn with a single random.choices()
+# call over a distribution precomputed from the same weighted lists, and conditional rules
+# only redraw the rows they apply to. Results are columnar (LogBatch) and can be turned into
+# dicts lazily.
+
+class Distribution:
+    """A weighted list (values repeated to weight them) collapsed into values + cumulative weights."""
+
+    def __init__(self, weighted_values, weights=None):
+        if weights is None:
+            counts = {}
+            for value in weighted_values:
+                counts[value] = counts.get(value, 0) + 1
+            weighted_values, weights = list(counts), list(counts.values())
+        self.values = list(weighted_values)
+        self.cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+
+    def sample(self, rng, n):
+        return rng.choices(self.values, cum_weights=self.cum_weights, k=n)
+
+
+class LogBatch:
+    """Columnar batch of generated logs: `columns` maps each field to a list of n values.
+
+    Optional fields hold None for the rows that do not have them. Iterating yields one
+    dict per row, built lazily, with the same keys (and key order) as the per-record
+    generators.
+    """
+
+    def __init__(self, fields, columns, optional=()):
+        self.fields = fields
+        self.columns = columns
+        self.optional = set(optional)
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+    def __iter__(self):
+        fields, optional = self.fields, self.optional
+        for values in zip(*(self.columns[f] for f in fields)):
+            if optional:
+                yield {f: v for f, v in zip(fields, values) if v is not None or f not in optional}
+            else:
+                yield dict(zip(fields, values))
+
+    def to_dicts(self):
+        return list(self)
+
+
+def _replace_where(rng, column, condition, distribution):
+    """Redraws column[i] from `distribution` for every row where condition(i) is true."""
+    rows = [i for i in range(len(column)) if condition(i)]
+    for i, value in zip(rows, distribution.sample(rng, len(rows))):
+        column[i] = value
+    return rows
+
+
+def _permutations(items, k):
+    if k == 0:
+        return [()]
+    return [(item,) + rest for item in items
+            for rest in _permutations([x for x in items if x != item], k - 1)]
+
+
+def _sample_distribution(items, max_k):
+    # random.sample(items, k=random.randint(1, max_k)): k is uniform, then every ordered
+    # selection of size k is equally likely
+    values, weights = [], []
+    for k in range(1, max_k + 1):
+        selections = _permutations(items, k)
+        values.extend(selections)
+        weights.extend([1 / (max_k * len(selections))] * len(selections))
+    return Distribution(values, weights)
+
+
+_octets = [str(i) for i in range(1, 255)]
+
+_dist = {
+    "server_status": Distribution(arkham_data["statuses"] * 5 + ["escalated", "resolved"]),
+    "server_event": Distribution(arkham_data["events"]),
+    "server_critical_event": Distribution(["Critical system failure", "Security vulnerability patched", "Major service disruption", "Data breach contained"]),
+    "server": Distribution(arkham_data["servers"]),
+    "attempts": Distribution(list(range(1, 11))),
+    "physical_status": Distribution(["active"] * 10 + ["inactive", "fault"]),
+    "trigger_reason": Distribution(arkham_data["trigger_reasons"]),
+    "fault_reason": Distribution(["system malfunction", "power outage", "vandalism", "breach attempt detected"]),
+    "system": Distribution(arkham_data["systems"]),
+    "location": Distribution(arkham_data["locations"]),
+    "access_result": Distribution(arkham_data["access_results"] * 10 + ["denied"]),
+    "access_reason": Distribution(arkham_data["access_reasons"]),
+    "denied_reason": Distribution(["fingerprint mismatch", "unauthorized user", "system error", "access revoked", "security alert"]),
+    "scanner_id": Distribution(arkham_data["scanner_ids"]),
+    "user_id": Distribution(arkham_data["user_ids"]),
+    "threat_level": Distribution(arkham_data["threat_levels"]),
+    "incident": Distribution(arkham_data["incidents"]),
+    "severe_incident": Distribution(["attempted escape from cell block", "hostage situation reported", "major contraband discovery", "violent outburst in common area"]),
+    "recommendation": Distribution(arkham_data["recommendations"]),
+    "severe_recommendation": Distribution(["immediate lockdown of area", "security team intervention required", "transfer to high-security solitary", "emergency medical assessment"]),
+    "inmate_index": Distribution(list(range(len(arkham_data["inmate_ids"])))),
+    "comm_type": Distribution(arkham_data["comm_types"]),
+    "message": Distribution(arkham_data["messages"]),
+    "breach_message": Distribution([
+        "Urgent: Security breach detected in perimeter fence, Sector 4.",
+        "All units respond to Cell Block A, unauthorized movement detected.",
+        "Code Red: Possible containment breach in the experimental wing."
+    ]),
+    "lockdown_message": Distribution([
+        "Initiating full facility lockdown. All personnel follow protocol.",
+        "Lockdown in effect for Cell Block B due to inmate disturbance.",
+        "Perimeter lockdown activated. Standby for further instructions."
+    ]),
+    "recipients": _sample_distribution(["security_team", "admin_office", "medical_staff", "maintenance"], 3),
+    "sender": Distribution(arkham_data["senders"]),
+    "action": Distribution(arkham_data["actions"]),
+    "protocol": Distribution(arkham_data["protocols"]),
+    "port": Distribution([22, 80, 443, 8080, 3306]),
+    "critical_destination": Distribution(["192.168.1.1", "10.0.0.5", "172.16.0.10"]),
+    "critical_protocol": Distribution(["TCP", "UDP"]),
+    "critical_port": Distribution([22, 443, 3306]),
+    "surveillance_level": Distribution(arkham_data["surveillance_levels"]),
+    "activity": Distribution(arkham_data["activities"]),
+    "high_activity": Distribution(["unauthorized person detected in restricted area", "multiple subjects in unauthorized zone", "camera tampered with", "abnormal behavior observed"]),
+    "severe_activity": Distribution(["physical altercation in progress", "attempted breach of secure door", "unresponsive individual detected", "fire or smoke detected"]),
+}
+
+
+def _timestamps(rng, n, now=None):
+    # random_timestamp() only ever yields 11 distinct values for a given second,
+    # so format them once and sample the column from them
+    if now is None:
+        now = datetime.datetime.now(timezone.utc)
+    now = now.replace(microsecond=0)
+    choices = [(now - datetime.timedelta(seconds=s)).isoformat() + 'Z' for s in range(11)]
+    return rng.choices(choices, k=n)
+
+
+def _ips(rng, n):
+    octets = rng.choices(_octets, k=4 * n)
+    it = iter(octets)
+    return list(map('.'.join, zip(it, it, it, it)))
+
+
+def generate_server_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    status = _dist["server_status"].sample(rng, n)
+    event = _dist["server_event"].sample(rng, n)
+    _replace_where(rng, event, lambda i: status[i] in ("escalated", "resolved"), _dist["server_critical_event"])
+    return LogBatch(["server", "event", "attempts", "status", "timestamp"], {
+        "server": _dist["server"].sample(rng, n),
+        "event": event,
+        "attempts": _dist["attempts"].sample(rng, n),
+        "status": status,
+        "timestamp": _timestamps(rng, n, now),
+    })
+
+
+def generate_physical_security_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    status = _dist["physical_status"].sample(rng, n)
+    trigger_reason = _dist["trigger_reason"].sample(rng, n)
+    _replace_where(rng, trigger_reason, lambda i: status[i] in ("inactive", "fault"), _dist["fault_reason"])
+    return LogBatch(["system", "location", "status", "trigger_reason", "timestamp"], {
+        "system": _dist["system"].sample(rng, n),
+        "location": _dist["location"].sample(rng, n),
+        "status": status,
+        "trigger_reason": trigger_reason,
+        "timestamp": _timestamps(rng, n, now),
+    })
+
+
+def generate_biometric_access_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    access_result = _dist["access_result"].sample(rng, n)
+    reason = _dist["access_reason"].sample(rng, n)
+    _replace_where(rng, reason, lambda i: access_result[i] == "denied", _dist["denied_reason"])
+    return LogBatch(["scanner_id", "user_id", "access_result", "reason", "location", "timestamp"], {
+        "scanner_id": _dist["scanner_id"].sample(rng, n),
+        "user_id": _dist["user_id"].sample(rng, n),
+        "access_result": access_result,
+        "reason": reason,
+        "location": _dist["location"].sample(rng, n),
+        "timestamp": _timestamps(rng, n, now),
+    })
+
+
+def generate_inmate_threat_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    threat_level = _dist["threat_level"].sample(rng, n)
+    incident_flag = _dist["incident"].sample(rng, n)
+    recommendation = _dist["recommendation"].sample(rng, n)
+    inmate_index = _dist["inmate_index"].sample(rng, n)
+    severe = lambda i: threat_level[i] in ("high", "critical")
+    _replace_where(rng, incident_flag, severe, _dist["severe_incident"])
+    _replace_where(rng, recommendation, severe, _dist["severe_recommendation"])
+    ids, names = arkham_data["inmate_ids"], arkham_data["inmate_names"]
+    return LogBatch(["inmate_id", "name", "threat_level", "last_known_location", "incident_flag", "recommendation", "timestamp"], {
+        "inmate_id": [ids[i] for i in inmate_index],
+        "name": [names[i] for i in inmate_index],
+        "threat_level": threat_level,
+        "last_known_location": _dist["location"].sample(rng, n),
+        "incident_flag": incident_flag,
+        "recommendation": recommendation,
+        "timestamp": _timestamps(rng, n, now),
+    })
+
+
+def generate_internal_comms_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    comm_type = _dist["comm_type"].sample(rng, n)
+    message = _dist["message"].sample(rng, n)
+    recipients = _dist["recipients"].sample(rng, n)
+    sent_by = _dist["sender"].sample(rng, n)
+
+    breach = _replace_where(rng, message, lambda i: comm_type[i] == "security breach", _dist["breach_message"])
+    lockdown = _replace_where(rng, message, lambda i: comm_type[i] == "lockdown alert", _dist["lockdown_message"])
+    for rows, override in ((breach, ("security_team", "warden")),
+                           (lockdown, ("security_team", "admin_office", "all_personnel"))):
+        for i in rows:
+            recipients[i] = override
+            sent_by[i] = "automated-system"
+
+    return LogBatch(["type", "recipients", "message", "sent_by", "timestamp"], {
+        "type": comm_type,
+        "recipients": [list(r) for r in recipients],
+        "message": message,
+        "sent_by": sent_by,
+        "timestamp": _timestamps(rng, n, now),
+    })
+
+
+def generate_network_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    threat_level = _dist["threat_level"].sample(rng, n)
+    action = _dist["action"].sample(rng, n)
+    source_ip = _ips(rng, n)
+    destination_ip = _ips(rng, n)
+    protocol = _dist["protocol"].sample(rng, n)
+    port = _dist["port"].sample(rng, n)
+    details = [None] * n
+
+    # High and critical threats are always blocked and aimed at internal critical servers
+    severe = _replace_where(rng, destination_ip, lambda i: threat_level[i] in ("high", "critical"), _dist["critical_destination"])
+    for i in severe:
+        action[i] = "blocked"
+    # Critical threats use common attack ports, half of them with a specific attack type
+    critical = [i for i in severe if threat_level[i] == "critical"]
+    for i, p, q, r in zip(critical,
+                          _dist["critical_protocol"].sample(rng, len(critical)),
+                          _dist["critical_port"].sample(rng, len(critical)),
+                          [rng.random() for _ in critical]):
+        protocol[i], port[i] = p, q
+        if r > 0.5 and p == "TCP":
+            if q == 22:
+                details[i] = "Multiple failed SSH login attempts detected."
+            elif q == 443:
+                details[i] = "Unusual outbound data transfer detected on secure port."
+
+    return LogBatch(["source_ip", "destination_ip", "protocol", "port", "action", "threat_level", "details", "timestamp"], {
+        "source_ip": source_ip,
+        "destination_ip": destination_ip,
+        "protocol": protocol,
+        "port": port,
+        "action": action,
+        "threat_level": threat_level,
+        "details": details,
+        "timestamp": _timestamps(rng, n, now),
+    }, optional=("details",))
+
+
+def generate_video_surveillance_logs(n, seed=None, now=None):
+    rng = random.Random(seed)
+    level = _dist["surveillance_level"].sample(rng, n)
+    activity = _dist["activity"].sample(rng, n)
+    _replace_where(rng, activity, lambda i: level[i] == "high", _dist["high_activity"])
+    _replace_where(rng, activity, lambda i: level[i] == "severe", _dist["severe_activity"])
+    return LogBatch(["location", "level", "activity", "timestamp"], {
+        "location": _dist["location"].sample(rng, n),
+        "level": level,
+        "activity": activity,
+        "timestamp": _timestamps(rng, n, now),
+    })
@@ -1,26 +1,27 @@
-from flask import Blueprint, jsonify
-from app.api.sample_log_generator import (
-    generate_server_log,
-    generate_physical_security_log,
-    generate_biometric_access_log,
-    generate_inmate_threat_log,
-    generate_internal_comms_log,
-    generate_network_log,
-    generate_video_surveillance_log
-)
+from flask import Blueprint, current_app
+from app.api.categories import REGISTRY
+from app.api.etag import make_etag, not_modified, tag_response
+from app.api.query import json_bytes_response
+from app.encoding import join_object
 
 bp = Blueprint('sample_logs', __name__, url_prefix='/api/sample-logs')
 
+# Response key of each category
+KEYS = {name: category.response_key for name, category in REGISTRY.items()}
+
 @bp.route('/')
 def get_sample_logs():
-    """Returns a single sample log from each category."""
-    data = {
-        "server_log": generate_server_log(),
-        "physical_security_log": generate_physical_security_log(),
-        "biometric_access_log": generate_biometric_access_log(),
-        "inmate_threat_log": generate_inmate_threat_log(),
-        "internal_comms_log": generate_internal_comms_log(),
-        "network_log": generate_network_log(),
-        "video_surveillance_log": generate_video_surveillance_log()
-    }
-    return jsonify(data)
+    """Returns the newest log from each enabled category."""
+    stores = current_app.extensions['event_stores']
+    etag = make_etag(*(store.version for store in stores.values()))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    members = []
+    for category, store in stores.items():
+        logs = store.latest(1, raw=True)
+        if logs:
+            members.append((KEYS[category], logs[0]))
+    members.sort()
+    return tag_response(json_bytes_response(join_object(members)), etag)
@@ -0,0 +1,57 @@
+import threading
+from app.api.writer import QueueFull
+from app.api.categories import REGISTRY
+from app.api.sample_log_generator import current_timestamp
+
+# Background producer that feeds the event stores with sample data.
+# It stands in for the real sensor feeds until those are connected.
+
+# Sample generators per category, declared in the category registry
+GENERATORS = {name: category.generate for name, category in REGISTRY.items()}
+BATCH_GENERATORS = {name: category.generate_batch for name, category in REGISTRY.items()}
+
+
+def backfill(stores, count, seed=None):
+    """Fills each store with `count` events, oldest first."""
+    for category, store in stores.items():
+        seed_for_category = None if seed is None else f"{seed}:{category}"
+        logs = BATCH_GENERATORS[category](count, seed=seed_for_category).to_dicts()
+        logs.sort(key=lambda x: x['timestamp'])
+        store.extend(logs)
+
+
+class SampleProducer(threading.Thread):
+    """Daemon thread appending `batch_size` new events per category every `interval` seconds,
+    through `writer` (an EventWriter) when given."""
+
+    def __init__(self, stores, interval=1.0, batch_size=1, writer=None):
+        super().__init__(name='sample-producer', daemon=True)
+        self.stores = stores
+        self.interval = interval
+        self.batch_size = batch_size
+        self.writer = writer
+        self.generated = dict.fromkeys(stores, 0)  # events per category, for /metrics
+        self._stopped = threading.Event()
+
+    def produce_once(self):
+        # Live events are stamped when produced, so they reach the stores in timestamp order
+        timestamp = current_timestamp()
+        for category, store in self.stores.items():
+            logs = [GENERATORS[category]() for _ in range(self.batch_size)]
+            for log in logs:
+                log['timestamp'] = timestamp
+            self.generated[category] += len(logs)
+            if self.writer is None:
+                store.extend(logs)
+                continue
+            try:
+                self.writer.submit(category, logs, self.interval)
+            except QueueFull:
+                pass  # Sample data, skip a beat while the writer catches up
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.produce_once()
+
+    def stop(self):
+        self._stopped.set()
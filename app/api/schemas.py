@@ -0,0 +1,31 @@
+# Field kinds of the log schemas, which are declared per category in app/api/categories.py.
+# Each field maps to a kind that tells the event store how to encode it compactly:
+#   enum      - repeated values from a small set, dictionary-encoded to integer codes
+#   enum_list - list of enum values (e.g. recipients), the whole list is dictionary-encoded
+#   text      - free text, stored as-is
+#   int       - integer, stored in a 64-bit array
+#   ip        - dotted-quad IPv4 address, stored as a 32-bit integer
+#   timestamp - ISO 8601 timestamp, stored as epoch seconds
+
+ENUM = 'enum'
+ENUM_LIST = 'enum_list'
+TEXT = 'text'
+INT = 'int'
+IP = 'ip'
+TIMESTAMP = 'timestamp'
+
+# Range of the int kind, the values a signed 64-bit array holds
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
+
+def ip_to_int(ip):
+    a, b, c, d = map(int, ip.split('.'))
+    # Any octet above 255 or negative leaves bits above the lowest 8 set
+    if (a | b | c | d) >> 8:
+        raise ValueError(f"invalid IPv4 address: {ip}")
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def int_to_ip(value):
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
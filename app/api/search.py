@@ -0,0 +1,41 @@
+from flask import Blueprint, current_app, request
+from app.api.etag import make_etag, not_modified, tag_response
+from app.api.query import HISTORY_LIMIT, error_response, json_bytes_response, search_limit
+from app.api.sample_logs import KEYS
+from app.api.text_index import TEXT_FIELDS
+from app.encoding import dumps, join_array, join_object
+
+bp = Blueprint('search_api', __name__, url_prefix='/api/search')
+
+@bp.route('/')
+def search():
+    """Full-text search across the categories: ?q=<terms>, optional ?limit=<n> per category."""
+    query = request.args.get('q', '')
+    limit = search_limit()
+    if limit is None:
+        return error_response(f"limit must be an integer between 0 and {HISTORY_LIMIT}")
+    stores = {category: store for category, store in current_app.extensions['event_stores'].items()
+              if category in TEXT_FIELDS}
+    etag = make_etag(*(store.version for store in stores.values()))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    results = []
+    for category, store in stores.items():
+        try:
+            logs, total = store.search({'text': query}, limit, raw=True)
+        except KeyError:
+            return error_response("full-text search is disabled")
+        except ValueError as e:
+            return error_response(str(e))
+        if total:
+            results.append((KEYS[category], join_object([
+                ("logs", join_array(logs)),
+                ("total", dumps(total)),
+            ])))
+    results.sort()
+    return tag_response(json_bytes_response(join_object([
+        ("q", dumps(query)),
+        ("results", join_object(results)),
+    ])), etag)
@@ -0,0 +1,463 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from app.api.event_store import parse_timestamp
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where logs are opened without the directory lock
+    fcntl = None
+
+# Append-only on-disk event history, one log per category.
+# A log is a directory of segment files (00000001.log, 00000002.log, ...). Every record
+# is the event's JSON encoding (the one the event store already made) behind a small
+# header holding its length, a CRC32 and its sort key (epoch seconds). A segment is
+# sealed and a new one started once it reaches `segment_bytes` or spans
+# `segment_seconds`; a sealed segment gets a sparse index file (.idx) with the key and
+# offset of a record every `index_interval` bytes.
+#
+# Time-range reads skip the segments outside the range, bisect the sparse index of the
+# others and scan forward through an mmap of the file. Writes are buffered and written
+# in batches; `fsync` chooses when they are forced to disk ('always' on every write,
+# 'interval' by the LogFlusher thread, 'never'). A record cut short by a crash fails its
+# CRC check and is truncated away when the log is opened again.
+#
+# A single process may write to a log: opening one takes an exclusive flock on its LOCK
+# file, and fails with LogLocked while another process holds it. Other processes may
+# open it `read_only` (the workers of app/server.py): they neither lock, repair nor
+# write it, and pick up what the writer added (once written, see flush()) on each read. Sealed segments are
+# deleted, oldest first, once the log exceeds `max_bytes` or they end more than
+# `max_age` seconds (in event time) before the newest record.
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct('<IId')  # payload length, CRC32 of key + payload, sort key
+INDEX_ENTRY = struct.Struct('<dQ')  # sort key, record offset
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 3600
+DEFAULT_INDEX_INTERVAL = 64 * 1024
+DEFAULT_FLUSH_BYTES = 256 * 1024  # Buffered bytes that trigger a write
+FSYNC_POLICIES = ('always', 'interval', 'never')
+LOCK_FILE = 'LOCK'
+
+
+class LogLocked(Exception):
+    """Another process holds the log open for writing."""
+
+
+def _checksum(key_bytes, payload):
+    return zlib.crc32(payload, zlib.crc32(key_bytes))
+
+
+def _scan(data, start=0):
+    """Yields (offset, key, payload, end offset) of the valid records of `data` from `start`.
+
+    Stops at the end of the data or at the first incomplete or corrupt record.
+    """
+    offset = start
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        length, crc, key = RECORD_HEADER.unpack_from(data, offset)
+        payload_start = offset + RECORD_HEADER.size
+        payload_end = payload_start + length
+        if payload_end > end:
+            return
+        payload = data[payload_start:payload_end]
+        if _checksum(data[offset + 8:payload_start], payload) != crc:
+            return
+        yield offset, key, payload, payload_end
+        offset = payload_end
+
+
+class _Segment:
+    """One segment file and its sparse index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = 0  # bytes written to the file
+        self.first_key = None
+        self.last_key = None
+        self.index_keys = []
+        self.index_offsets = []
+        self.next_index_at = 0  # offset from which the next record gets an index entry
+        self._map = None
+        self._map_size = 0
+
+    @property
+    def index_path(self):
+        return self.path[:-len('.log')] + '.idx'
+
+    def note(self, offset, key, index_interval):
+        """Records that a record with `key` was placed at `offset`."""
+        if self.first_key is None:
+            self.first_key = key
+        self.last_key = key
+        if offset >= self.next_index_at:
+            self.index_keys.append(key)
+            self.index_offsets.append(offset)
+            self.next_index_at = offset + index_interval
+
+    def recover(self, index_interval):
+        """Rebuilds the index by scanning the file and truncates a corrupt tail."""
+        torn = self.catch_up(index_interval)
+        if torn:
+            logger.warning("truncating %d corrupt bytes at the end of %s", torn, self.path)
+            os.truncate(self.path, self.size)
+
+    def catch_up(self, index_interval):
+        """Indexes the records written after `size`, by scanning the file from there.
+        Returns the number of bytes following them that are not (yet) a valid record."""
+        with open(self.path, 'rb') as f:
+            f.seek(self.size)
+            data = f.read()
+        base = valid = self.size
+        for offset, key, _, end in _scan(data):
+            self.note(base + offset, key, index_interval)
+            valid = base + end
+        self.size = valid
+        return base + len(data) - valid
+
+    def load_index(self):
+        """Loads the index written when the segment was sealed, False if it is missing or stale."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        count = len(data) // INDEX_ENTRY.size
+        if count < 2 or len(data) % INDEX_ENTRY.size:
+            return False
+        entries = [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(count)]
+        # The last entry holds the last key and the segment size
+        self.last_key, self.size = entries.pop()
+        if self.size != os.path.getsize(self.path):
+            return False
+        self.index_keys = [key for key, _ in entries]
+        self.index_offsets = [offset for _, offset in entries]
+        self.first_key = self.index_keys[0]
+        return True
+
+    def write_index(self):
+        entries = list(zip(self.index_keys, self.index_offsets)) + [(self.last_key, self.size)]
+        with open(self.index_path, 'wb') as f:
+            f.write(b''.join(INDEX_ENTRY.pack(key, offset) for key, offset in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mapped(self):
+        """Read-only mmap of the segment's written bytes (None when empty)."""
+        if self._map_size != self.size:
+            if self.size == 0:
+                return None
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+            self._map_size = self.size
+        return self._map
+
+    def start_offset(self, key):
+        """Offset of the last indexed record before `key`, where a scan for `key` starts."""
+        i = bisect.bisect_left(self.index_keys, key) - 1
+        return self.index_offsets[i] if i >= 0 else 0
+
+    def close(self):
+        # Readers may still hold the map, it is released when they drop it
+        self._map = None
+        self._map_size = 0
+
+    def delete(self):
+        self.close()
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SegmentLog:
+    """Append-only, segmented, on-disk log of the events of one category."""
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, segment_seconds=DEFAULT_SEGMENT_SECONDS,
+                 index_interval=DEFAULT_INDEX_INTERVAL, flush_bytes=DEFAULT_FLUSH_BYTES, fsync='interval',
+                 max_bytes=None, max_age=None, read_only=False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.index_interval = index_interval
+        self.flush_bytes = flush_bytes
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.read_only = read_only
+        self._buffer = []
+        self._buffered = 0
+        self._dirty = False  # written but not fsynced
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        if read_only:
+            self._segments = []
+            self._file = self._lock_file = None
+            self._refresh()
+            return
+        self._lock_file = self._acquire()
+        try:
+            self._open()
+        except BaseException:
+            self._lock_file.close()
+            raise
+        self._prune()
+
+    def _acquire(self):
+        # Exclusive lock on the directory, held until close()
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise LogLocked(f"{self.directory} is open in another process") from None
+        return lock_file
+
+    def _open(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.log'))
+        self._segments = []
+        for i, name in enumerate(names):
+            segment = _Segment(os.path.join(self.directory, name))
+            # The last segment was being written to, it may end with a torn record
+            if i == len(names) - 1 or not segment.load_index():
+                segment.recover(self.index_interval)
+            self._segments.append(segment)
+        if not self._segments:
+            self._segments.append(_Segment(self._segment_path(1)))
+        self._file = open(self._segments[-1].path, 'ab')
+
+    def _refresh(self):
+        # caller must hold the lock (or be opening the log); read-only logs follow the
+        # segments the writer sealed, deleted and appended to since the last read
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.log'))
+        paths = [os.path.join(self.directory, name) for name in names]
+        known = {segment.path: segment for segment in self._segments}
+        segments = []
+        for i, path in enumerate(paths):
+            segment = known.get(path)
+            if segment is None:
+                segment = _Segment(path)
+                if i < len(paths) - 1 and segment.load_index():
+                    segments.append(segment)
+                    continue
+            try:
+                segment.catch_up(self.index_interval)
+            except FileNotFoundError:
+                continue  # deleted by the writer in the meantime
+            segments.append(segment)
+        self._segments = segments or [_Segment(self._segment_path(1))]
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:08d}.log")
+
+    @property
+    def active(self):
+        return self._segments[-1]
+
+    @property
+    def last_key(self):
+        """Sort key of the newest record, None when the log is empty."""
+        for segment in reversed(self._segments):
+            if segment.last_key is not None:
+                return segment.last_key
+        return None
+
+    def append_events(self, category, events, encoded):
+        """Event store listener: appends the newly stored events."""
+        self.extend((parse_timestamp(event['timestamp']), payload) for event, payload in zip(events, encoded))
+
+    def extend(self, records):
+        """Appends (key, JSON payload bytes) records. Keys never go backwards: a late
+        record is filed under the newest key, like in the event store."""
+        if self.read_only:
+            raise ValueError(f"{self.directory} is open read-only")
+        with self._lock:
+            for key, payload in records:
+                last_key = self.last_key
+                if last_key is not None and key < last_key:
+                    key = last_key
+                active = self.active
+                if active.first_key is not None and (
+                        active.size + self._buffered >= self.segment_bytes
+                        or key - active.first_key >= self.segment_seconds):
+                    self._roll()
+                    active = self.active
+                key_bytes = struct.pack('<d', key)
+                header = RECORD_HEADER.pack(len(payload), _checksum(key_bytes, payload), key)
+                offset = active.size + self._buffered
+                active.note(offset, key, self.index_interval)
+                self._buffer.append(header)
+                self._buffer.append(payload)
+                self._buffered += len(header) + len(payload)
+            if self._buffered >= self.flush_bytes:
+                self._write()
+
+    def _write(self):
+        # caller must hold the lock
+        if self._buffer:
+            self._file.write(b''.join(self._buffer))
+            self._file.flush()
+            self.active.size += self._buffered
+            self._buffer = []
+            self._buffered = 0
+            self._dirty = True
+        if self._dirty and self.fsync == 'always':
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._dirty = False
+
+    def _roll(self):
+        # caller must hold the lock
+        self._write()
+        if self._dirty:
+            self._sync()
+        self._file.close()
+        sealed = self.active
+        sealed.write_index()
+        number = int(os.path.basename(sealed.path)[:-len('.log')]) + 1
+        self._segments.append(_Segment(self._segment_path(number)))
+        self._file = open(self.active.path, 'ab')
+        self._prune()
+
+    def _prune(self):
+        # caller must hold the lock (or be opening the log); deletes the oldest sealed
+        # segments beyond max_bytes or max_age
+        if self.max_bytes is None and self.max_age is None:
+            return
+        newest = self.last_key
+        total = sum(s.size for s in self._segments)
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            too_old = (self.max_age is not None and newest is not None
+                       and (oldest.last_key is None or oldest.last_key < newest - self.max_age))
+            if not too_old and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            oldest.delete()
+            total -= oldest.size
+            del self._segments[0]
+
+    def flush(self, sync=None):
+        """Writes the buffered records; fsyncs them too unless the policy is 'never'."""
+        with self._lock:
+            self._write()
+            if self._dirty and (self.fsync != 'never' if sync is None else sync):
+                self._sync()
+
+    def read(self, start=float('-inf'), end=float('inf'), limit=None):
+        """Returns (payloads, truncated): the records with start <= key <= end, oldest
+        first, at most `limit` of them; `truncated` tells whether more matched."""
+        with self._lock:
+            if self.read_only:
+                self._refresh()
+            else:
+                self._write()
+            # Written bytes never change, so they can be scanned without the lock
+            segments = [(s, s.mapped()) for s in self._segments
+                        if s.first_key is not None and s.first_key <= end and s.last_key >= start]
+        payloads = []
+        for segment, data in segments:
+            if data is None:
+                continue
+            for _, key, payload, _ in _scan(data, segment.start_offset(start)):
+                if key < start:
+                    continue
+                if key > end:
+                    break
+                if limit is not None and len(payloads) == limit:
+                    return payloads, True
+                payloads.append(payload)
+        return payloads, False
+
+    def version(self):
+        """Position of the end of the log, as a string that changes whenever records are
+        appended or segments pruned; a read-only log first follows the writer."""
+        with self._lock:
+            if self.read_only:
+                self._refresh()
+            first, active = self._segments[0], self.active
+            return (f"{os.path.basename(first.path)}-{os.path.basename(active.path)}"
+                    f"-{active.size + self._buffered}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(s.size for s in self._segments) + self._buffered,
+                "buffered": self._buffered,
+                "first_key": next((s.first_key for s in self._segments if s.first_key is not None), None),
+                "last_key": self.last_key,
+            }
+
+    def close(self):
+        with self._lock:
+            if self.read_only:
+                for segment in self._segments:
+                    segment.close()
+                return
+            self._write()
+            if self._dirty:
+                self._sync()
+            self._file.close()
+            for segment in self._segments:
+                segment.close()
+            self._lock_file.close()
+
+
+def open_logs(directory, categories, **options):
+    """Opens (or creates) one SegmentLog per category under `directory`. Raises LogLocked,
+    having closed the others, when another process has one of them open."""
+    logs = {}
+    try:
+        for category in categories:
+            logs[category] = SegmentLog(os.path.join(directory, category), **options)
+    except BaseException:
+        for log in logs.values():
+            log.close()
+        raise
+    return logs
+
+
+def restore(stores, logs):
+    """Reloads each store with the logged events it would still retain, oldest first."""
+    for category, store in stores.items():
+        log = logs[category]
+        last_key = log.last_key
+        if last_key is None:
+            continue
+        start = last_key - store.retention if store.retention is not None else float('-inf')
+        payloads, _ = log.read(start)
+        store.extend([json.loads(payload) for payload in payloads[-store.capacity:]])
+
+
+class LogFlusher(threading.Thread):
+    """Daemon thread writing (and, with fsync='interval', syncing) the logs every `interval` seconds."""
+
+    def __init__(self, logs, interval=1.0):
+        super().__init__(name='event-log-flusher', daemon=True)
+        self.logs = logs
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for log in self.logs.values():
+                log.flush()
+
+    def stop(self):
+        self._stopped.set()
+        for log in self.logs.values():
+            log.flush()
@@ -0,0 +1,215 @@
+import itertools
+import logging
+import mmap
+import struct
+import threading
+from collections import deque
+from app.encoding import loads
+
+# Event stream shared by the processes of the pre-fork server (see app/server.py).
+# A single writer process owns the stores that events are written to; every event they
+# store is appended once to a ring buffer in shared memory, and the worker processes
+# serving the API follow that ring into their own stores (replicas), lock-free. The
+# replicas take over the epochs and sequence numbers of the writer's stores, so every
+# worker serves the same events under the same cursors and ETags, and SSE frames get the
+# same ids in every worker.
+#
+# Layout: a header of 64-bit words (the head, the tail, then the epoch of each category)
+# followed by the ring. A record is its header (payload length, category number, the
+# event's sequence number in its store and the record number) and the event's JSON
+# encoding, padded to 8 bytes; a record never wraps, the end of the ring is skipped
+# instead. Positions are logical byte offsets that only grow, the ring offset being the
+# position modulo its size.
+#
+# The writer writes the records, then publishes the new head; before reusing space it
+# moves the tail past the records it overwrites. A reader copies the records between its
+# position and the head, then checks the tail: if the tail moved past its position while
+# it was reading, what it copied may be torn and it starts over from the tail (Overrun).
+# The head and the tail are aligned 64-bit words written in a single store, and the
+# writer's stores become visible in program order (x86-64); readers never write.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 64 * 1024 * 1024  # Bytes of ring, about a day of the default sample rates
+MIN_SIZE = 1024 * 1024  # Records are limited to a quarter of the ring, ingested events to 64 KiB
+DEFAULT_INTERVAL = 0.01  # Seconds between polls of a follower
+
+RECORD_HEADER = struct.Struct('<IHxxQQ')  # payload length, category number, sequence number, record number
+PADDING = 0xFFFFFFFF  # Length of the filler record at the end of the ring
+HEAD, TAIL = 0, 1  # Header words
+EPOCHS = 2  # First header word holding a category epoch
+
+
+class Overrun(Exception):
+    """The reader fell behind by more than the ring and lost records."""
+
+
+def _aligned(length):
+    return (length + 7) & ~7
+
+
+class SharedLog:
+    """Ring of the events stored by the writer process, in anonymous shared memory.
+
+    Create it before forking: the mapping is inherited by the child processes.
+    """
+
+    def __init__(self, categories, size=DEFAULT_SIZE):
+        self.categories = list(categories)
+        if size % 8 or size < MIN_SIZE:
+            raise ValueError(f"size must be a multiple of 8 and at least {MIN_SIZE} bytes")
+        self.size = size
+        self._numbers = {category: number for number, category in enumerate(self.categories)}
+        self._header_bytes = _aligned(8 * (EPOCHS + len(self.categories)))
+        self._map = mmap.mmap(-1, self._header_bytes + size)
+        self._words = memoryview(self._map)[:self._header_bytes].cast('Q')
+        self._ring = self._header_bytes
+        # Writer state, only used in the writer process
+        self._records = deque()  # (position, length) of the records in the ring, oldest first
+        self._next_number = 1
+        self._next_seqs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def head(self):
+        return self._words[HEAD]
+
+    @property
+    def tail(self):
+        return self._words[TAIL]
+
+    def epoch(self, category):
+        """Epoch of the writer's store of `category`."""
+        return self._words[EPOCHS + self._numbers[category]].to_bytes(8, 'little').decode()
+
+    def attach(self, stores):
+        """Publishes the epochs of the writer's stores and appends every event they store."""
+        for category, store in stores.items():
+            self._words[EPOCHS + self._numbers[category]] = int.from_bytes(store.epoch.encode(), 'little')
+            self._next_seqs[category] = store.last_seq + 1
+            store.subscribe(self.append_events)
+
+    def append_events(self, category, events, encoded):
+        """Store listener: appends the events' encodings, seen by the readers at once."""
+        largest = max(map(len, encoded), default=0)
+        if _aligned(RECORD_HEADER.size + largest) > self.size // 4:
+            raise ValueError(f"event of {largest} bytes is too large for the shared log")
+        with self._lock:
+            head = self._words[HEAD]
+            number = self._numbers[category]
+            seq = self._next_seqs[category]
+            for payload in encoded:
+                length = _aligned(RECORD_HEADER.size + len(payload))
+                offset = head % self.size
+                if self.size - offset < length:
+                    # Fill the end of the ring and start over at its beginning
+                    self._reserve(head, self.size - offset)
+                    if self.size - offset >= RECORD_HEADER.size:
+                        RECORD_HEADER.pack_into(self._map, self._ring + offset, PADDING, 0, 0, 0)
+                    head += self.size - offset
+                    offset = 0
+                self._reserve(head, length)
+                RECORD_HEADER.pack_into(self._map, self._ring + offset, len(payload), number, seq, self._next_number)
+                start = self._ring + offset + RECORD_HEADER.size
+                self._map[start:start + len(payload)] = payload
+                self._records.append((head, length))
+                head += length
+                seq += 1
+                self._next_number += 1
+            self._next_seqs[category] = seq
+            self._words[HEAD] = head
+
+    def _reserve(self, position, length):
+        # Moves the tail past the records that writing [position, position + length) overwrites
+        tail = self._words[TAIL]
+        end = position + length - self.size
+        if tail >= end:
+            return
+        while self._records and self._records[0][0] < end:
+            self._records.popleft()
+        self._words[TAIL] = self._records[0][0] if self._records else position
+
+    def read(self, position):
+        """Returns ([(category, seq, number, payload)], new position) of the records after
+        `position`, oldest first. Raises Overrun when some were already overwritten."""
+        head = self._words[HEAD]
+        start = position
+        if start < self._words[TAIL]:
+            raise Overrun(f"position {position} was overwritten")
+        records = []
+        try:
+            while position < head:
+                offset = position % self.size
+                if self.size - offset < RECORD_HEADER.size:
+                    position += self.size - offset
+                    continue
+                length, number, seq, record_number = RECORD_HEADER.unpack_from(self._map, self._ring + offset)
+                if length == PADDING:
+                    position += self.size - offset
+                    continue
+                payload = self._ring + offset + RECORD_HEADER.size
+                records.append((self.categories[number], seq, record_number, self._map[payload:payload + length]))
+                position += _aligned(RECORD_HEADER.size + length)
+        except IndexError:
+            # A record header torn by the writer is reported as an overrun below
+            if self._words[TAIL] <= start:
+                raise
+        # What was read is intact if the writer did not reuse its space in the meantime
+        if self._words[TAIL] > start:
+            raise Overrun("records were overwritten while being read")
+        return records, position
+
+    def close(self):
+        self._words.release()
+        self._map.close()
+
+
+class Follower(threading.Thread):
+    """Daemon thread replicating the events of a SharedLog into the stores (and stream hub)
+    of a worker process."""
+
+    def __init__(self, log, stores, hub=None, interval=DEFAULT_INTERVAL):
+        super().__init__(name='shared-log-follower', daemon=True)
+        self.log = log
+        self.stores = stores
+        self.hub = hub
+        self.interval = interval
+        self.position = log.tail
+        self.overruns = 0
+        self._stopped = threading.Event()
+        for category, store in stores.items():
+            store.clear(epoch=log.epoch(category))
+
+    def poll(self):
+        """Applies the records appended since the last poll; returns how many there were."""
+        while True:
+            try:
+                records, position = self.log.read(self.position)
+                break
+            except Overrun:
+                # Fell behind the writer: continue from the oldest record still there; the
+                # stores that missed events start over at the sequence number it gives
+                self.overruns += 1
+                logger.warning("fell behind the shared event log, resynchronizing")
+                self.position = self.log.tail
+        for category, run in itertools.groupby(records, key=lambda record: record[0]):
+            run = list(run)
+            _, seq, number, _ = run[0]
+            store = self.stores[category]
+            if store.last_seq + 1 != seq:
+                store.clear(epoch=store.epoch, next_seq=seq)
+            if self.hub is not None and self.hub.last_id + 1 != number:
+                self.hub.reset(number)
+            store.extend([loads(payload) for *_, payload in run], [payload for *_, payload in run])
+        self.position = position
+        return len(records)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("failed to apply shared event log records")
+
+    def stop(self):
+        self._stopped.set()
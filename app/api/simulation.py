@@ -0,0 +1,186 @@
+import argparse
+import datetime
+import gzip
+import math
+import os
+import random
+import time
+from app.api.categories import REGISTRY
+from app.api.event_store import CATEGORIES, parse_timestamp
+from app.api.sample_producer import BATCH_GENERATORS
+from app.encoding import dumps
+
+# Simulated facility history, for testing retention, rollups and queries over days of data.
+# The sample generators stamp events around datetime.now(); here a virtual clock walks
+# from `start` over the requested span in steps of `step` seconds instead. For every step
+# and category the number of events is drawn around the category rate at that time of
+# day, the events come from the bulk generators (app/api/sample_log_generator.py) and get
+# timestamps spread over the step, in order. Only one step is held in memory at a time.
+#
+# The same seed, start and rates always give the same events. Run as a script to write
+# the history as NDJSON (ready for POST /api/ingest/<category>) or as an event log that
+# the app restores at startup (EVENT_LOG_DIR). The event log must be empty: a log keeps
+# its records in key order and files a late record under its newest key, so history
+# appended behind live events would all be stamped with the newest timestamp. Generate
+# it before the app first runs, or into a new directory:
+#
+#     python -m app.api.simulation --days 7 --ndjson history/
+#     python -m app.api.simulation --days 7 --event-log instance/event-log
+
+# Average events per hour of each category, the share of it the rate swings up and down
+# over a day, and the UTC hour of the peak (shift changes, visiting hours, nightly jobs),
+# as declared in the category registry
+DEFAULT_RATES = {name: category.rate for name, category in REGISTRY.items() if category.rate}
+
+DEFAULT_STEP = 60  # Seconds of simulated time generated at once
+
+
+def hourly_rate(rate, epoch):
+    """Events per hour of a DEFAULT_RATES-style (average, swing, peak hour) rate at `epoch`."""
+    average, swing, peak = rate
+    hour = (epoch % 86400) / 3600
+    return average * (1 + swing * math.cos(2 * math.pi * (hour - peak) / 24))
+
+
+def _poisson(rng, mean):
+    # Knuth's method is exact for small means, a rounded normal is close enough above
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _format(epoch):
+    # The generators' timestamp format, e.g. '2025-04-30T12:00:00+00:00Z'
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat() + 'Z'
+
+
+def simulate(start, seconds, rates=None, seed=0, step=DEFAULT_STEP):
+    """Yields (category, events) for every `step` seconds from `start` (epoch seconds) over
+    `seconds`, oldest first; the events of each category are in timestamp order.
+
+    `rates` maps the categories to simulate to DEFAULT_RATES-style rates (all of them
+    by default).
+    """
+    rates = DEFAULT_RATES if rates is None else rates
+    start = int(start)
+    for number, offset in enumerate(range(0, int(seconds), step)):
+        first = start + offset
+        width = min(step, int(seconds) - offset)
+        stamps = None  # formatted once per step, for all categories
+        for category in CATEGORIES:
+            if category not in rates:
+                continue
+            # Every step of every category has its own generator state, so a step does
+            # not depend on how many events the previous ones drew
+            rng = random.Random(f"{seed}:{category}:{number}")
+            mean = hourly_rate(rates[category], first + width / 2) * width / 3600
+            count = _poisson(rng, mean)
+            if not count:
+                continue
+            if stamps is None:
+                stamps = [_format(first + s) for s in range(width)]
+            batch = BATCH_GENERATORS[category](count, seed=rng.getrandbits(64))
+            batch.columns['timestamp'] = [stamps[s] for s in sorted(rng.choices(range(width), k=count))]
+            yield category, batch.to_dicts()
+
+
+def simulate_into(stores, start, seconds, rates=None, seed=0, step=DEFAULT_STEP):
+    """Appends the simulated events to the event stores; returns the number of events."""
+    rates = {category: rate for category, rate in (DEFAULT_RATES if rates is None else rates).items()
+             if category in stores}
+    total = 0
+    for category, events in simulate(start, seconds, rates, seed, step):
+        stores[category].extend(events)
+        total += len(events)
+    return total
+
+
+def write_ndjson(directory, start, seconds, rates=None, seed=0, step=DEFAULT_STEP, compress=False):
+    """Writes the simulated events to <category>.ndjson (.ndjson.gz with `compress`) files
+    in `directory`; returns the number of events per category."""
+    os.makedirs(directory, exist_ok=True)
+    suffix = '.ndjson.gz' if compress else '.ndjson'
+    files = {}
+    counts = dict.fromkeys(DEFAULT_RATES if rates is None else rates, 0)
+    try:
+        for category, events in simulate(start, seconds, rates, seed, step):
+            out = files.get(category)
+            if out is None:
+                path = os.path.join(directory, category + suffix)
+                # Level 1: a week of history is mostly about generation speed
+                out = files[category] = gzip.open(path, 'wb', compresslevel=1) if compress else open(path, 'wb')
+            out.write(b'\n'.join(map(dumps, events)) + b'\n')
+            counts[category] += len(events)
+    finally:
+        for out in files.values():
+            out.close()
+    return counts
+
+
+def write_event_log(logs, start, seconds, rates=None, seed=0, step=DEFAULT_STEP):
+    """Writes the simulated events to empty SegmentLogs (app/api/segment_log.py), one per
+    category; returns the number of events per category. Raises ValueError when a log
+    already has records, which would be older keys than the history's."""
+    rates = {category: rate for category, rate in (DEFAULT_RATES if rates is None else rates).items()
+             if category in logs}
+    written = sorted(category for category in rates if logs[category].last_key is not None)
+    if written:
+        raise ValueError(f"the event log is not empty: {', '.join(written)}")
+    counts = dict.fromkeys(rates, 0)
+    for category, events in simulate(start, seconds, rates, seed, step):
+        logs[category].extend((parse_timestamp(event['timestamp']), dumps(event)) for event in events)
+        counts[category] += len(events)
+    for log in logs.values():
+        log.flush()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes days of simulated facility history.")
+    parser.add_argument('--days', type=float, default=7, help="simulated days")
+    parser.add_argument('--end', help="ISO timestamp the history ends at (default: now)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplies every category rate")
+    parser.add_argument('--categories', help="comma separated categories (default: all)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--ndjson', metavar='DIR', help="write <category>.ndjson files to DIR")
+    target.add_argument('--event-log', metavar='DIR', help="write to the event log in DIR (EVENT_LOG_DIR), which must be empty")
+    parser.add_argument('--gzip', action='store_true', help="gzip the NDJSON files")
+    args = parser.parse_args()
+
+    categories = args.categories.split(',') if args.categories else list(DEFAULT_RATES)
+    for category in categories:
+        if category not in DEFAULT_RATES:
+            parser.error(f"unknown category: {category}")
+    rates = {category: (DEFAULT_RATES[category][0] * args.scale,) + DEFAULT_RATES[category][1:]
+             for category in categories}
+    end = parse_timestamp(args.end) if args.end else time.time()
+    seconds = int(args.days * 86400)
+    start = int(end) - seconds
+
+    started = time.perf_counter()
+    if args.ndjson:
+        counts = write_ndjson(args.ndjson, start, seconds, rates, args.seed, compress=args.gzip)
+    else:
+        from app.api.segment_log import open_logs
+        logs = open_logs(args.event_log, categories)
+        try:
+            counts = write_event_log(logs, start, seconds, rates, args.seed)
+        except ValueError as error:
+            parser.error(f"{error}, write the history to a new directory")
+        finally:
+            for log in logs.values():
+                log.close()
+    elapsed = time.perf_counter() - started
+    for category, count in counts.items():
+        print(f"{category:<20}{count:>12,}")
+    total = sum(counts.values())
+    print(f"{'total':<20}{total:>12,} events over {args.days:g} days in {elapsed:.1f}s ({total / elapsed:,.0f}/s)")
+
+
+if __name__ == '__main__':
+    main()
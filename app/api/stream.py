@@ -0,0 +1,139 @@
+import threading
+import time
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from app.api.event_store import CATEGORIES
+from app.encoding import dumps
+
+# Server-Sent Events endpoint multiplexing all the log categories.
+# Clients subscribe with ?categories=network,server_logs (default: all) and get every
+# new event pushed as it is stored. Each frame carries a global id, so a reconnecting
+# EventSource (which sends Last-Event-ID) is only replayed what it missed.
+
+bp = Blueprint('stream_api', __name__, url_prefix='/api/stream')
+
+DEFAULT_REPLAY_CAPACITY = 5000  # Frames kept for Last-Event-ID resume, all categories combined
+DEFAULT_KEEPALIVE = 15.0  # Seconds of silence before a keepalive comment is sent
+RETRY_MS = 3000  # Reconnect delay suggested to the browser
+
+
+class EventHub:
+    """Encodes stored events into SSE frames once and fans them out to every subscriber.
+
+    Frames live in a ring buffer indexed by their contiguous id, so a resume
+    position is found in O(1). Subscribers block on a condition variable and are
+    all woken when new frames are published.
+    """
+
+    def __init__(self, capacity=DEFAULT_REPLAY_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._frames = [None] * capacity  # (category, frame bytes)
+        self._start = 0
+        self._size = 0
+        self._next_id = 1
+        self._cond = threading.Condition()
+
+    @property
+    def last_id(self):
+        return self._next_id - 1
+
+    def reset(self, next_id):
+        """Drops the frames and numbers the next one `next_id`, to follow the numbering of
+        another hub (see app/api/shared_log.py)."""
+        with self._cond:
+            self._start = 0
+            self._size = 0
+            self._next_id = next_id
+            self._cond.notify_all()
+
+    def attach(self, stores):
+        """Subscribes the hub to every store so new events get published."""
+        for store in stores.values():
+            store.subscribe(self.publish)
+
+    def publish(self, category, events, encoded=None):
+        """Publishes events, `encoded` being their JSON encodings when the caller has them."""
+        # Serialize outside the lock, once per event regardless of the subscriber count
+        payloads = encoded if encoded is not None else [dumps(event) for event in events]
+        with self._cond:
+            for payload in payloads:
+                frame = b"id: %d\nevent: %s\ndata: %s\n\n" % (self._next_id, category.encode(), payload)
+                if self._size < self.capacity:
+                    index = (self._start + self._size) % self.capacity
+                    self._size += 1
+                else:
+                    index = self._start
+                    self._start = (self._start + 1) % self.capacity
+                self._frames[index] = (category, frame)
+                self._next_id += 1
+            self._cond.notify_all()
+
+    def wait(self, last_id, categories, timeout):
+        """Blocks until frames newer than `last_id` exist (or `timeout` expires).
+
+        Returns (frame bytes for the requested categories, new last id).
+        """
+        with self._cond:
+            if last_id >= self._next_id - 1:
+                self._cond.wait(timeout)
+            return self._read_after(last_id, categories)
+
+    def _read_after(self, last_id, categories):
+        # caller must hold the condition's lock
+        first_id = self._next_id - self._size
+        offset = min(max(last_id + 1 - first_id, 0), self._size)
+        chunks = []
+        for i in range(offset, self._size):
+            category, frame = self._frames[(self._start + i) % self.capacity]
+            if category in categories:
+                chunks.append(frame)
+        return b''.join(chunks), self._next_id - 1
+
+
+def parse_categories(value, available=CATEGORIES):
+    """Parses ?categories=a,b into a set, None if a category not in `available` is given."""
+    if not value:
+        return set(available)
+    categories = {c.strip() for c in value.split(',') if c.strip()}
+    if not categories or not categories.issubset(available):
+        return None
+    return categories
+
+
+@bp.route('/')
+def stream_events():
+    """Streams new events of the requested categories as text/event-stream."""
+    available = list(current_app.extensions['event_stores'])
+    categories = parse_categories(request.args.get('categories'), available)
+    if categories is None:
+        return jsonify({"error": f"categories must be a subset of {', '.join(available)}"}), 400
+
+    hub = current_app.extensions['event_hub']
+    keepalive = current_app.config.get('STREAM_KEEPALIVE', DEFAULT_KEEPALIVE)
+
+    # EventSource sends Last-Event-ID on reconnect; the query parameter allows an explicit resume
+    resume = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(resume) if resume else hub.last_id
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+    if last_id > hub.last_id:
+        last_id = hub.last_id  # id from before a restart, start from now
+
+    def generate(last_id):
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        quiet_since = time.monotonic()
+        while True:
+            chunk, last_id = hub.wait(last_id, categories, keepalive)
+            if chunk:
+                quiet_since = time.monotonic()
+                yield chunk
+            elif time.monotonic() - quiet_since >= keepalive:
+                quiet_since = time.monotonic()
+                yield b": keepalive\n\n"
+
+    response = Response(stream_with_context(generate(last_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
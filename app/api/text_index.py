@@ -0,0 +1,94 @@
+import bisect
+import re
+from app.api.categories import REGISTRY
+from app.api.indexes import PostingIndex
+
+# Full-text search over the free-text fields of the logs ("SSH", "breach", "Cell Block B").
+# Each event store keeps an inverted index: token -> posting list of the sequence numbers
+# of the events containing it (see app/api/indexes.py).
+#
+# A query is a list of terms that must all match; a term ending with '*' matches every
+# token starting with it ("contra*"). Matching costs the size of the posting lists of
+# the query terms, never a scan of the retained events.
+
+# Free-text fields indexed per category
+TEXT_FIELDS = {name: category.text_fields for name, category in REGISTRY.items() if category.text_fields}
+
+MAX_QUERY_TERMS = 8
+
+_token_pattern = re.compile(r'[a-z0-9]+')
+_term_pattern = re.compile(r'[a-z0-9]+\*?')
+
+
+def tokenize(text):
+    """Lowercased alphanumeric tokens of `text`, e.g. 'Cell Block B' -> ['cell', 'block', 'b']."""
+    return _token_pattern.findall(str(text).lower())
+
+
+def parse_query(query):
+    """Parses a query into (token, is_prefix) terms."""
+    terms = []
+    for term in _term_pattern.findall(query.lower()):
+        if term.endswith('*'):
+            terms.append((term[:-1], True))
+        else:
+            terms.append((term, False))
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"queries are limited to {MAX_QUERY_TERMS} terms")
+    return terms
+
+
+class TextIndex(PostingIndex):
+    """Inverted index over the `fields` of the events of one store, keyed by token."""
+
+    def __init__(self, fields):
+        super().__init__()
+        self.fields = tuple(fields)
+        self._vocabulary = []  # sorted tokens, for prefix terms
+        self._token_cache = {}
+
+    def keys(self, event):
+        values = tuple(event.get(field) for field in self.fields)
+        tokens = self._token_cache.get(values)
+        if tokens is None:
+            # Field values mostly repeat (they come from small sets), so this is rarely reached
+            if len(self._token_cache) > 4096:
+                self._token_cache.clear()
+            unique = {}
+            for value in values:
+                if value is not None:
+                    unique.update(dict.fromkeys(tokenize(value)))
+            tokens = self._token_cache[values] = tuple(unique)
+        return tokens
+
+    def _key_added(self, token):
+        bisect.insort(self._vocabulary, token)
+
+    def _key_removed(self, token):
+        del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def clear(self):
+        super().clear()
+        self._vocabulary = []
+
+    def _lookup(self, token, prefix):
+        if not prefix:
+            postings = self._postings.get(token)
+            return [postings] if postings is not None else []
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, token)
+        matches = []
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            matches.append(self._postings[vocabulary[i]])
+            i += 1
+        return matches
+
+    def terms(self, query):
+        return [self._lookup(token, prefix) for token, prefix in parse_query(query)]
+
+
+def attach_text_indexes(stores):
+    """Adds a TextIndex named 'text' to the store of every category with free-text fields."""
+    for category, fields in TEXT_FIELDS.items():
+        if category in stores:
+            stores[category].add_index('text', TextIndex(fields))
@@ -0,0 +1,246 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+# Asynchronous write pipeline between the producers and the event stores.
+# Producers (the sample producer, the ingest endpoint) only queue their events; a single
+# writer thread drains the queue and applies them in micro-batches of up to `batch_size`
+# events, waiting at most `batch_delay` seconds for a batch to fill. A batch costs one
+# store lock acquisition and one round of listener notifications (rollups, event log,
+# stream hub) per category, and one snapshot publication for the lock-free readers
+# (see EventStore), instead of one of each per event.
+#
+# The queue is bounded in events. submit() waits up to `timeout` seconds for room and
+# raises QueueFull after that, which the ingest endpoint turns into a 429.
+#
+# In the pre-fork server (app/server.py) the writer thread runs in the writer process
+# only; the workers forward their submissions to it through a ForwardingWriter.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_EVENTS = 100000
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_BATCH_DELAY = 0.005  # Seconds
+LATENCY_SAMPLES = 1024  # Recent submissions the latency percentiles are computed over
+
+
+class QueueFull(Exception):
+    """The write queue has no room for the submitted events."""
+
+
+class EventWriter(threading.Thread):
+    """Daemon thread applying queued events to the stores in micro-batches."""
+
+    def __init__(self, stores, capacity=DEFAULT_QUEUE_EVENTS, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_delay=DEFAULT_BATCH_DELAY):
+        super().__init__(name='event-writer', daemon=True)
+        self.stores = stores
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._items = deque()  # (category, events, submitted at), oldest first
+        self._pending = 0  # events in self._items
+        self._writing = 0  # events taken by the writer and not yet visible
+        self._changed = threading.Condition()
+        self._stopped = False
+        # Metrics
+        self.batches = 0
+        self.events = 0
+        self.max_batch = 0
+        self.last_batch = 0
+        self.busy = 0.0  # seconds spent applying batches
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    @property
+    def full(self):
+        return self._pending >= self.capacity
+
+    def submit(self, category, events, timeout=0):
+        """Queues `events` for the store of `category`.
+
+        Waits up to `timeout` seconds for room, then raises QueueFull. A submission
+        larger than the whole queue is accepted once the queue is empty.
+        """
+        if category not in self.stores:
+            raise KeyError(category)
+        events = list(events)
+        if not events:
+            return
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self._pending and self._pending + len(events) > self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopped:
+                    raise QueueFull(f"{self._pending} events are waiting to be written")
+                self._changed.wait(remaining)
+            self._items.append((category, events, time.monotonic()))
+            self._pending += len(events)
+            self._changed.notify_all()
+
+    def _take(self):
+        # Waits for a batch; returns [] once stopped with nothing left to write
+        with self._changed:
+            while not self._items and not self._stopped:
+                self._changed.wait()
+            if self._items and not self._stopped:
+                # Give a small batch until batch_delay after its oldest submission to grow
+                deadline = self._items[0][2] + self.batch_delay
+                while self._pending < self.batch_size and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+            batch = []
+            count = 0
+            while self._items and (not batch or count + len(self._items[0][1]) <= self.batch_size):
+                item = self._items.popleft()
+                batch.append(item)
+                count += len(item[1])
+            self._pending -= count
+            self._writing = count
+            self._changed.notify_all()  # room for blocked submitters
+            return batch
+
+    def write_batch(self, batch):
+        """Applies (category, events, submitted at) items, one extend() per category."""
+        started = time.perf_counter()
+        by_category = {}
+        for category, events, _ in batch:
+            by_category.setdefault(category, []).extend(events)
+        for category, events in by_category.items():
+            self.stores[category].extend(events)
+        visible = time.monotonic()
+        count = sum(len(events) for events in by_category.values())
+        with self._changed:
+            self.batches += 1
+            self.events += count
+            self.last_batch = count
+            self.max_batch = max(self.max_batch, count)
+            self.busy += time.perf_counter() - started
+            self._latencies.extend(visible - submitted for _, _, submitted in batch)
+            self._writing = 0
+            self._changed.notify_all()
+
+    def run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                self.write_batch(batch)
+            except Exception:
+                # A bad event must not stop the pipeline for everyone else
+                logger.exception("dropping a batch of %d events", self._writing)
+                with self._changed:
+                    self._writing = 0
+                    self._changed.notify_all()
+
+    def flush(self, timeout=None):
+        """Waits until every submitted event is visible in the stores; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    def stop(self):
+        """Writes what is queued, then ends the thread."""
+        if self.is_alive():
+            self.flush()
+        with self._changed:
+            self._stopped = True
+            self._changed.notify_all()
+
+    def stats(self):
+        with self._changed:
+            latencies = sorted(self._latencies)
+            stats = {
+                "queue_depth": self._pending,
+                "queue_capacity": self.capacity,
+                "batches": self.batches,
+                "events": self.events,
+                "average_batch": round(self.events / self.batches, 1) if self.batches else 0,
+                "last_batch": self.last_batch,
+                "max_batch": self.max_batch,
+                # Events applied per second of writing, i.e. what one writer can sustain
+                "events_per_second": round(self.events / self.busy) if self.busy else 0,
+            }
+        # Submission to visible in the store, over the last LATENCY_SAMPLES submissions
+        stats["latency_ms"] = {
+            name: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 3) if latencies else 0
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        }
+        return stats
+
+
+class ForwardingWriter:
+    """Stands in for the EventWriter in the workers of the pre-fork server (app/server.py).
+
+    Submissions go to `queue` (a bounded multiprocessing queue of (category, events)),
+    which the writer process drains into its EventWriter (see SubmissionReceiver). When
+    it stays full for `timeout` seconds, submit() raises QueueFull like the EventWriter.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._lock = threading.Lock()
+        self.submissions = 0
+        self.events = 0
+
+    @property
+    def full(self):
+        return self.queue.full()
+
+    def submit(self, category, events, timeout=0):
+        events = list(events)
+        if not events:
+            return
+        try:
+            self.queue.put((category, events), timeout=timeout)
+        except queue.Full:
+            raise QueueFull("the writer process is not keeping up") from None
+        with self._lock:
+            self.submissions += 1
+            self.events += len(events)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self.queue.qsize(),  # submissions, of all the workers
+                "batches": self.submissions,  # forwarded by this worker
+                "events": self.events,
+            }
+
+
+class SubmissionReceiver(threading.Thread):
+    """Daemon thread of the writer process handing the submissions of ForwardingWriters to `writer`."""
+
+    def __init__(self, queue, writer):
+        super().__init__(name='submission-receiver', daemon=True)
+        self.queue = queue
+        self.writer = writer
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            category, events = item
+            # Wait for room as long as it takes: the workers see the queue fill up meanwhile
+            while True:
+                try:
+                    self.writer.submit(category, events, timeout=1.0)
+                    break
+                except QueueFull:
+                    continue
+                except KeyError:
+                    logger.warning("dropping %d forwarded events of unknown category %s", len(events), category)
+                    break
+
+    def stop(self):
+        self.queue.put(None)
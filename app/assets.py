@@ -0,0 +1,151 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from flask import Blueprint, abort, current_app, request, url_for
+from app.api.etag import not_modified
+from app.compression import compress
+
+# Static asset pipeline.
+# The JS/CSS/SVG files under app/static are compressed to gzip and brotli once (at the
+# highest levels, since it happens once per process) and served from /assets under
+# content-hashed names, e.g. /assets/js/core.3f9a0c1e.js. A hashed name never changes
+# content, so browsers may cache it forever; templates link to it via asset_url().
+# Relative ES module imports are rewritten to the hashed names too, so changing core.js
+# also changes the name of every module importing it.
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+EXTENSIONS = {'.js', '.css', '.svg'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+GZIP_LEVEL = 9
+BR_LEVEL = 11
+
+_import_pattern = re.compile(r'''(\bfrom\s*|\bimport\s*\(?\s*)(["'])(\./[\w./-]+\.js)\2''')
+
+
+class Asset:
+    """One static file: its content, content hash and precompressed encodings."""
+    __slots__ = ('name', 'hashed_name', 'mimetype', 'hash', 'encodings')
+
+    def __init__(self, name, data):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.hash = hashlib.blake2b(data, digest_size=8).hexdigest()
+        root, ext = os.path.splitext(name)
+        self.hashed_name = f"{root}.{self.hash}{ext}"
+        self.encodings = {
+            'br': compress(data, 'br', BR_LEVEL),
+            'gzip': compress(data, 'gzip', GZIP_LEVEL),
+            'identity': data,
+        }
+
+
+class AssetManifest:
+    """The assets of a static folder, addressable by plain and by hashed name."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.assets = {}
+        self._by_name = {}
+        sources = {}
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                if os.path.splitext(filename)[1] in EXTENSIONS:
+                    path = os.path.join(dirpath, filename)
+                    name = os.path.relpath(path, folder).replace(os.sep, '/')
+                    with open(path, 'rb') as f:
+                        sources[name] = f.read()
+        for name in sorted(sources):
+            self._build(name, sources, ())
+
+    def _build(self, name, sources, importers):
+        asset = self.assets.get(name)
+        if asset is not None:
+            return asset
+        data = sources[name]
+        if name.endswith('.js'):
+            directory = os.path.dirname(name)
+
+            def rewrite(match):
+                target = os.path.normpath(os.path.join(directory, match.group(3))).replace(os.sep, '/')
+                if target not in sources or target in importers:
+                    return match.group(0)  # unknown file or import cycle, keep the plain name
+                hashed = self._build(target, sources, importers + (name,)).hashed_name
+                relative = './' + os.path.relpath(hashed, directory or '.').replace(os.sep, '/')
+                return f"{match.group(1)}{match.group(2)}{relative}{match.group(2)}"
+
+            data = _import_pattern.sub(rewrite, data.decode()).encode()
+        asset = self.assets[name] = Asset(name, data)
+        self._by_name[name] = asset
+        self._by_name[asset.hashed_name] = asset
+        return asset
+
+    def get(self, name):
+        """Returns the Asset served under `name` (plain or hashed), or None."""
+        return self._by_name.get(name)
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def _signature(folder):
+    # Changes whenever a file is added, removed or modified
+    entries = []
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            stat = os.stat(os.path.join(dirpath, filename))
+            entries.append((dirpath, filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+def get_manifest():
+    """Returns the AssetManifest of the app's static folder, built on first use.
+
+    Manifests are shared by all apps of the process. In debug mode the folder is
+    checked for changes on every call so edits show up without a restart.
+    """
+    folder = current_app.static_folder
+    with _manifests_lock:
+        cached = _manifests.get(folder)
+        if cached is not None and not current_app.debug:
+            return cached[1]
+        signature = _signature(folder)
+        if cached is None or cached[0] != signature:
+            cached = _manifests[folder] = (signature, AssetManifest(folder))
+        return cached[1]
+
+
+def asset_url(name):
+    """URL of a static file under its content-hashed name, for the templates."""
+    asset = get_manifest().get(name)
+    if asset is None:
+        return url_for('static', filename=name)
+    return url_for('assets.serve', filename=asset.hashed_name)
+
+
+@bp.route('/<path:filename>')
+def serve(filename):
+    """Serves a precompressed asset; hashed names are cacheable forever."""
+    asset = get_manifest().get(filename)
+    if asset is None:
+        abort(404)
+    # A plain name may change content, so it has to be revalidated
+    cache_control = IMMUTABLE if filename == asset.hashed_name else 'no-cache'
+    cached = not_modified(asset.hash)
+    if cached is not None:
+        cached.headers['Cache-Control'] = cache_control
+        return cached
+
+    encoding = request.accept_encodings.best_match(['br', 'gzip', 'identity'], default='identity')
+    response = current_app.response_class(asset.encodings[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{asset.hash}:{encoding}")
+    else:
+        response.set_etag(asset.hash)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -1,31 +1,195 @@
+import contextlib
 import functools
 import json
 import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from types import MappingProxyType
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for
+    Blueprint, current_app, flash, g, jsonify, redirect, render_template, request, session, url_for
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 from functools import wraps
+from .hashing import HasherBusy, get_password_hasher
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where only the threads of one process are serialized
+    fcntl = None
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 # Path to the users file
 USERS_FILE = os.path.join(os.path.dirname(__file__), 'users.json')
+# Default path of the SQLite user database (USER_STORE = 'sqlite')
+USERS_DB = os.path.join(os.path.dirname(__file__), 'users.db')
+
+# users.json is parsed once and cached until the file changes on disk.
+# Writers are serialized by _users_lock in this process and by an flock on the
+# file's directory across processes (the workers of app/server.py or gunicorn -w N),
+# like the event log (app/api/segment_log.py); the file itself is only ever replaced
+# atomically, so readers never see a half-written file.
+_users_lock = threading.RLock()
+_users_cache = {'key': None, 'users': {}}
+_users_flock = {'fd': None}  # directory descriptor held by the thread holding _users_lock
+
+
+@contextlib.contextmanager
+def _users_locked():
+    """Holds the users.json writer lock, of this process and of the others; reentrant."""
+    with _users_lock:
+        if _users_flock['fd'] is not None or fcntl is None:
+            yield
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(USERS_FILE)), os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            _users_flock['fd'] = fd
+            yield
+        finally:
+            _users_flock['fd'] = None
+            os.close(fd)  # Releases the flock
 
 def load_users():
-    """Loads users from the JSON file."""
-    if not os.path.exists(USERS_FILE):
-        return {}
+    """Loads users from the JSON file.
+
+    Returns a read-only view of the cached users, re-parsed only when the file's
+    mtime or size changes.
+    """
+    return MappingProxyType(_read_users())
+
+def _read_users():
     try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {} # Return empty dict if file is empty or invalid
+        stat = os.stat(USERS_FILE)
+    except FileNotFoundError:
+        return {}
+    key = (USERS_FILE, stat.st_mtime_ns, stat.st_size)
+    with _users_lock:
+        if _users_cache['key'] != key:
+            try:
+                with open(USERS_FILE, 'r') as f:
+                    users = json.load(f)
+            except json.JSONDecodeError:
+                users = {} # Empty dict if file is empty or invalid
+            _users_cache['key'] = key
+            _users_cache['users'] = users
+        return _users_cache['users']
 
 def save_users(users):
-    """Saves users to the JSON file."""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    """Saves users to the JSON file, atomically (temp file + rename), keeping its mode."""
+    directory = os.path.dirname(os.path.abspath(USERS_FILE))
+    with _users_locked():
+        try:
+            mode = stat.S_IMODE(os.stat(USERS_FILE).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(prefix='.users-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(users), f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)  # mkstemp creates it 0600
+            os.replace(tmp_path, USERS_FILE)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Invalidate, the next load_users() picks up the new mtime
+        _users_cache['key'] = None
+
+
+class JsonUserStore:
+    """User store backed by users.json (the default)."""
+
+    def get(self, username):
+        return load_users().get(username)
+
+    def add(self, username, record):
+        """Adds a user unless the username is taken, returns whether it was added."""
+        with _users_locked():
+            users = dict(_read_users())
+            if username in users:
+                return False
+            users[username] = record
+            save_users(users)
+            return True
+
+
+class SqliteUserStore:
+    """User store backed by SQLite, with the username as indexed primary key.
+
+    Lookups stay O(log n) as the user base grows and a registration is a single
+    INSERT instead of a rewrite of the whole file. Each thread gets its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT NOT NULL)')
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute('PRAGMA journal_mode=WAL')  # Readers don't block the writer
+            self._local.db = db
+        return db
+
+    def get(self, username):
+        row = self._connect().execute('SELECT password FROM users WHERE username = ?', (username,)).fetchone()
+        return None if row is None else {'password': row[0]}
+
+    def add(self, username, record):
+        try:
+            with self._connect() as db:
+                db.execute('INSERT INTO users (username, password) VALUES (?, ?)', (username, record['password']))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def import_users(self, users):
+        """Copies users (e.g. from users.json) into the database, skipping existing ones."""
+        with self._connect() as db:
+            db.executemany('INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)',
+                           [(name, data['password']) for name, data in users.items()])
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+
+def get_user_store():
+    """Returns the user store configured by USER_STORE ('json' or 'sqlite')."""
+    store = current_app.extensions.get('user_store')
+    if store is None:
+        if current_app.config.get('USER_STORE', 'json') == 'sqlite':
+            store = SqliteUserStore(current_app.config.get('USER_DB', USERS_DB))
+            if store.count() == 0:
+                store.import_users(load_users())  # First use, migrate users.json
+        else:
+            store = JsonUserStore()
+        current_app.extensions['user_store'] = store
+    return store
+
+
+def hash_password(password):
+    """Hashes a password in the hashing pool."""
+    return get_password_hasher().run(generate_password_hash, password)
+
+def verify_password(pwhash, password):
+    """Checks a password against its hash in the hashing pool."""
+    return get_password_hasher().run(check_password_hash, pwhash, password)
+
+
+@bp.errorhandler(HasherBusy)
+def hasher_busy(error):
+    """Answers 503 when the hashing pool can't take more work, so clients back off."""
+    flash('The server is busy, please try again in a moment.', 'danger')
+    template = 'register.html' if request.endpoint == 'auth.register' else 'login.html'
+    return render_template(template), 503, {'Retry-After': '1'}
 
 @bp.route('/register', methods=('GET', 'POST'))
 def register():
@@ -33,22 +197,23 @@ def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        users = load_users()
+        store = get_user_store()
         error = None
 
         if not username:
             error = 'Username is required.'
         elif not password:
             error = 'Password is required.'
-        elif username in users:
+        elif store.get(username) is not None:
             error = f"User {username} is already registered."
 
         if error is None:
-            users[username] = {'password': generate_password_hash(password)}
-            save_users(users)
-            flash('Registration successful! Please log in.', 'success')
-            # Redirect to the auth blueprint's login view
-            return redirect(url_for('auth.login'))
+            # add() re-checks the username atomically, in case of a concurrent registration
+            if store.add(username, {'password': hash_password(password)}):
+                flash('Registration successful! Please log in.', 'success')
+                # Redirect to the auth blueprint's login view
+                return redirect(url_for('auth.login'))
+            error = f"User {username} is already registered."
 
         flash(error, 'danger')
 
@@ -63,14 +228,13 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        users = load_users()
         error = None
 
-        user_data = users.get(username)
+        user_data = get_user_store().get(username)
 
         if user_data is None:
             error = 'Incorrect username.'
-        elif not check_password_hash(user_data['password'], password):
+        elif not verify_password(user_data['password'], password):
             error = 'Incorrect password.'
 
         if error is None:
@@ -107,3 +271,10 @@ def login_required(view):
         return view(**kwargs)
 
     return wrapped_view
+
+
+@bp.route('/hasher-stats')
+@login_required
+def hasher_stats():
+    """Password hashing pool metrics (queue depth, latency)."""
+    return jsonify(get_password_hasher().stats())
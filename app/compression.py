@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from flask import current_app, request, stream_with_context
+from flask_compress import Compress
+# Accept-Encoding negotiation exactly as Flask-Compress does it
+from flask_compress.flask_compress import _choose_algorithm
+
+try:
+    import brotlicffi as brotli
+except ImportError:
+    import brotli
+
+# Response compression around Flask-Compress.
+# Compressing the same body over and over is where the CPU goes: every client polling
+# an endpoint between two store updates gets identical bytes. CachingCompress keeps the
+# compressed bodies in a small LRU keyed by the hash of the uncompressed content, lets
+# each route pick its own compression level (COMPRESS_ROUTE_LEVELS) and compresses
+# streamed responses chunk by chunk.
+
+ALGORITHMS = ('br', 'gzip', 'deflate')
+DEFAULT_CACHE_SIZE = 8 * 1024 * 1024  # Bytes of compressed bodies kept
+
+
+def compress(data, algorithm, level):
+    """Compresses `data` in one go. gzip output has no timestamp, so it is deterministic."""
+    if algorithm == 'br':
+        return brotli.compress(data, quality=level)
+    if algorithm == 'gzip':
+        return gzip.compress(data, level, mtime=0)
+    if algorithm == 'deflate':
+        return zlib.compress(data, level)
+    raise ValueError(f"unsupported compression algorithm: {algorithm}")
+
+
+def compress_chunks(chunks, algorithm, level):
+    """Compresses an iterable of byte chunks incrementally."""
+    if algorithm == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, finish = compressor.process, compressor.finish
+    elif algorithm in ('gzip', 'deflate'):
+        wbits = zlib.MAX_WBITS + 16 if algorithm == 'gzip' else zlib.MAX_WBITS
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        process, finish = compressor.compress, compressor.flush
+    else:
+        raise ValueError(f"unsupported compression algorithm: {algorithm}")
+    for chunk in chunks:
+        out = process(chunk)
+        if out:
+            yield out
+    out = finish()
+    if out:
+        yield out
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (content hash, algorithm, level), bounded in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compress(self, data, algorithm, level):
+        """Returns the compressed `data`, compressing it only if it is not cached yet."""
+        key = (hashlib.blake2b(data, digest_size=16).digest(), algorithm, level)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+        # Compress outside the lock; two threads may race on the same body, which is harmless
+        compressed = compress(data, algorithm, level)
+        if len(compressed) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self._bytes += len(compressed)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class CachingCompress(Compress):
+    """Flask-Compress with cached compressed bodies and per-route compression levels.
+
+    COMPRESS_ROUTE_LEVELS maps an endpoint (e.g. 'network_api.get_network_logs') or a
+    blueprint name to {algorithm: level}; algorithms it does not list use COMPRESS_LEVEL,
+    COMPRESS_BR_LEVEL and COMPRESS_DEFLATE_LEVEL.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ALGORITHM', list(ALGORITHMS))
+        app.config.setdefault('COMPRESS_ALGORITHM_STREAMING', list(ALGORITHMS))
+        app.config.setdefault('COMPRESS_ROUTE_LEVELS', {})
+        app.config.setdefault('COMPRESS_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        super().init_app(app)
+        unsupported = set(self.enabled_algorithms + self.streaming_algorithms) - set(ALGORITHMS)
+        if unsupported:
+            raise ValueError(f"unsupported compression algorithms: {', '.join(sorted(unsupported))}")
+        self.compressed_cache = CompressedCache(app.config['COMPRESS_CACHE_SIZE'])
+        app.extensions['compress'] = self
+
+    def level(self, algorithm):
+        """Compression level of `algorithm` for the current request's route."""
+        config = (self.app or current_app).config
+        routes = config['COMPRESS_ROUTE_LEVELS']
+        levels = routes.get(request.endpoint) or routes.get(request.blueprint) or {}
+        if algorithm in levels:
+            return levels[algorithm]
+        if algorithm == 'br':
+            return config['COMPRESS_BR_LEVEL']
+        if algorithm == 'deflate':
+            return config['COMPRESS_DEFLATE_LEVEL']
+        return config['COMPRESS_LEVEL']
+
+    def after_request(self, response):
+        app = self.app or current_app
+        vary = response.headers.get('Vary')
+        if not vary:
+            response.headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            response.headers['Vary'] = f"{vary}, Accept-Encoding"
+
+        streamed = response.is_streamed
+        if streamed and not app.config['COMPRESS_STREAMS']:
+            return response
+        algorithms = self.streaming_algorithms if streamed else self.enabled_algorithms
+        algorithm = _choose_algorithm(algorithms, request.headers.get('Accept-Encoding', ''))
+        if (
+            algorithm is None
+            or response.mimetype not in self.compress_mimetypes_set
+            or not 200 <= response.status_code < 300
+            or 'Content-Encoding' in response.headers
+            or (response.content_length is not None and response.content_length < app.config['COMPRESS_MIN_SIZE'])
+        ):
+            return response
+
+        level = self.level(algorithm)
+        response.direct_passthrough = False
+        response.headers['Content-Encoding'] = algorithm
+        if streamed:
+            response.response = stream_with_context(compress_chunks(response.iter_encoded(), algorithm, level))
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(self.compressed_cache.compress(response.get_data(), algorithm, level))
+
+        # Same validator handling as Flask-Compress: "abc" -> "abc:gzip"
+        etag, is_weak = response.get_etag()
+        if etag and not is_weak:
+            response.set_etag(f"{etag}:{algorithm}")
+        if app.config['COMPRESS_EVALUATE_CONDITIONAL_REQUEST'] and request.method in ('GET', 'HEAD') and not streamed:
+            response.make_conditional(request)
+        return response
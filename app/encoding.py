@@ -0,0 +1,58 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder is used without it
+    orjson = None
+
+# JSON encoding shared by the event store, the stream hub and the Flask app.
+# Events are encoded to bytes once when they are stored; responses are then
+# assembled by joining those fragments instead of encoding dicts per request.
+
+
+def dumps(obj):
+    """Compact JSON encoding of `obj` as bytes, keys sorted like jsonify() does."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True, ensure_ascii=False).encode()
+
+
+def loads(data):
+    """Decodes JSON text or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def join_array(fragments):
+    """Joins already encoded JSON values into a JSON array."""
+    return b'[' + b','.join(fragments) + b']'
+
+
+def join_object(members):
+    """Builds a JSON object from (key, encoded value) pairs, in the given order."""
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in members) + b'}'
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed.
+
+    jsonify() asks for compact output (separators) or, in debug mode, for indent=2;
+    both map to orjson options. Other arguments are left to the json module.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        if kwargs.get('indent') == 2:
+            option |= orjson.OPT_INDENT_2
+        if set(kwargs) - {'indent', 'separators'} or kwargs.get('indent') not in (None, 2) or \
+                kwargs.get('separators') not in (None, (',', ':')):
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:
+            # e.g. non-string keys, which orjson rejects and the json module converts
+            return super().dumps(obj, **kwargs)
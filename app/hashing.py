@@ -0,0 +1,129 @@
+import collections
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from flask import current_app
+
+# Password hashing and verification off the request thread.
+# Werkzeug's default KDF (scrypt) is CPU-heavy by design; run on the request thread it
+# holds the GIL and starves every other request of the worker during a login burst.
+# PasswordHasher runs it in a small process pool instead, with a bounded number of
+# waiting jobs: when the pool is saturated callers get HasherBusy (served as a 503)
+# rather than an ever-growing queue.
+
+LATENCY_SAMPLES = 1024  # Recent hash latencies kept for percentiles
+
+
+class HasherBusy(Exception):
+    """The hashing pool is saturated or a hash did not finish in time."""
+
+
+class PasswordHasher:
+    """Runs hashing functions in a process pool of `workers` processes.
+
+    At most `workers + max_queue` jobs are accepted at a time; `timeout` bounds
+    how long a caller waits for its result. With `workers=0` functions run inline
+    on the calling thread (used in tests and for tiny deployments).
+    """
+
+    def __init__(self, workers=2, max_queue=16, timeout=5.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers else None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the app process runs other threads (producer, streams)
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._executor
+
+    def run(self, func, *args):
+        """Returns func(*args), computed in the pool. Raises HasherBusy when saturated or too slow."""
+        start = time.perf_counter()
+        if not self.workers:
+            result = func(*args)
+            self._record(start)
+            return result
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy("password hashing pool is saturated")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            # The job keeps its slot until it actually finishes
+            with self._lock:
+                self._timeouts += 1
+            raise HasherBusy("password hashing timed out")
+        self._record(start)
+        return result
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _record(self, start):
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._completed += 1
+            self._latencies.append(latency)
+
+    def stats(self):
+        """Queue depth and latency figures, for sizing the pool against the login peak."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            in_flight = self._in_flight
+            stats = {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+        for name, q in (("latency_p50", 0.50), ("latency_p95", 0.95), ("latency_p99", 0.99)):
+            stats[name] = latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+        stats["latency_max"] = latencies[-1] if latencies else None
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_password_hasher():
+    """Returns the app's PasswordHasher, created from the PASSWORD_HASH_* settings on first use."""
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        config = current_app.config
+        hasher = PasswordHasher(
+            workers=config.get('PASSWORD_HASH_WORKERS', 0),
+            max_queue=config.get('PASSWORD_HASH_QUEUE', 16),
+            timeout=config.get('PASSWORD_HASH_TIMEOUT', 5.0),
+        )
+        hasher = current_app.extensions.setdefault('password_hasher', hasher)
+    return hasher
@@ -0,0 +1,315 @@
+import bisect
+import threading
+import time
+from flask import Blueprint, current_app, request
+
+# Request metrics, served at /metrics in the Prometheus text format.
+# Every request is timed per endpoint and split into phases:
+#   handler        the view (login_required redirects included), minus serialization
+#   serialization  jsonify(), i.e. app.json.response(); bodies joined from the JSON the
+#                  event stores cached are assembled in the handler
+#   compression    CachingCompress.after_request (a cache hit or a compression)
+# plus the response size, the status and the number of requests in flight. Scrapes also
+# read the counters the stores, the write pipeline, the ingest endpoint, the sample
+# producer and the compression cache keep anyway.
+#
+# The hot path takes no lock: every thread records into a shard of its own (plain
+# dicts and lists) and a scrape sums the shards. A shard goes back to a pool when its
+# thread ends, so the threaded server's thread per request does not grow their number.
+
+bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)  # Bytes
+PHASES = ('handler', 'serialization', 'compression')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    """Counters and histograms written by one thread at a time."""
+    __slots__ = ('counters', 'histograms', 'started', 'finished',
+                 'request_start', 'handler_end', 'compression_end', 'serialization', 'status', 'size')
+
+    def __init__(self):
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [count per bucket (+Inf last)..., sum]
+        self.started = 0
+        self.finished = 0
+        self.request_start = None  # state of the request the thread is answering
+        self.handler_end = self.compression_end = None
+        self.serialization = 0.0
+        self.status = self.size = None
+
+    def inc(self, key, value=1):
+        """Adds `value` to the counter `key`, a (name, labels) pair."""
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, key, buckets, value):
+        """Records `value` in the histogram `key`, a (name, labels) pair."""
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+
+class _Lease:
+    # Held in a thread-local: returns the shard to the pool when its thread ends
+    __slots__ = ('shard', 'pool')
+
+    def __init__(self, shard, pool):
+        self.shard = shard
+        self.pool = pool
+
+    def __del__(self):
+        self.shard.request_start = None
+        self.pool.append(self.shard)
+
+
+class Registry:
+    """Per-thread shards of counters and histograms, summed when scraped."""
+
+    def __init__(self):
+        self._shards = []
+        self._free = []
+        self._local = threading.local()
+        self._lock = threading.Lock()  # taken once per thread, to get a shard
+        self._buckets = {}  # histogram name -> bucket bounds
+        self._help = {}
+
+    def shard(self):
+        """The shard of the calling thread."""
+        try:
+            return self._local.lease.shard
+        except AttributeError:
+            pass
+        with self._lock:
+            shard = self._free.pop() if self._free else None
+            if shard is None:
+                shard = _Shard()
+                self._shards.append(shard)
+        self._local.lease = _Lease(shard, self._free)
+        return shard
+
+    def counter(self, name, help):
+        self._help[name] = ('counter', help)
+
+    def histogram(self, name, help, buckets):
+        self._help[name] = ('histogram', help)
+        self._buckets[name] = buckets
+
+    def buckets(self, name):
+        return self._buckets[name]
+
+    def collect(self):
+        """Sums the shards into ({(name, labels): value}, {(name, labels): histogram}, in flight)."""
+        counters, histograms = {}, {}
+        in_flight = 0
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dict.copy() is atomic, the owning thread may keep writing meanwhile
+            for key, value in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, histogram in shard.histograms.copy().items():
+                histogram = list(histogram)
+                total = histograms.get(key)
+                histograms[key] = histogram if total is None else [a + b for a, b in zip(total, histogram)]
+            in_flight += shard.started - shard.finished
+        return counters, histograms, in_flight
+
+    def render(self, extra=()):
+        """The metrics in the Prometheus text format; `extra` adds (name, type, help, samples)
+        families, samples being (labels, value) pairs."""
+        counters, histograms, in_flight = self.collect()
+        lines = []
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, []).append((labels, value))
+        for (name, labels), value in histograms.items():
+            families.setdefault(name, []).append((labels, value))
+        for name in sorted(families):
+            kind, help = self._help[name]
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(families[name], key=lambda sample: sample[0]):
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(self._buckets[name] + (float('inf'),), value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        lines.append("# HELP http_requests_in_flight Requests being answered.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {in_flight}")
+        for name, kind, help, samples in extra:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(labels.items()))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class RequestMetrics:
+    """Times the requests of `app` (see the module comment).
+
+    Create it before CachingCompress and call time_compression() right after it: Flask
+    runs after_request functions in reverse order of registration, so the hooks
+    registered here run just before and just after the compression.
+    """
+
+    def __init__(self, app=None):
+        self.registry = Registry()
+        self._endpoint_keys = {}
+        self.registry.counter('http_requests_total', "Requests answered, by endpoint, method and status.")
+        self.registry.histogram('http_request_duration_seconds', "Time to answer a request, by endpoint.",
+                                LATENCY_BUCKETS)
+        self.registry.histogram('http_request_phase_seconds', "Time spent in each phase of a request, by endpoint.",
+                                LATENCY_BUCKETS)
+        self.registry.histogram('http_response_size_bytes', "Size of the response bodies sent, by endpoint.",
+                                SIZE_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after_compression)
+        app.teardown_request(self._teardown)
+        # jsonify() is app.json.response(): encoding plus building the response
+        response = app.json.response
+        shard = self.registry.shard
+
+        def timed_response(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return response(*args, **kwargs)
+            finally:
+                shard().serialization += time.perf_counter() - start
+
+        app.json.response = timed_response
+        app.extensions['metrics'] = self
+        app.register_blueprint(bp)
+
+    def time_compression(self, app):
+        app.after_request(self._before_compression)
+
+    def _before(self):
+        shard = self.registry.shard()
+        shard.started += 1
+        shard.request_start = time.perf_counter()
+        shard.handler_end = shard.compression_end = None
+        shard.serialization = 0.0
+        shard.status = shard.size = None
+
+    def _before_compression(self, response):
+        self.registry.shard().handler_end = time.perf_counter()
+        return response
+
+    def _after_compression(self, response):
+        shard = self.registry.shard()
+        shard.compression_end = time.perf_counter()
+        shard.status = response.status_code
+        shard.size = response.content_length  # None for streamed bodies
+        return response
+
+    def _keys(self, endpoint):
+        # (name, labels) keys of the histograms of an endpoint, built once
+        keys = self._endpoint_keys.get(endpoint)
+        if keys is None:
+            labels = (('endpoint', endpoint),)
+            keys = self._endpoint_keys[endpoint] = (
+                ('http_request_duration_seconds', labels),
+                tuple(('http_request_phase_seconds', labels + (('phase', phase),)) for phase in PHASES),
+                ('http_response_size_bytes', labels),
+            )
+        return keys
+
+    def _teardown(self, error):
+        shard = self.registry.shard()
+        start = shard.request_start
+        if start is None:
+            return
+        end = time.perf_counter()
+        shard.request_start = None
+        endpoint = request.endpoint or 'unmatched'
+        status = shard.status if shard.status is not None else 500
+        duration, (handler, serialization, compression), size = self._keys(endpoint)
+        shard.inc(('http_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', str(status)))))
+        shard.observe(duration, LATENCY_BUCKETS, end - start)
+        if shard.handler_end is not None:
+            shard.observe(handler, LATENCY_BUCKETS, max(0.0, shard.handler_end - start - shard.serialization))
+            shard.observe(serialization, LATENCY_BUCKETS, shard.serialization)
+            if shard.compression_end is not None:
+                shard.observe(compression, LATENCY_BUCKETS, shard.compression_end - shard.handler_end)
+        if shard.size is not None:
+            shard.observe(size, SIZE_BUCKETS, shard.size)
+        shard.finished += 1
+
+
+def app_metrics(app):
+    """(name, type, help, samples) families of the counters the app components keep."""
+    extensions = app.extensions
+    families = []
+    stores = extensions.get('event_stores', {})
+    stats = {category: store.stats() for category, store in stores.items()}
+    families.append(('event_store_events', 'gauge', "Events retained, by category.",
+                     [({'category': c}, s['events']) for c, s in stats.items()]))
+    families.append(('event_store_bytes', 'gauge', "Bytes used by the retained events, by category.",
+                     [({'category': c}, s['bytes_used']) for c, s in stats.items()]))
+    families.append(('event_store_appended_total', 'counter', "Events appended to the store, by category.",
+                     [({'category': c}, s['last_seq']) for c, s in stats.items()]))
+    writer = extensions.get('event_writer')
+    if writer is not None:
+        stats = writer.stats()
+        families.append(('event_writer_queue_depth', 'gauge', "Events waiting to be written.",
+                         [({}, stats['queue_depth'])]))
+        families.append(('event_writer_batches_total', 'counter', "Batches applied by the writer.",
+                         [({}, stats['batches'])]))
+        families.append(('event_writer_events_total', 'counter', "Events applied by the writer.",
+                         [({}, stats['events'])]))
+    ingest = extensions.get('ingest_stats')
+    if ingest is not None:
+        snapshot = ingest.snapshot()
+        families.append(('ingest_events_total', 'counter', "Ingested events, by category and result.",
+                         [({'category': c, 'result': result}, counters[result])
+                          for c, counters in snapshot.items() for result in ('accepted', 'rejected')]))
+        families.append(('ingest_throttled_total', 'counter', "Ingest requests answered with 429, by category.",
+                         [({'category': c}, counters['throttled']) for c, counters in snapshot.items()]))
+    producer = extensions.get('sample_producer')
+    if producer is not None:
+        families.append(('sample_generator_events_total', 'counter', "Events generated by the sample producer, by category.",
+                         [({'category': c}, count) for c, count in producer.generated.items()]))
+    compress = extensions.get('compress')
+    if compress is not None:
+        stats = compress.compressed_cache.stats()
+        families.append(('compression_cache_lookups_total', 'counter', "Compressed body cache lookups, by result.",
+                         [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])]))
+    return families
+
+
+@bp.route('/metrics')
+def metrics():
+    """Request metrics and component counters in the Prometheus text format."""
+    body = current_app.extensions['metrics'].registry.render(app_metrics(current_app))
+    return current_app.response_class(body, content_type=CONTENT_TYPE)
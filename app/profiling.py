@@ -0,0 +1,172 @@
+import cProfile
+import hashlib
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request, session
+
+# Profiling of a live instance, both off by default and free when off (nothing is
+# registered on the app then).
+#
+# Per request: a request carrying a valid X-Profile-Token header (see profile_token(),
+# needs PROFILE_SECRET), or sent with ?profile=1 by a user listed in PROFILE_ADMINS, runs
+# under cProfile. The stats are written to PROFILE_DIR and the file name is returned in
+# the X-Profile header; read them with `python -m pstats <file>` or any pstats viewer.
+#
+# Sampling: with PROFILE_SAMPLE_INTERVAL set, a background thread takes the stacks of
+# the threads answering requests at that interval and counts them, rooted at the
+# endpoint. The counts are written to PROFILE_DIR/stacks.collapsed every
+# PROFILE_SAMPLE_FLUSH seconds in the collapsed format flamegraph.pl and speedscope read:
+#     network_api.get_network_logs;wsgi_app (app.py:1478);... 12
+
+TOKEN_HEADER = 'X-Profile-Token'
+PROFILE_HEADER = 'X-Profile'
+STACKS_FILE = 'stacks.collapsed'
+MAX_STACK_DEPTH = 128
+
+
+def profile_token(secret, ttl=300, now=None):
+    """A token for the X-Profile-Token header, valid for `ttl` seconds."""
+    expires = str(int((time.time() if now is None else now) + ttl))
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def _signature(secret, expires):
+    return hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+
+
+def valid_token(secret, token, now=None):
+    expires, _, signature = token.partition('.')
+    if not expires.isdigit() or not hmac.compare_digest(signature, _signature(secret, expires)):
+        return False
+    return int(expires) >= (time.time() if now is None else now)
+
+
+class RequestProfiler:
+    """Runs the requests asking for it (see the module comment) under cProfile."""
+
+    def __init__(self, app, directory):
+        self.directory = directory
+        self.secret = app.config['PROFILE_SECRET']
+        self.admins = frozenset(app.config['PROFILE_ADMINS'])
+        self._numbers = itertools.count(1)
+        # Registered before the other hooks: profiling starts first and stops last
+        app.before_request(self._start)
+        app.after_request(self._stop)
+        app.teardown_request(self._abandon)
+
+    def wanted(self):
+        token = request.headers.get(TOKEN_HEADER)
+        if token is not None and self.secret:
+            return valid_token(self.secret, token)
+        return request.args.get('profile') == '1' and session.get('user_id') in self.admins
+
+    def _start(self):
+        if self.wanted():
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _stop(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'unmatched')
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self._numbers)}-{endpoint}.prof"
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, name))
+        response.headers[PROFILE_HEADER] = name
+        return response
+
+    def _abandon(self, error):
+        # after_request is skipped when the request failed
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+
+class StackSampler(threading.Thread):
+    """Daemon thread counting the stacks of the threads answering requests."""
+
+    def __init__(self, path, interval=0.01, flush_interval=60.0):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.requests = {}  # thread id -> endpoint, of the requests being answered
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}  # code object -> frame label
+        self._stopped = threading.Event()
+
+    def request_started(self):
+        self.requests[threading.get_ident()] = request.endpoint or 'unmatched'
+
+    def request_finished(self, error=None):
+        self.requests.pop(threading.get_ident(), None)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    def sample_once(self):
+        frames = sys._current_frames()
+        for ident, endpoint in list(self.requests.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            labels.append(endpoint)
+            self.stacks[';'.join(reversed(labels))] += 1
+        self.samples += 1
+
+    def write(self):
+        """Writes the counted stacks (atomically, the file is always complete)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        stacks = self.stacks.copy()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, self.path)
+
+    def run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stopped.wait(self.interval):
+            self.sample_once()
+            if time.monotonic() >= next_flush:
+                self.write()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def stop(self):
+        self._stopped.set()
+        if self.stacks:
+            self.write()
+
+
+def init_profiling(app):
+    """Sets up what the PROFILE_* settings enable."""
+    directory = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+    if app.config['PROFILE_SECRET'] or app.config['PROFILE_ADMINS']:
+        app.extensions['request_profiler'] = RequestProfiler(app, directory)
+    if app.config['PROFILE_SAMPLE_INTERVAL']:
+        sampler = StackSampler(os.path.join(directory, STACKS_FILE), app.config['PROFILE_SAMPLE_INTERVAL'],
+                               app.config['PROFILE_SAMPLE_FLUSH'])
+        app.before_request(sampler.request_started)
+        app.teardown_request(sampler.request_finished)
+        sampler.start()
+        app.extensions['stack_sampler'] = sampler
@@ -0,0 +1,165 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+from werkzeug.serving import make_server
+from app import create_app
+from app.api.categories import enabled_categories
+from app.api.shared_log import DEFAULT_SIZE, SharedLog
+
+# Pre-fork production server (POSIX), instead of the development server of run.py:
+#
+#     python -m app.server --workers 4 --bind 0.0.0.0:8000
+#
+# The master process opens the listening socket and the shared event log (see
+# app/api/shared_log.py), then forks:
+#   - one writer process, which owns the write side of the app: the stores events are
+#     written to, the sample producer, the event log on disk and the write pipeline. It
+#     serves no requests and publishes every event it stores to the shared log;
+#   - `workers` worker processes, each accepting connections on the shared socket and
+#     answering them with a threaded WSGI server. Their stores replicate the shared log,
+#     time-range queries read the writer's event log (opened read-only), and the events
+#     POSTed to /api/ingest are forwarded to the writer process.
+# The master restarts a worker that dies. If the writer dies the server stops, since
+# the workers would no longer see new events. SIGTERM or SIGINT stop the workers, then
+# the writer, which writes what is queued and flushes the event log.
+#
+# Each worker keeps its own request metrics, profiles and ingest counters; /metrics
+# reports those of the worker that answered. Users are kept in users.json, which the
+# workers update under a file lock; --user-store sqlite suits a large user base better.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+INGEST_QUEUE_SUBMISSIONS = 64  # Ingest batches the workers may forward ahead of the writer
+STARTUP_TIMEOUT = 120.0  # Seconds the writer may take to restore the event history
+SHUTDOWN_TIMEOUT = 10.0  # Seconds a process is given to exit before it is killed
+RESPAWN_DELAY = 1.0  # Seconds before restarting a worker that died right after starting
+DEFAULT_EVENT_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'event-log')
+
+
+def _run_writer(config, ready):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master decides when to stop
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    app = create_app(config)
+    ready.set()
+    try:
+        while True:
+            signal.pause()
+    finally:
+        extensions = app.extensions
+        if 'sample_producer' in extensions:
+            extensions['sample_producer'].stop()
+        extensions['submission_receiver'].stop()
+        extensions['event_writer'].stop()
+        if 'event_log_flusher' in extensions:
+            extensions['event_log_flusher'].stop()
+            for log in extensions['event_logs'].values():
+                log.close()
+
+
+def _run_worker(config, listener, host, port):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = create_app(config)
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    # shutdown() waits for serve_forever() to return, so it cannot run in the handler
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    server.serve_forever()
+
+
+def _join(process):
+    process.join(SHUTDOWN_TIMEOUT)
+    if process.is_alive():
+        logger.warning("%s did not stop, killing it", process.name)
+        process.kill()
+        process.join()
+
+
+def serve(config=None, workers=DEFAULT_WORKERS, host='127.0.0.1', port=8000, shared_log_size=DEFAULT_SIZE):
+    """Runs the server until SIGTERM or SIGINT; returns the exit status."""
+    if workers < 1:
+        raise ValueError("at least one worker is needed")
+    context = multiprocessing.get_context('fork')
+    config = dict(config or {})
+    categories = [category.name for category in enabled_categories(config.get('CATEGORIES'))]
+    shared_log = SharedLog(categories, shared_log_size)
+    ingest_queue = context.Queue(INGEST_QUEUE_SUBMISSIONS)
+    listener = socket.create_server((host, port), backlog=1024)
+    config.update(SERVER_SHARED_LOG=shared_log, SERVER_INGEST_QUEUE=ingest_queue)
+
+    ready = context.Event()
+    writer = context.Process(target=_run_writer, name='writer', args=(dict(config, SERVER_ROLE='writer'), ready))
+    writer.start()
+    started = time.monotonic()
+    while not ready.wait(0.1):
+        if not writer.is_alive() or time.monotonic() - started > STARTUP_TIMEOUT:
+            logger.error("the writer process failed to start")
+            writer.terminate()
+            _join(writer)
+            listener.close()
+            return 1
+
+    worker_config = dict(config, SERVER_ROLE='worker')
+
+    def start_worker(number):
+        process = context.Process(target=_run_worker, name=f'worker-{number}',
+                                  args=(worker_config, listener, host, port))
+        process.start()
+        return process, time.monotonic()
+
+    processes = [start_worker(number) for number in range(1, workers + 1)]
+    logger.info("serving on http://%s:%d with %d workers", host, port, workers)
+
+    stopping = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: stopping.append(signum))
+    status = 0
+    while not stopping:
+        wait([writer.sentinel] + [process.sentinel for process, _ in processes], timeout=1.0)
+        if not writer.is_alive():
+            logger.error("the writer process exited with %s, stopping", writer.exitcode)
+            status = 1
+            break
+        for index, (process, started) in enumerate(processes):
+            if process.is_alive():
+                continue
+            logger.warning("%s exited with %s, restarting it", process.name, process.exitcode)
+            if time.monotonic() - started < RESPAWN_DELAY:
+                time.sleep(RESPAWN_DELAY)
+            processes[index] = start_worker(index + 1)
+
+    for process, _ in processes:
+        process.terminate()
+    for process, _ in processes:
+        _join(process)
+    writer.terminate()
+    _join(writer)
+    listener.close()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork production server of the dashboard.")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="worker processes serving requests")
+    parser.add_argument('-b', '--bind', default='127.0.0.1:8000', help="host:port to listen on")
+    parser.add_argument('--event-log', default=DEFAULT_EVENT_LOG,
+                        help="directory of the event history kept on disk, '' to keep none")
+    parser.add_argument('--shared-log-mb', type=int, default=DEFAULT_SIZE // (1024 * 1024),
+                        help="size of the shared event log, in MiB")
+    parser.add_argument('--user-store', choices=('json', 'sqlite'), default='json',
+                        help="where registered users are kept (USER_STORE)")
+    args = parser.parse_args()
+    host, _, port = args.bind.rpartition(':')
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    config = {'EVENT_LOG_DIR': args.event_log or None, 'USER_STORE': args.user_store}
+    sys.exit(serve(config, args.workers, host or '127.0.0.1', int(port), args.shared_log_mb * 1024 * 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,15 @@ function initDashboard(logStore) {
   const recentActivityList = document.getElementById("recentActivityList");
   updateRecentActivity(logStore, recentActivityList, true); // Pass logStore and a flag for initial load
 
+  // Charts are drawn from server-side rollups, one small request per refresh
+  startSummaryPolling();
+
+  // Prefer the server-pushed event stream, fall back to polling without EventSource
+  if (typeof EventSource !== "undefined") {
+    subscribeToStream(logStore, recentActivityList);
+    return;
+  }
+
   // Initial data fetch
   fetchSampleLogs(logStore, recentActivityList);
 
@@ -35,11 +44,82 @@ function initDashboard(logStore) {
   );
 }
 
+// Subscribe to new logs of every category through Server-Sent Events
+function subscribeToStream(logStore, recentActivityList) {
+  // The browser reconnects by itself and sends Last-Event-ID to resume
+  const source = new EventSource("/api/stream/");
+  let dirty = false;
+
+  Object.keys(logStore).forEach((category) => {
+    if (category === "lastCleared") return;
+    source.addEventListener(category, (event) => {
+      addLogToStore(logStore, category, JSON.parse(event.data));
+      dirty = true;
+    });
+  });
+
+  source.onerror = (error) => console.error("Event stream error:", error);
+
+  // Redraw at most once per second, however many events arrive
+  setInterval(() => {
+    if (!dirty) return;
+    dirty = false;
+    saveLogStore(logStore);
+    updateDashboard(logStore, recentActivityList);
+  }, 1000);
+}
+
+// Update the log-based dashboard components (charts are fed by the summary)
+function updateDashboard(logStore, recentActivityList) {
+  updateRecentActivity(logStore, recentActivityList);
+  updateSystemStatus(logStore);
+}
+
+// Poll the server-side rollups that feed the charts
+const SUMMARY_RANGE = "10m";
+const SUMMARY_INTERVAL = 5000;
+
+function startSummaryPolling() {
+  fetchSummary();
+  setInterval(fetchSummary, SUMMARY_INTERVAL);
+}
+
+// ETag of the last summary response; an unchanged ETag means unchanged counts
+let summaryEtag = null;
+
+function fetchSummary() {
+  fetch(`/api/summary/?range=${SUMMARY_RANGE}`)
+    .then((response) => {
+      const etag = response.headers.get("ETag");
+      if (etag && etag === summaryEtag) return null;
+      summaryEtag = etag;
+      return response.json();
+    })
+    .then((summary) => {
+      if (!summary || !summary.totals) return;
+      updateSeverityChart(summary);
+      updateTimeChart(summary);
+      updateCategoryChart(summary);
+      updateAccessResultsChart(summary);
+    })
+    .catch((error) => console.error("Error fetching summary:", error));
+}
+
+// ETag of the last sample logs response; an unchanged ETag means no new logs
+let sampleLogsEtag = null;
+
 // Function to fetch sample logs from all categories
 function fetchSampleLogs(logStore, recentActivityList) {
   fetch("/api/sample-logs")
-    .then((response) => response.json())
+    .then((response) => {
+      // The browser revalidates with If-None-Match and hands us the cached body on a 304
+      const etag = response.headers.get("ETag");
+      if (etag && etag === sampleLogsEtag) return null;
+      sampleLogsEtag = etag;
+      return response.json();
+    })
     .then((data) => {
+      if (data === null) return;
       if (!data || typeof data !== "object") {
         console.error("Invalid or empty sample logs response:", data);
         return;
@@ -66,12 +146,7 @@ function fetchSampleLogs(logStore, recentActivityList) {
       saveLogStore(logStore);
 
       // Update dashboard components
-      updateSeverityChart(logStore);
-      updateTimeChart();
-      updateCategoryChart(logStore);
-      updateAccessResultsChart(logStore);
-      updateRecentActivity(logStore, recentActivityList);
-      updateSystemStatus(logStore);
+      updateDashboard(logStore, recentActivityList);
     })
     .catch((error) => console.error("Error fetching sample logs:", error));
 }
@@ -178,52 +253,29 @@ function createTimeChart() {
   });
 }
 
-// Update severity chart based on current logs
-function updateSeverityChart(logStore) {
-  if (!severityChart) return;
-
-  // Count severity levels across all log types
-  const severityCounts = {
-    low: 0,
-    medium: 0,
-    high: 0,
-    critical: 0,
-  };
-
-  // Check network logs
-  logStore.network.forEach((log) => {
-    if (log.threat_level) {
-      severityCounts[log.threat_level.toLowerCase()]++;
-    }
-  });
-
-  // Check inmate threats
-  logStore.inmate_threats.forEach((log) => {
-    if (log.threat_level) {
-      severityCounts[log.threat_level.toLowerCase()]++;
-    }
-  });
+// Count of `value` for `field` in a category of the summary totals
+function summaryCount(summary, category, field, value) {
+  const counts = (summary.totals[category] || {})[field] || {};
+  return counts[value] || 0;
+}
 
-  // Check video surveillance
-  logStore.video_surveillance.forEach((log) => {
-    if (log.level) {
-      severityCounts[log.level.toLowerCase()]++;
-    }
-  });
+// Update severity chart from the summary counts
+function updateSeverityChart(summary) {
+  if (!severityChart) return;
 
-  // Update chart data
-  severityChart.data.datasets[0].data = [
-    severityCounts.low,
-    severityCounts.medium,
-    severityCounts.high,
-    severityCounts.critical,
-  ];
+  // Severity levels across network logs, inmate threats and video surveillance
+  severityChart.data.datasets[0].data = ["low", "medium", "high", "critical"].map(
+    (level) =>
+      summaryCount(summary, "network", "threat_level", level) +
+      summaryCount(summary, "inmate_threats", "threat_level", level) +
+      summaryCount(summary, "video_surveillance", "level", level)
+  );
 
   severityChart.update();
 }
 
-// Update time chart with alert frequency
-function updateTimeChart() {
+// Update time chart with the event counts of the most recent summary buckets
+function updateTimeChart(summary) {
   if (
     !timeChart ||
     !timeChart.data ||
@@ -235,28 +287,38 @@ function updateTimeChart() {
     return;
   }
 
-  // Simulate time-based data (in a real app, we'd use actual timestamps)
-  // For this prototype, we'll just shift data and add a new random point
-
-  // Network alerts
-  timeChart.data.datasets[0].data.shift();
-  timeChart.data.datasets[0].data.push(Math.floor(Math.random() * 5) + 1);
-
-  // Security alerts (physical + video)
-  timeChart.data.datasets[1].data.shift();
-  timeChart.data.datasets[1].data.push(Math.floor(Math.random() * 4) + 1);
-
-  // Access alerts (biometric)
-  timeChart.data.datasets[2].data.shift();
-  timeChart.data.datasets[2].data.push(Math.floor(Math.random() * 3));
+  const points = timeChart.data.labels.length;
+  const step = summary.bucket_seconds;
+  const byStart = {};
+  summary.buckets.forEach((bucket) => {
+    byStart[bucket.start] = bucket.counts;
+  });
 
-  // Update time labels (would use actual timestamps in a real app)
-  const now = new Date();
-  timeChart.data.labels.shift();
-  timeChart.data.labels.push(
-    now.toLocaleTimeString("en-US", { hour: "2-digit", minute: "2-digit" })
-  );
+  const labels = [];
+  const network = [];
+  const security = [];
+  const access = [];
+  for (let i = points; i > 0; i--) {
+    const start = summary.to - i * step;
+    const counts = byStart[start] || {};
+    labels.push(
+      new Date(start * 1000).toLocaleTimeString("en-US", {
+        hour: "2-digit",
+        minute: "2-digit",
+        second: "2-digit",
+      })
+    );
+    network.push(counts.network || 0);
+    // Security alerts (physical + video)
+    security.push((counts.physical_security || 0) + (counts.video_surveillance || 0));
+    // Access alerts (biometric)
+    access.push(counts.biometric_access || 0);
+  }
 
+  timeChart.data.labels = labels;
+  timeChart.data.datasets[0].data = network;
+  timeChart.data.datasets[1].data = security;
+  timeChart.data.datasets[2].data = access;
   timeChart.update();
 }
 
@@ -326,50 +388,19 @@ function createCategoryChart() {
   });
 }
 
-// Update Log Count by Category chart
-function updateCategoryChart(logStore) {
+// Update Log Count by Category chart from the summary counts
+function updateCategoryChart(summary) {
   if (!categoryChart) return;
 
-  const categoryCounts = {
-    network: logStore.network.length,
-    server_logs: logStore.server_logs.length,
-    video_surveillance: logStore.video_surveillance.length,
-    biometric_access: logStore.biometric_access.length,
-    physical_security: logStore.physical_security.length,
-    internal_comms: logStore.internal_comms.length,
-    inmate_threats: logStore.inmate_threats.length,
-  };
-
-  // Introduce randomness for a more dynamic feel
-  const randomizedCounts = [
-    Math.max(0, categoryCounts.network + Math.floor(Math.random() * 10 - 5)),
-    Math.max(
-      0,
-      categoryCounts.server_logs + Math.floor(Math.random() * 10 - 5)
-    ),
-    Math.max(
-      0,
-      categoryCounts.video_surveillance + Math.floor(Math.random() * 10 - 5)
-    ),
-    Math.max(
-      0,
-      categoryCounts.biometric_access + Math.floor(Math.random() * 10 - 5)
-    ),
-    Math.max(
-      0,
-      categoryCounts.physical_security + Math.floor(Math.random() * 10 - 5)
-    ),
-    Math.max(
-      0,
-      categoryCounts.internal_comms + Math.floor(Math.random() * 10 - 5)
-    ),
-    Math.max(
-      0,
-      categoryCounts.inmate_threats + Math.floor(Math.random() * 10 - 5)
-    ),
-  ];
-
-  categoryChart.data.datasets[0].data = randomizedCounts;
+  categoryChart.data.datasets[0].data = [
+    "network",
+    "server_logs",
+    "video_surveillance",
+    "biometric_access",
+    "physical_security",
+    "internal_comms",
+    "inmate_threats",
+  ].map((category) => (summary.totals[category] || {}).events || 0);
 
   categoryChart.update();
 }
@@ -407,24 +438,13 @@ function createAccessResultsChart() {
   });
 }
 
-// Update Access Control Results chart
-function updateAccessResultsChart(logStore) {
+// Update Access Control Results chart from the summary counts
+function updateAccessResultsChart(summary) {
   if (!accessResultsChart) return;
 
-  const accessResultsCounts = {
-    granted: 0,
-    denied: 0,
-  };
-
-  logStore.biometric_access.forEach((log) => {
-    if (log.access_result) {
-      accessResultsCounts[log.access_result.toLowerCase()]++;
-    }
-  });
-
   accessResultsChart.data.datasets[0].data = [
-    accessResultsCounts.granted,
-    accessResultsCounts.denied,
+    summaryCount(summary, "biometric_access", "access_result", "granted"),
+    summaryCount(summary, "biometric_access", "access_result", "denied"),
   ];
 
   accessResultsChart.update();
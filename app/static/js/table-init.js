@@ -61,10 +61,9 @@ document.addEventListener("DOMContentLoaded", () => {
     // Initialize DataTables using the vanilla JS constructor
     const dt = new DataTable(logTableElement, {
       processing: true, // Show processing indicator
-      serverSide: false, // DataTables handles processing client-side
+      serverSide: true, // The API pages, sorts and searches, only the visible page is sent
       ajax: {
         url: endpoint, // API endpoint to fetch data
-        dataSrc: "", // Data source is the root of the JSON array
       },
       columns: columns, // Define table columns
       // Default sort by timestamp descending (find the index of the timestamp column)
@@ -81,10 +80,28 @@ document.addEventListener("DOMContentLoaded", () => {
       ], // Page length options
     });
 
-    // Periodically refresh the table data every 2-4 seconds with random interval
+    // Cursor of the newest log loaded so far, sent back by the API in a header
+    let cursor = null;
+    dt.on("xhr", (e, settings, json, xhr) => {
+      cursor = xhr.getResponseHeader("X-Event-Cursor");
+    });
+
+    // Every 2-4 seconds, ask whether new logs arrived since the last draw and
+    // only then redraw the current page
     setRandomInterval(
       () => {
-        dt.ajax.reload(null, false); // false = keep current paging
+        if (cursor === null) return; // initial load not done yet
+        const url = new URL(endpoint, window.location.origin);
+        url.searchParams.set("after", cursor);
+        url.searchParams.set("limit", 1); // one row is enough to see the cursor move
+        fetch(url)
+          .then((response) => response.json())
+          .then((data) => {
+            if (String(data.cursor) !== cursor) {
+              dt.ajax.reload(null, false); // false = keep current paging
+            }
+          })
+          .catch((error) => console.error("Error polling for new logs:", error));
       },
       2000, // min delay 2s
       4000 // max delay 4s
@@ -0,0 +1,85 @@
+"""Latency of CIDR range queries on network logs: the integer address index versus a
+linear scan of the retained events.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cidr [-n 1000000]
+"""
+import argparse
+import time
+from array import array
+from app.api.event_store import EventStore
+from app.api.indexes import CidrIndex, FieldIndex, parse_cidr
+from app.api.sample_log_generator import generate_network_logs
+from app.api.schemas import INT, ip_to_int
+
+BATCH = 100000
+LIMIT = 50  # Logs returned per query, like the endpoints
+
+QUERIES = [
+    ("src 10.0.0.0/8", {"source_ip": "10.0.0.0/8"}),
+    ("src 10.0.0.0/8 to 3306", {"source_ip": "10.0.0.0/8", "port": 3306}),
+    ("src 10.20.0.0/16", {"source_ip": "10.20.0.0/16"}),
+    ("dst 10.0.0.0/24 blocked", {"destination_ip": "10.0.0.0/24", "action": "blocked"}),
+    ("dst 172.16.0.0/12 to 22", {"destination_ip": "172.16.0.0/12", "port": 22}),
+]
+
+
+def timed(function, repeat):
+    """Result of `function` and its average run time in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=1000000, help="network events retained")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help="runs per query")
+    args = parser.parse_args()
+
+    store = EventStore('network', capacity=args.n)
+    store.add_index('source_ip', CidrIndex('source_ip'))
+    store.add_index('destination_ip', CidrIndex('destination_ip'))
+    store.add_index('port', FieldIndex('port', INT))
+    store.add_index('action', FieldIndex('action'))
+
+    # The linear scan gets the same integer columns the store keeps, so only the access path differs
+    columns = {'source_ip': array('I'), 'destination_ip': array('I'), 'port': array('q'), 'action': []}
+    start = time.perf_counter()
+    for offset in range(0, args.n, BATCH):
+        logs = generate_network_logs(min(BATCH, args.n - offset), seed=offset).to_dicts()
+        store.extend(logs)
+        for log in logs:
+            columns['source_ip'].append(ip_to_int(log['source_ip']))
+            columns['destination_ip'].append(ip_to_int(log['destination_ip']))
+            columns['port'].append(log['port'])
+            columns['action'].append(log['action'])
+    print(f"stored {len(store):,} network events in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'query':<28}{'matches':>10}{'scan (ms)':>12}{'index (ms)':>12}{'speedup':>10}")
+    for name, query in QUERIES:
+        filters = {field: [parse_cidr(value)] if field.endswith('_ip') else [value] for field, value in query.items()}
+
+        def scan():
+            # Newest first, like the endpoints
+            checks = []
+            for field, value in query.items():
+                column = columns[field]
+                if field.endswith('_ip'):
+                    first, last = parse_cidr(value)
+                    checks.append(lambda i, column=column, first=first, last=last: first <= column[i] <= last)
+                else:
+                    checks.append(lambda i, column=column, value=value: column[i] == value)
+            matches = [i for i in range(len(store) - 1, -1, -1) if all(check(i) for check in checks)]
+            return [store.window(i, 1, newest_first=False, raw=True)[0][0] for i in matches[:LIMIT]], len(matches)
+
+        (_, scanned), scan_ms = timed(scan, args.repeat)
+        (_, found), index_ms = timed(lambda: store.search(filters, LIMIT, raw=True), args.repeat)
+        assert scanned == found, (name, scanned, found)
+        print(f"{name:<28}{found:>10,}{scan_ms:>12,.1f}{index_ms:>12,.2f}{scan_ms / index_ms:>9,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""CPU time per request on the compression path: compressing every response versus
+the compressed-response cache and the precompressed static assets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_compression [-n 500]
+"""
+import argparse
+import time
+from app import create_app
+from app.assets import get_manifest
+
+HEADERS = {'Accept-Encoding': 'br, gzip'}
+
+
+def cpu_per_request(client, url, n):
+    """Average process CPU time, in microseconds, of `n` requests for `url`."""
+    client.get(url, headers=HEADERS).get_data()  # warm up caches
+    start = time.process_time()
+    for _ in range(n):
+        response = client.get(url, headers=HEADERS)
+        assert response.status_code == 200
+        response.get_data()  # consume streamed bodies, they are compressed while read
+    return (time.process_time() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=500, help="requests per measurement")
+    args = parser.parse_args()
+
+    # COMPRESS_CACHE_SIZE=0 compresses every response, like plain Flask-Compress
+    uncached = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 1000, 'COMPRESS_CACHE_SIZE': 0})
+    cached = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 1000})
+    with cached.test_request_context():
+        script = get_manifest().get('js/dashboard-view.js').hashed_name
+
+    cases = [
+        ("dashboard-view.js", '/static/js/dashboard-view.js', f'/assets/{script}'),
+        ("style.css", '/static/css/style.css', '/assets/css/style.css'),
+        ("50 network logs", '/api/network-monitoring/', '/api/network-monitoring/'),
+        ("1000 network logs", '/api/network-monitoring/?after=0', '/api/network-monitoring/?after=0'),
+    ]
+    print(f"{'response':<20}{'compressed per request (us)':>29}{'cached/precompressed (us)':>27}{'saving':>9}")
+    before_client, after_client = uncached.test_client(), cached.test_client()
+    for name, before_url, after_url in cases:
+        before = cpu_per_request(before_client, before_url, args.n)
+        after = cpu_per_request(after_client, after_url, args.n)
+        print(f"{name:<20}{before:>29,.0f}{after:>27,.0f}{1 - after / before:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
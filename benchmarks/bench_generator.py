@@ -0,0 +1,53 @@
+"""Throughput of the per-record sample generators versus the bulk (columnar) ones.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_generator [-n 200000]
+"""
+import argparse
+import time
+from app.api import sample_log_generator as generator
+
+CATEGORIES = [
+    "network",
+    "server",
+    "video_surveillance",
+    "biometric_access",
+    "physical_security",
+    "internal_comms",
+    "inmate_threat",
+]
+
+
+def rate(n, seconds):
+    return n / seconds if seconds else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=200000, help="records generated per category")
+    args = parser.parse_args()
+    n = args.n
+
+    print(f"{'category':<20}{'per-record/s':>15}{'bulk columns/s':>17}{'bulk dicts/s':>15}{'speedup':>10}")
+    for name in CATEGORIES:
+        single = getattr(generator, f'generate_{name}_log')
+        bulk = getattr(generator, f'generate_{name}_logs')
+
+        start = time.perf_counter()
+        for _ in range(n):
+            single()
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = bulk(n, seed=0)
+        columns_time = time.perf_counter() - start
+        batch.to_dicts()
+        dicts_time = time.perf_counter() - start
+
+        print(f"{name:<20}{rate(n, single_time):>15,.0f}{rate(n, columns_time):>17,.0f}"
+              f"{rate(n, dicts_time):>15,.0f}{single_time / dicts_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Requests per second of the list endpoints: per-request jsonify() versus joining the
+JSON encodings cached in the event store.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_responses [-d 2.0]
+"""
+import argparse
+import time
+from flask import jsonify, request
+from app import create_app
+from app.encoding import orjson
+
+CATEGORY = 'network'
+ENDPOINT = '/api/network-monitoring/'
+
+
+def rate(client, url, duration):
+    """Requests per second answered for `url` during `duration` seconds."""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        response = client.get(url)
+        assert response.status_code == 200
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-d', '--duration', type=float, default=2.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 1000})
+    store = app.extensions['event_stores'][CATEGORY]
+
+    # The previous implementation: decode rows to dicts and jsonify them on every request
+    @app.route('/bench/jsonify')
+    def jsonify_logs():
+        limit = request.args.get('limit', type=int)
+        logs, cursor, truncated = store.since_seq(0, limit)
+        return jsonify({"logs": logs, "cursor": cursor, "truncated": truncated})
+
+    print(f"JSON provider: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'rows':>6}{'jsonify req/s':>16}{'cached bytes req/s':>21}{'speedup':>10}")
+    with app.test_client() as client:
+        for rows in (50, 1000):
+            before = rate(client, f'/bench/jsonify?limit={rows}', args.duration)
+            after = rate(client, f'{ENDPOINT}?after=0&limit={rows}', args.duration)
+            print(f"{rows:>6}{before:>16,.0f}{after:>21,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Import and startup time of the app, with every category enabled and with a single one.
+
+Every measurement runs in a fresh interpreter, so module imports are not cached.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [-r 10]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Measured in the child interpreter: importing the app package, then create_app()
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+print(json.dumps({"import": imported - start, "create_app": created - imported,
+                  "stores": len(app.extensions['event_stores']), "modules": len(sys.modules)}))
+"""
+
+SETUPS = [
+    ("all categories", {}),
+    ("network only", {'CATEGORIES': ['network']}),
+]
+
+
+def measure(config, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE, json.dumps(dict(config, SAMPLE_PRODUCER=False))],
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {
+        "import": statistics.median(r["import"] for r in runs) * 1e3,
+        "create_app": statistics.median(r["create_app"] for r in runs) * 1e3,
+        "stores": runs[0]["stores"],
+        "modules": runs[0]["modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-r', '--repeat', type=int, default=10, help="interpreters started per setup")
+    args = parser.parse_args()
+
+    print(f"{'setup':<18}{'stores':>8}{'modules':>9}{'import (ms)':>13}{'create_app (ms)':>17}")
+    for name, config in SETUPS:
+        result = measure(config, args.repeat)
+        print(f"{name:<18}{result['stores']:>8}{result['modules']:>9}{result['import']:>13.1f}{result['create_app']:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""HTTP load test replaying the polling of open dashboard consoles against a server.
+
+Every simulated client is a browser tab with its own keep-alive connection:
+overview clients poll /api/sample-logs/ every 2-4 seconds and /api/summary/ every
+5 seconds, detail clients draw a DataTables page of one category, poll for new logs
+every 2-4 seconds and redraw when the cursor moved, like app/static/js does.
+Without --url the app is started locally (threaded development server, sample
+producer on); the server CPU and RSS are then read from /proc (Linux), or use --pid
+for a server started elsewhere. Results are printed and written as JSON with -o.
+
+Run from the repository root:
+
+    python -m benchmarks.loadtest [-c 50] [-d 60] [--url http://host:5000] [-o results.json]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+from app.api.categories import REGISTRY, SCHEMAS
+
+OVERVIEW_INTERVAL = (2.0, 4.0)  # Seconds between /api/sample-logs polls
+SUMMARY_INTERVAL = 5.0  # Seconds between /api/summary polls
+DETAIL_INTERVAL = (2.0, 4.0)  # Seconds between new log polls of a detail page
+PAGE_LENGTH = 15  # Rows per DataTables page, as in table-init.js
+TIMEOUT = 30.0  # Seconds before a request counts as failed
+HEADERS = {'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate, br'}
+
+# Endpoint of the detail page of every category
+DETAIL_PAGES = {name: f"{category.url_prefix}/" for name, category in REGISTRY.items()}
+
+
+class Recorder:
+    """Latencies, statuses and bytes of the requests, per endpoint label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, label, seconds, status, size):
+        with self._lock:
+            endpoint = self.endpoints.setdefault(label, {'latencies': [], 'errors': 0, 'not_modified': 0, 'bytes': 0})
+            endpoint['latencies'].append(seconds)
+            endpoint['bytes'] += size
+            if status == 304:
+                endpoint['not_modified'] += 1
+            elif status is None or status >= 400:
+                endpoint['errors'] += 1
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0
+
+
+class Client(threading.Thread):
+    """One console tab: a keep-alive connection replaying the polling of a page."""
+
+    def __init__(self, number, host, port, recorder, stop_at, seed):
+        super().__init__(name=f'client-{number}', daemon=True)
+        self.host, self.port = host, port
+        self.recorder = recorder
+        self.stop_at = stop_at
+        self.random = random.Random(seed * 100003 + number)
+        self.connection = None
+        self.etags = {}  # path -> ETag, browsers revalidate what they fetched before
+
+    def get(self, label, path, revalidate=False):
+        """GETs `path`; returns the response headers, or None when the request failed."""
+        headers = dict(HEADERS)
+        if revalidate and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT)
+            self.connection.request('GET', path, headers=headers)
+            response = self.connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.recorder.add(label, time.perf_counter() - start, None, 0)
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            return None
+        self.recorder.add(label, time.perf_counter() - start, response.status, len(body))
+        if revalidate and response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        return response
+
+    def sleep_until(self, when):
+        time.sleep(max(0.0, min(when, self.stop_at) - time.monotonic()))
+        return time.monotonic() < self.stop_at
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class OverviewClient(Client):
+    """The overview page polling without EventSource."""
+
+    def run(self):
+        now = time.monotonic()
+        # Tabs are not all opened at the same instant
+        next_logs = now + self.random.uniform(0, OVERVIEW_INTERVAL[1])
+        next_summary = now + self.random.uniform(0, SUMMARY_INTERVAL)
+        while self.sleep_until(min(next_logs, next_summary)):
+            now = time.monotonic()
+            if now >= next_logs:
+                self.get('sample-logs', '/api/sample-logs/', revalidate=True)
+                next_logs = now + self.random.uniform(*OVERVIEW_INTERVAL)
+            if now >= next_summary:
+                self.get('summary', '/api/summary/?range=10m', revalidate=True)
+                next_summary = now + SUMMARY_INTERVAL
+        self.close()
+
+
+class DetailClient(Client):
+    """A detail page: a DataTables draw, then polls for new logs that trigger a redraw."""
+
+    def __init__(self, number, host, port, recorder, stop_at, seed, category):
+        super().__init__(number, host, port, recorder, stop_at, seed)
+        self.category = category
+        self.endpoint = DETAIL_PAGES[category]
+        self.label = self.endpoint.strip('/').split('/')[-1]
+        self.draw = 0
+
+    def draw_params(self):
+        fields = list(SCHEMAS[self.category])
+        self.draw += 1
+        params = {'draw': self.draw, 'start': 0, 'length': PAGE_LENGTH,
+                  'order[0][column]': fields.index('timestamp'), 'order[0][dir]': 'desc',
+                  'search[value]': '', 'search[regex]': 'false'}
+        for i, field in enumerate(fields):
+            params[f'columns[{i}][data]'] = field
+            params[f'columns[{i}][searchable]'] = 'true'
+            params[f'columns[{i}][orderable]'] = 'true'
+            params[f'columns[{i}][search][value]'] = ''
+        params['_'] = int(time.time() * 1000)  # jQuery's cache buster
+        return urlencode(params)
+
+    def redraw(self):
+        response = self.get(f'{self.label} draw', f'{self.endpoint}?{self.draw_params()}')
+        return response.getheader('X-Event-Cursor') if response is not None else None
+
+    def run(self):
+        cursor = None
+        if self.sleep_until(time.monotonic() + self.random.uniform(0, DETAIL_INTERVAL[1])):
+            cursor = self.redraw()
+        while self.sleep_until(time.monotonic() + self.random.uniform(*DETAIL_INTERVAL)):
+            if cursor is None:
+                cursor = self.redraw()
+                continue
+            response = self.get(f'{self.label} poll', f'{self.endpoint}?after={cursor}&limit=1')
+            if response is not None and response.getheader('X-Event-Cursor') != cursor:
+                cursor = self.redraw()
+        self.close()
+
+
+class ProcessMonitor(threading.Thread):
+    """Samples the CPU time and RSS of a process from /proc every `interval` seconds."""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(name='process-monitor', daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.rss = []
+        self._stop_event = threading.Event()
+        self.started_at = time.monotonic()
+        self.start_cpu = self.cpu_seconds()
+
+    def cpu_seconds(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rpartition(')')[2].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+
+    def rss_bytes(self):
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.rss.append(self.rss_bytes())
+            except OSError:
+                return
+
+    def stop(self):
+        self._stop_event.set()
+        try:
+            cpu = self.cpu_seconds() - self.start_cpu
+            self.rss.append(self.rss_bytes())
+        except OSError:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "pid": self.pid,
+            "cpu_seconds": round(cpu, 2),
+            "cpu_percent": round(cpu / elapsed * 100, 1),
+            "rss_mb_peak": round(max(self.rss) / 2 ** 20, 1),
+            "rss_mb_end": round(self.rss[-1] / 2 ** 20, 1),
+        }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    """Starts the app in a child process and waits until it answers."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.loadtest', '--serve', '--port', str(port)], cwd=root)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("the local server exited during startup")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/sample-logs/')
+            connection.getresponse().read()
+            connection.close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("the local server did not start within 30 seconds")
+
+
+def serve(port):
+    # What run.py serves, minus the debugger and reloader, one thread per connection
+    from app import create_app
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no access log per request
+    create_app().run(host='127.0.0.1', port=port, threaded=True)
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for label, endpoint in sorted(recorder.endpoints.items()):
+        latencies = sorted(endpoint['latencies'])
+        endpoints[label] = {
+            "requests": len(latencies),
+            "errors": endpoint['errors'],
+            "not_modified": endpoint['not_modified'],
+            "requests_per_second": round(len(latencies) / elapsed, 2),
+            "bytes": endpoint['bytes'],
+            "latency_ms": {name: round(percentile(latencies, q) * 1000, 2)
+                           for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        "requests": total,
+        "errors": sum(e['errors'] for e in endpoints.values()),
+        "requests_per_second": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-c', '--clients', type=int, default=50, help="simulated console tabs")
+    parser.add_argument('--detail', type=float, default=0.5, help="share of the clients on a detail page")
+    parser.add_argument('-d', '--duration', type=float, default=60.0, help="seconds of load")
+    parser.add_argument('--url', help="server to load, e.g. http://127.0.0.1:5000 (default: start the app locally)")
+    parser.add_argument('--pid', type=int, help="process id of the --url server, to report its CPU and RSS")
+    parser.add_argument('--port', type=int, help="port of the local server (default: a free one)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the polling jitter")
+    parser.add_argument('-o', '--output', help="write the results to this JSON file")
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port, pid = url.hostname, url.port or 80, args.pid
+    else:
+        host, port = '127.0.0.1', args.port or free_port()
+        server = start_server(port)
+        pid = server.pid
+    try:
+        monitor = ProcessMonitor(pid) if pid and os.path.exists(f'/proc/{pid}') else None
+        recorder = Recorder()
+        detail = round(args.clients * args.detail)
+        categories = list(DETAIL_PAGES)
+        start = time.monotonic()
+        stop_at = start + args.duration
+        clients = [DetailClient(i, host, port, recorder, stop_at, args.seed, categories[i % len(categories)])
+                   for i in range(detail)]
+        clients += [OverviewClient(i, host, port, recorder, stop_at, args.seed) for i in range(detail, args.clients)]
+        if monitor is not None:
+            monitor.start()
+        print(f"{len(clients) - detail} overview and {detail} detail clients against {host}:{port} "
+              f"for {args.duration:g}s")
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.monotonic() - start
+        process = monitor.stop() if monitor is not None else None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "clients": {"overview": len(clients) - detail, "detail": detail},
+        "duration": round(elapsed, 2),
+        "target": args.url or "local",
+        **summarize(recorder, elapsed),
+        "server": process,
+    }
+
+    print(f"\n{'endpoint':<28}{'requests':>10}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, endpoint in results['endpoints'].items():
+        latency = endpoint['latency_ms']
+        print(f"{label:<28}{endpoint['requests']:>10,}{endpoint['requests_per_second']:>9.1f}"
+              f"{endpoint['errors']:>8,}{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}")
+    print(f"{'total':<28}{results['requests']:>10,}{results['requests_per_second']:>9.1f}{results['errors']:>8,}")
+    if process is not None:
+        print(f"\nserver: {process['cpu_percent']}% CPU, {process['rss_mb_peak']} MB peak RSS")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,17 @@
+import os
 from app import create_app
 
 # this is the entry point to our app and what we run to start it.
+# It runs the development server; in production run `python -m app.server` (see app/server.py).
 
-app = create_app()
+config = {}
+# Keep the event history on disk so it survives restarts. The debug reloader runs this
+# file in a watcher process too; only the serving process (the reloader's child) writes
+# the event log, and importing this module (e.g. gunicorn run:app) keeps none.
+if __name__ == "__main__" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    config['EVENT_LOG_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'event-log')
+
+app = create_app(config)
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,98 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from app.api.event_store import format_timestamp
+from app.api.segment_log import SegmentLog
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+EVENT = {"source_ip": "10.9.8.7", "destination_ip": "10.0.0.2", "protocol": "TCP", "port": 22,
+         "action": "blocked", "threat_level": "high", "timestamp": "2025-04-30T12:00:00Z"}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def request(port, method, path, body=None):
+    # A new connection each time, so that the requests spread over the workers
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+def start_server(*args):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'app.server', '-w', '3', '-b', f'127.0.0.1:{port}',
+                                '--shared-log-mb', '4', *args], cwd=BASE_DIR)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            request(port, 'GET', '/api/server-logs/')
+            return process, port
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                pytest.fail("the server did not start")
+            time.sleep(0.1)
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=30) == 0
+
+@pytest.fixture
+def server():
+    process, port = start_server('--event-log', '')
+    yield port
+    stop_server(process)
+
+def test_workers_serve_the_same_events(server):
+    _, headers, _ = request(server, 'GET', '/api/network-monitoring/')
+    cursor = int(headers['X-Event-Cursor'])
+    status, _, body = request(server, 'POST', '/api/ingest/network', json.dumps(EVENT).encode())
+    assert status == 200
+    assert json.loads(body)["accepted"] == 1
+
+    deadline = time.monotonic() + 10
+    while not json.loads(request(server, 'GET', '/api/network-monitoring/?source_ip=10.9.8.7')[2])["logs"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    time.sleep(0.1)  # Every worker polls the shared log within milliseconds
+
+    # Whichever worker answers, the events and cursors are the same
+    responses = set()
+    for _ in range(12):
+        _, headers, body = request(server, 'GET', f'/api/network-monitoring/?after={cursor}&limit=1')
+        responses.add((headers['X-Event-Cursor'], body))
+    assert len(responses) == 1
+    filtered = {request(server, 'GET', '/api/network-monitoring/?source_ip=10.9.8.7')[2] for _ in range(12)}
+    assert len(filtered) == 1
+    assert json.loads(filtered.pop())["logs"][0]["source_ip"] == EVENT["source_ip"]
+
+def test_history_older_than_the_replicas_is_read_from_the_event_log(tmp_path):
+    # Two days old: long expired from the stores, only the event log has them
+    start = int(time.time()) - 2 * 86400
+    log = SegmentLog(str(tmp_path / 'server_logs'))
+    log.extend((start + i, json.dumps({"timestamp": format_timestamp(start + i), "server": "db-core-1",
+                                       "event": "Login", "attempts": i, "status": "resolved"}).encode())
+               for i in range(2000))
+    log.close()
+
+    process, port = start_server('--event-log', str(tmp_path))
+    try:
+        query = f'from={format_timestamp(start + 10)}&to={format_timestamp(start + 14)}'.replace('+', '%2B')
+        for _ in range(6):  # Whichever worker answers
+            status, _, body = request(port, 'GET', f'/api/server-logs/?{query}')
+            assert status == 200
+            assert [event["attempts"] for event in json.loads(body)["logs"]] == [10, 11, 12, 13, 14]
+    finally:
+        stop_server(process)
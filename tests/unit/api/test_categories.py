@@ -0,0 +1,50 @@
+import pytest
+from app import create_app
+from app.api.categories import REGISTRY, enabled_categories
+from app.api.event_store import create_stores
+from app.api.schemas import TIMESTAMP
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False, 'CATEGORIES': ['network', 'inmate_threats']})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.mark.parametrize("category", REGISTRY.values(), ids=list(REGISTRY))
+def test_declarations_match_the_schema_and_generators(category):
+    assert category.schema["timestamp"] == TIMESTAMP
+    declared = (set(category.indexed_fields) | set(category.address_fields) | set(category.text_fields)
+                | set(category.rollup_fields) | category.optional)
+    assert declared <= set(category.schema)
+    event = category.generate()
+    assert set(category.schema) - category.optional <= set(event) <= set(category.schema)
+    assert len(category.generate_batch(3, seed=1).to_dicts()) == 3
+
+def test_every_category_has_its_endpoint():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    endpoints = {rule.endpoint: rule.rule for rule in app.url_map.iter_rules()}
+    for category in REGISTRY.values():
+        assert endpoints[f"{category.blueprint}.{category.view}"] == f"{category.url_prefix}/"
+
+def test_enabled_categories():
+    assert enabled_categories() == list(REGISTRY.values())
+    # Registry order, whatever the configured order
+    assert [c.name for c in enabled_categories(['server_logs', 'network'])] == ['network', 'server_logs']
+    with pytest.raises(ValueError, match="bogus"):
+        enabled_categories(['network', 'bogus'])
+
+def test_only_enabled_categories_are_served(client):
+    assert sorted(client.application.extensions['event_stores']) == ['inmate_threats', 'network']
+    assert client.get('/api/network-monitoring/').status_code == 200
+    assert client.get('/api/server-logs/').status_code == 404
+    assert sorted(client.get('/api/sample-logs/').get_json()) == ['inmate_threat_log', 'network_log']
+    assert sorted(client.get('/api/summary/?range=10m').get_json()["totals"]) == ['inmate_threats', 'network']
+    assert client.post('/api/ingest/server_logs', data=b'{}\n').status_code == 404
+    assert client.get('/api/stream/?categories=server_logs').status_code == 400
+
+def test_retention_can_be_declared_per_category(monkeypatch):
+    monkeypatch.setattr(REGISTRY['network'], 'retention', 60)
+    stores = create_stores(capacity=10, retention=3600, categories=['network', 'server_logs'])
+    assert stores['network'].retention == 60
+    assert stores['server_logs'].retention == 3600
@@ -0,0 +1,123 @@
+import pytest
+from app import create_app
+from app.api.datatables import ColumnOrdering, parse_request, order_rows, filter_rows
+
+COLUMNS = ["timestamp", "server", "event", "attempts", "status"]
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0})
+    app.config['TESTING'] = True
+    store = app.extensions['event_stores']['server_logs']
+    for i in range(30):
+        store.append({
+            "server": f"db-core-{i % 3}",
+            "event": "Malware signature detected" if i % 5 == 0 else "Unexpected server reboot",
+            "attempts": i % 7,
+            "status": "escalated" if i % 10 == 0 else "monitoring",
+            "timestamp": f"2025-04-30T12:00:{i:02d}+00:00Z",
+        })
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+def dt_query(draw=1, start=0, length=10, order=(0, "desc"), search="", column_search=None):
+    params = {"draw": draw, "start": start, "length": length, "search[value]": search,
+              "order[0][column]": order[0], "order[0][dir]": order[1]}
+    for i, name in enumerate(COLUMNS):
+        params[f"columns[{i}][data]"] = name
+        params[f"columns[{i}][searchable]"] = "true"
+        params[f"columns[{i}][orderable]"] = "true"
+        params[f"columns[{i}][search][value]"] = (column_search or {}).get(name, "")
+    return params
+
+def test_parse_request():
+    params = parse_request(dt_query(draw=3, start=20, length=15, order=(3, "asc"), search="reboot"))
+    assert params["draw"] == 3
+    assert params["start"] == 20
+    assert params["length"] == 15
+    assert params["search"] == "reboot"
+    assert params["order"] == [("attempts", "asc")]
+    assert [c["data"] for c in params["columns"]] == COLUMNS
+
+def test_parse_request_rejects_bad_direction():
+    with pytest.raises(ValueError):
+        parse_request(dt_query(order=(0, "sideways")))
+
+def test_default_page_is_newest_first(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(draw=4)).get_json()
+    assert body["draw"] == 4
+    assert body["recordsTotal"] == 30
+    assert body["recordsFiltered"] == 30
+    assert len(body["data"]) == 10
+    assert body["data"][0]["timestamp"] == "2025-04-30T12:00:29+00:00Z"
+
+def test_paging_and_ascending_timestamp(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(start=25, order=(0, "asc"))).get_json()
+    assert [row["timestamp"][17:19] for row in body["data"]] == ["25", "26", "27", "28", "29"]
+
+def test_length_all(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(length=-1)).get_json()
+    assert len(body["data"]) == 30
+
+def test_global_search_filters_records(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(search="malware")).get_json()
+    assert body["recordsTotal"] == 30
+    assert body["recordsFiltered"] == 6
+    assert all("Malware" in row["event"] for row in body["data"])
+
+def test_column_search(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(column_search={"status": "escalated"})).get_json()
+    assert body["recordsFiltered"] == 3
+
+def test_order_by_other_column(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(length=-1, order=(3, "desc"))).get_json()
+    attempts = [row["attempts"] for row in body["data"]]
+    assert attempts == sorted(attempts, reverse=True)
+
+def test_plain_request_keeps_list_shape(client):
+    data = client.get('/api/server-logs/').get_json()
+    assert isinstance(data, list)
+
+def test_invalid_request_is_rejected(client):
+    response = client.get('/api/server-logs/', query_string={"draw": "x"})
+    assert response.status_code == 400
+
+def test_column_ordering_follows_the_store():
+    ordering = ColumnOrdering("n")
+    for seq, n in enumerate([2, 1, 2, 3, 1], start=1):
+        ordering.add(seq, {"n": n})
+    # Ties newest first in both directions
+    assert ordering.seqs(0, 10, descending=False) == [5, 2, 3, 1, 4]
+    assert ordering.seqs(0, 10, descending=True) == [4, 3, 1, 5, 2]
+    assert ordering.seqs(1, 2, descending=False) == [2, 3]
+    ordering.expire(3)
+    assert ordering.seqs(0, 10, descending=False) == [5, 3, 4]
+
+def test_column_order_matches_sorting_and_is_kept_up_to_date(app, client):
+    store = app.extensions['event_stores']['server_logs']
+    query = dt_query(length=-1, order=(3, "asc"))
+    rows = client.get('/api/server-logs/', query_string=query).get_json()["data"]
+    assert rows == order_rows(store.latest(), [("attempts", "asc")])
+    assert "order:attempts" in store._indexes
+
+    store.append({"server": "db-core-9", "event": "Login", "attempts": 0, "status": "monitoring",
+                  "timestamp": "2025-04-30T12:01:00+00:00Z"})
+    body = client.get('/api/server-logs/', query_string=dict(query, length=2)).get_json()
+    assert body["recordsTotal"] == 31
+    assert body["data"][0]["server"] == "db-core-9"
+
+def test_search_with_column_order(client):
+    body = client.get('/api/server-logs/', query_string=dt_query(start=1, length=2, order=(3, "desc"),
+                                                                  search="malware")).get_json()
+    assert body["recordsFiltered"] == 6
+    attempts = [row["attempts"] for row in body["data"]]
+    assert attempts == sorted(attempts, reverse=True) and len(attempts) == 2
+
+def test_filter_rows_matches_lists():
+    params = {"search": "warden", "columns": [{"data": "recipients", "searchable": True, "search": ""}]}
+    rows = [{"recipients": ["security_team", "warden"]}, {"recipients": ["maintenance"]}]
+    assert filter_rows(rows, params) == rows[:1]
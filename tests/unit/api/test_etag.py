@@ -0,0 +1,59 @@
+import pytest
+from app import create_app
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def append_one(client, category):
+    store = client.application.extensions['event_stores'][category]
+    store.append(dict(store.latest(1)[0]))
+
+def test_repeat_request_is_not_modified(client):
+    first = client.get('/api/network-monitoring/')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+    second = client.get('/api/network-monitoring/', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+def test_compressed_etag_is_accepted(client):
+    etag = client.get('/api/server-logs/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert etag.endswith(':gzip"')
+    response = client.get('/api/server-logs/', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 304
+
+def test_append_changes_etag(client):
+    etag = client.get('/api/server-logs/').headers['ETag']
+    append_one(client, 'server_logs')
+    response = client.get('/api/server-logs/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_query_parameters_change_etag(client):
+    plain = client.get('/api/server-logs/').headers['ETag']
+    after = client.get('/api/server-logs/?after=10').headers['ETag']
+    assert plain != after
+    assert client.get('/api/server-logs/?after=10', headers={'If-None-Match': plain}).status_code == 200
+
+def test_errors_are_not_tagged(client):
+    response = client.get('/api/server-logs/?after=abc')
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
+
+def test_sample_logs_returns_newest_log_per_category(client):
+    response = client.get('/api/sample-logs/')
+    data = response.get_json()
+    store = client.application.extensions['event_stores']['internal_comms']
+    assert data['internal_comms_log'] == store.latest(1)[0]
+    assert len(data) == 7
+
+    etag = response.headers['ETag']
+    assert client.get('/api/sample-logs/', headers={'If-None-Match': etag}).status_code == 304
+    append_one(client, 'inmate_threats')
+    assert client.get('/api/sample-logs/', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,280 @@
+import json
+import sys
+import threading
+import time
+import pytest
+from app import create_app
+from app.api.event_store import EventStore, CATEGORIES, BLOCK_ROWS, SNAPSHOT_ROWS, parse_timestamp, ip_to_int, int_to_ip
+from app.api.sample_log_generator import generate_network_logs
+
+
+def make_event(second, **extra):
+    event = {"timestamp": f"2025-04-30T12:00:{second:02d}+00:00Z"}
+    event.update(extra)
+    return event
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_parse_timestamp_formats():
+    expected = parse_timestamp("2025-04-30T12:00:00+00:00")
+    assert parse_timestamp("2025-04-30T12:00:00+00:00Z") == expected
+    assert parse_timestamp("2025-04-30T12:00:00Z") == expected
+    assert parse_timestamp("2025-04-30T12:00:00") == expected
+
+def test_append_assigns_monotonic_sequence_numbers():
+    store = EventStore("network", capacity=5)
+    assert store.last_seq == 0
+    assert store.append(make_event(1)) == 1
+    assert store.append(make_event(2)) == 2
+    assert store.extend([make_event(3), make_event(4)]) == 4
+    assert len(store) == 4
+
+def test_latest_returns_newest_first():
+    store = EventStore("network", capacity=5)
+    store.extend([make_event(i, n=i) for i in range(3)])
+    assert [e["n"] for e in store.latest()] == [2, 1, 0]
+    assert [e["n"] for e in store.latest(2)] == [2, 1]
+    assert store.latest(0) == []
+
+def test_ring_buffer_overwrites_oldest():
+    store = EventStore("network", capacity=3)
+    store.extend([make_event(i, n=i) for i in range(5)])
+    assert len(store) == 3
+    assert store.last_seq == 5
+    assert [e["n"] for e in store.latest()] == [4, 3, 2]
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        EventStore("network", capacity=0)
+
+def test_concurrent_appends_are_not_lost():
+    store = EventStore("network", capacity=10000)
+
+    def worker():
+        for i in range(500):
+            store.append(make_event(i % 60))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.last_seq == 4000
+    assert len(store) == 4000
+
+def test_app_backfills_every_category(client):
+    stores = client.application.extensions['event_stores']
+    assert sorted(stores) == sorted(CATEGORIES)
+    for store in stores.values():
+        assert len(store) == 50
+
+def test_endpoint_reads_from_shared_store(client):
+    first = client.get('/api/server-logs/').get_json()
+    second = client.get('/api/server-logs/').get_json()
+    # Without a producer running, two polls see the same events
+    assert first == second
+
+def test_since_seq_returns_events_after_cursor():
+    store = EventStore("network", capacity=10)
+    store.extend([make_event(i, n=i) for i in range(5)])
+    events, cursor, truncated = store.since_seq(3)
+    assert [e["n"] for e in events] == [3, 4]
+    assert cursor == 5
+    assert truncated is False
+
+def test_since_seq_up_to_date_cursor_returns_nothing():
+    store = EventStore("network", capacity=10)
+    store.extend([make_event(i) for i in range(5)])
+    assert store.since_seq(5) == ([], 5, False)
+    # A cursor from the future (e.g. after a restart) resyncs to the newest event
+    assert store.since_seq(99) == ([], 5, False)
+
+def test_since_seq_with_limit_pages_forward():
+    store = EventStore("network", capacity=10)
+    store.extend([make_event(i, n=i) for i in range(5)])
+    events, cursor, _ = store.since_seq(0, limit=2)
+    assert [e["n"] for e in events] == [0, 1]
+    events, cursor, _ = store.since_seq(cursor, limit=2)
+    assert [e["n"] for e in events] == [2, 3]
+    assert cursor == 4
+
+def test_since_seq_reports_evicted_events():
+    store = EventStore("network", capacity=3)
+    store.extend([make_event(i, n=i) for i in range(6)])
+    events, cursor, truncated = store.since_seq(1)
+    assert [e["n"] for e in events] == [3, 4, 5]
+    assert cursor == 6
+    assert truncated is True
+
+def test_since_time_binary_search_over_wrapped_ring():
+    store = EventStore("network", capacity=4)
+    store.extend([make_event(i, n=i) for i in range(7)])
+    events, cursor, truncated = store.since_time("2025-04-30T12:00:04+00:00Z")
+    assert [e["n"] for e in events] == [5, 6]
+    assert cursor == 7
+    assert truncated is False
+    events, _, truncated = store.since_time("2025-04-30T11:00:00Z")
+    assert [e["n"] for e in events] == [3, 4, 5, 6]
+    assert truncated is True
+
+def test_late_event_is_returned_by_time_cursor():
+    store = EventStore("network", capacity=10)
+    store.extend([make_event(10, n=0), make_event(20, n=1)])
+    # Arrives last but carries a timestamp older than the newest event
+    store.append(make_event(15, n=2))
+    events, _, _ = store.since_time("2025-04-30T12:00:15Z")
+    assert [e["n"] for e in events] == [1, 2]
+
+def test_compact_storage_round_trips_generated_logs():
+    logs = sorted(generate_network_logs(3000, seed=1).to_dicts(), key=lambda x: x["timestamp"])
+    store = EventStore("network", capacity=5000)
+    store.extend(logs)
+    assert store.since_seq(0)[0] == logs
+    # Optional fields stay absent when the event has none
+    assert any("details" not in log for log in store.latest())
+
+def test_compact_storage_is_smaller_than_dicts():
+    logs = generate_network_logs(2000, seed=2).to_dicts()
+    store = EventStore("network", capacity=5000)
+    store.extend(logs)
+    dict_bytes = sum(sys.getsizeof(log) + sum(sys.getsizeof(v) for v in log.values()) for log in logs)
+    # The cached JSON encodings come on top of the columns
+    assert store.bytes_used - store.encoded_bytes < dict_bytes / 5
+    assert store.bytes_used < dict_bytes
+
+def test_events_are_encoded_once_on_append():
+    store = EventStore("server_logs", capacity=3)
+    for i in range(5):
+        store.append(make_event(i, server="db-core-1", attempts=i))
+    encoded, cursor = store.tail(raw=True)
+    assert [json.loads(e) for e in encoded] == store.latest()
+    assert cursor == 5
+    events, _, _ = store.since_seq(3, raw=True)
+    assert [json.loads(e)["attempts"] for e in events] == [3, 4]
+    assert store.stats()["encoded_bytes"] == sum(sys.getsizeof(e) for e in encoded)
+
+def test_fields_outside_the_schema_are_kept():
+    store = EventStore("server_logs", capacity=5)
+    event = make_event(1, server="db-core-1", status="resolved", attempts=3, note={"by": "warden"})
+    store.append(event)
+    # "event" is missing from this event, so it stays missing when read back
+    assert store.latest() == [event]
+
+def test_memory_budget_evicts_oldest_first():
+    store = EventStore("network", capacity=10000, memory_budget=20000)
+    logs = generate_network_logs(2000, seed=3).to_dicts()
+    for log in logs:
+        store.append(log)
+    assert store.bytes_used <= 20000
+    assert 0 < len(store) < 2000
+    assert store.last_seq == 2000
+    assert store.since_seq(0)[0] == logs[-len(store):]
+
+def test_bytes_used_shrinks_on_eviction():
+    store = EventStore("server_logs", capacity=3)
+    store.extend([make_event(i, server="db-core-1", event="x", attempts=1, status="resolved") for i in range(3)])
+    full = store.bytes_used
+    store.extend([make_event(i, server="db-core-1", event="x", attempts=1, status="resolved") for i in range(3, 10)])
+    assert store.bytes_used == full
+    assert store.stats()["events"] == 3
+
+def test_dictionaries_only_hold_retained_values():
+    store = EventStore("network", capacity=10 * BLOCK_ROWS, memory_budget=200000, retention=3600)
+    start = 1746014400
+    for i in range(20000):
+        store.append({"timestamp": start + i // 10, "details": f"detail {i}", "protocol": "TCP"})
+    # Evicting events frees their values, so the budget is not spent on dead ones
+    assert store.bytes_used <= 200000
+    assert len(store) > 500
+    details = store._dictionaries[list(store.schema).index("details")]
+    assert len(details.codes) == len(store)
+    assert len(details.values) < 2 * len(store)  # codes are reused
+    assert store.latest(1)[0]["details"] == "detail 19999"
+    # Dropping whole blocks releases their values too
+    store.append({"timestamp": start + 10 ** 6, "details": "last"})
+    assert len(store) == 1
+    assert details.codes == {"last": details.codes["last"]}
+
+def test_eviction_across_blocks():
+    store = EventStore("network", capacity=BLOCK_ROWS + 10)
+    store.extend([make_event(i % 60, n=i) for i in range(3 * BLOCK_ROWS)])
+    assert len(store) == BLOCK_ROWS + 10
+    assert store.latest(1)[0]["n"] == 3 * BLOCK_ROWS - 1
+    events, _, _ = store.since_seq(0)
+    assert events[0]["n"] == 2 * BLOCK_ROWS - 10
+
+def test_retention_expires_old_events():
+    store = EventStore("server_logs", capacity=10, retention=30)
+    store.extend([make_event(i, attempts=i) for i in range(0, 60, 10)])
+    # the newest event is at :50, so :10 and older have expired
+    assert [e["attempts"] for e in store.since_seq(0)[0]] == [20, 30, 40, 50]
+    assert store.since_seq(0)[2] is True
+
+def test_a_future_event_does_not_expire_the_others():
+    store = EventStore("server_logs", capacity=100, retention=3600)
+    now = time.time()
+    store.extend([{"timestamp": now - 60 + i, "attempts": i} for i in range(50)])
+    store.append({"timestamp": now + 100 * 365 * 86400, "attempts": -1})
+    assert len(store) == 51
+
+def test_retention_drops_whole_blocks():
+    store = EventStore("server_logs", capacity=10 * BLOCK_ROWS, retention=60)
+    start = 1746014400
+    store.extend([{"timestamp": start + i // 100, "attempts": i} for i in range(3 * BLOCK_ROWS)])
+    store.append({"timestamp": start + 3600, "attempts": -1})
+    assert len(store) == 1
+    fresh = EventStore("server_logs")
+    fresh.append({"timestamp": start + 3600, "attempts": -1})
+    assert store.bytes_used == fresh.bytes_used
+    assert store.encoded_bytes == fresh.encoded_bytes
+
+def test_an_unstorable_event_leaves_the_store_unchanged():
+    store = EventStore("server_logs", capacity=10)
+    store.append(make_event(1, server="db-core-1", attempts=1))
+    with pytest.raises(OverflowError):
+        store.append(make_event(2, server="web-1", attempts=2 ** 63))
+    with pytest.raises(ValueError):
+        store.append(make_event(2, server="web-1", attempts="many"))
+    block = store._blocks[-1]
+    assert {len(column) for column in block.columns} == {len(block.keys)} == {1}
+    assert "web-1" not in store._dictionaries[list(store.schema).index("server")].codes
+    store.append(make_event(3, server="web-1", attempts=-2 ** 63))
+    assert [e["attempts"] for e in store.since_seq(0)[0]] == [1, -2 ** 63]
+
+def test_ip_conversion():
+    assert int_to_ip(ip_to_int("10.0.0.5")) == "10.0.0.5"
+    assert ip_to_int("255.255.255.255") == 0xFFFFFFFF
+    with pytest.raises(ValueError):
+        ip_to_int("10.0.0.256")
+
+def test_snapshot_serves_recent_reads():
+    store = EventStore("server_logs", capacity=1000)
+    assert store.snapshot().tail == ()
+    store.extend([{"timestamp": f"2025-04-30T12:00:{i % 60:02d}Z", "attempts": i} for i in range(300)])
+    snapshot = store.snapshot()
+    assert snapshot.last_seq == 300 and snapshot.size == 300
+    assert len(snapshot.tail) == SNAPSHOT_ROWS
+    assert snapshot.version == store.version
+    # Served from the snapshot, and the same as the locked read path
+    assert store.tail(50, raw=True) == ([store._encoded(299 - i) for i in range(50)], 300)
+    events, cursor, truncated = store.since_seq(290, raw=True)
+    assert [json.loads(e)["attempts"] for e in events] == list(range(290, 300))
+    assert (cursor, truncated) == (300, False)
+    assert store.since_seq(290, limit=3, raw=True)[1] == 293
+    # Older cursors fall back to the locked path
+    assert len(store.since_seq(10, raw=True)[0]) == 290
+
+def test_snapshot_follows_evictions_and_clear():
+    store = EventStore("server_logs", capacity=5)
+    store.extend([{"timestamp": "2025-04-30T12:00:00Z", "attempts": i} for i in range(8)])
+    assert [json.loads(e)["attempts"] for e in store.snapshot().tail] == [7, 6, 5, 4, 3]
+    version = store.version
+    store.clear()
+    assert store.snapshot().tail == ()
+    assert store.version != version
+    assert store.tail(10, raw=True) == ([], 8)
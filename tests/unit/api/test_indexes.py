@@ -0,0 +1,159 @@
+import pytest
+from app import create_app
+from app.api.event_store import EventStore, format_timestamp
+from app.api.indexes import CidrIndex, FieldIndex, Postings, intersect, parse_cidr
+from app.api.schemas import INT
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def access(i, scanner_id, user_id, location, result="granted"):
+    return {"scanner_id": scanner_id, "user_id": user_id, "access_result": result,
+            "reason": "successful authentication", "location": location,
+            "timestamp": format_timestamp(START + i)}
+
+def postings(*seqs):
+    p = Postings()
+    p.seqs.extend(seqs)
+    return p
+
+def test_intersect_walks_newest_first():
+    assert intersect([[postings(1, 2, 3, 5, 8)], [postings(2, 3, 8, 9)]]) == [8, 3, 2]
+    # a term is a union of posting lists
+    assert intersect([[postings(1, 4), postings(2, 6)], [postings(1, 2, 3, 4, 5)]]) == [4, 2, 1]
+    assert intersect([[postings(1, 2)], []]) == []
+    assert intersect([]) == []
+
+@pytest.fixture
+def store():
+    store = EventStore("biometric_access", capacity=100)
+    for field in ("scanner_id", "user_id", "location"):
+        store.add_index(field, FieldIndex(field))
+    store.extend([
+        access(0, "biometric-1A", "warden", "armory"),
+        access(1, "biometric-2F", "warden", "yard"),
+        access(2, "biometric-2F", "staff-001", "armory", "denied"),
+        access(3, "biometric-2F", "warden", "armory"),
+    ])
+    return store
+
+def test_equality_and_combined_filters(store):
+    events, total = store.search({"scanner_id": ["biometric-2F"]})
+    assert total == 3
+    assert [e["timestamp"] for e in events] == [format_timestamp(START + i) for i in (3, 2, 1)]
+    events, total = store.search({"scanner_id": ["biometric-2F"], "user_id": ["warden"], "location": ["armory"]})
+    assert total == 1 and events[0]["timestamp"] == format_timestamp(START + 3)
+    assert store.search({"location": ["armory", "yard"], "user_id": ["warden"]})[1] == 3
+    assert store.search({"location": ["lab wing"]}) == ([], 0)
+
+def test_indexes_follow_evictions():
+    store = EventStore("biometric_access", capacity=3)
+    index = FieldIndex("user_id")
+    store.add_index("user_id", index)
+    store.extend([access(i, "biometric-1A", "warden" if i < 2 else "visitor-123", "yard") for i in range(5)])
+    assert store.search({"user_id": ["warden"]}) == ([], 0)
+    assert store.search({"user_id": ["visitor-123"]})[1] == 3
+    assert index.stats() == {"events": 3, "keys": 1, "postings": 3}
+
+def test_int_fields_are_parsed():
+    index = FieldIndex("port", INT)
+    assert index.parse("22") == 22
+    with pytest.raises(ValueError):
+        index.parse("ssh")
+
+def flow(i, source_ip, destination_ip, port=443, action="allowed"):
+    return {"source_ip": source_ip, "destination_ip": destination_ip, "protocol": "TCP", "port": port,
+            "action": action, "threat_level": "low", "timestamp": format_timestamp(START + i)}
+
+def test_parse_cidr():
+    assert parse_cidr("10.0.0.0/8") == (0x0A000000, 0x0AFFFFFF)
+    assert parse_cidr("192.168.1.77/24") == (0xC0A80100, 0xC0A801FF)
+    assert parse_cidr("10.0.0.5") == (0x0A000005, 0x0A000005)
+    assert parse_cidr("0.0.0.0/0") == (0, 0xFFFFFFFF)
+    for value in ("10.0.0.0/33", "10.0.0/8", "10.0.0.0/x", "host"):
+        with pytest.raises(ValueError):
+            parse_cidr(value)
+
+@pytest.fixture
+def network():
+    store = EventStore("network", capacity=100)
+    store.add_index("source_ip", CidrIndex("source_ip"))
+    store.add_index("port", FieldIndex("port", INT))
+    store.extend([
+        flow(0, "10.0.0.5", "172.16.0.1", 3306),
+        flow(1, "10.200.7.9", "172.16.0.1", 22),
+        flow(2, "10.0.1.20", "172.16.0.2", 3306),
+        flow(3, "11.0.0.1", "172.16.0.2", 3306),
+        flow(4, "9.255.255.255", "172.16.0.3", 3306),
+    ])
+    return store
+
+def test_cidr_ranges(network):
+    def sources(ranges):
+        return [e["source_ip"] for e in network.search({"source_ip": [parse_cidr(r) for r in ranges]})[0]]
+    assert sources(["10.0.0.0/8"]) == ["10.0.1.20", "10.200.7.9", "10.0.0.5"]
+    assert sources(["10.0.0.0/24"]) == ["10.0.0.5"]
+    assert sources(["10.0.0.0/23", "11.0.0.0/16"]) == ["11.0.0.1", "10.0.1.20", "10.0.0.5"]
+    assert sources(["0.0.0.0/0"]) == ["9.255.255.255", "11.0.0.1", "10.0.1.20", "10.200.7.9", "10.0.0.5"]
+    assert sources(["10.0.0.5"]) == ["10.0.0.5"]
+
+def test_cidr_with_port(network):
+    events, total = network.search({"source_ip": [parse_cidr("10.0.0.0/8")], "port": [3306]})
+    assert total == 2
+    assert [e["source_ip"] for e in events] == ["10.0.1.20", "10.0.0.5"]
+
+def test_cidr_index_follows_evictions():
+    store = EventStore("network", capacity=2000)
+    index = CidrIndex("source_ip")
+    store.add_index("source_ip", index)
+    store.extend([flow(i, f"10.0.{i // 256 % 4}.{i % 256}", "172.16.0.1") for i in range(5000)])
+    assert store.search({"source_ip": [parse_cidr("10.0.0.0/8")]})[1] == 2000
+    assert store.search({"source_ip": [parse_cidr("10.0.3.0/24")]})[1] == sum(1 for i in range(3000, 5000) if i // 256 % 4 == 3)
+    assert index.stats() == {"events": 2000, "keys": 1, "postings": 2000}
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0})
+    app.config['TESTING'] = True
+    store = app.extensions['event_stores']['biometric_access']
+    store.extend([
+        access(0, "biometric-1A", "warden", "armory"),
+        access(1, "biometric-2F", "warden", "yard"),
+        access(2, "biometric-2F", "staff-001", "armory", "denied"),
+    ])
+    with app.test_client() as client:
+        yield client
+
+def test_field_filters_on_category_endpoint(client):
+    body = client.get('/api/biometric-access/?scanner_id=biometric-2F&access_result=denied').get_json()
+    assert body["total"] == 1
+    assert body["logs"][0]["user_id"] == "staff-001"
+    body = client.get('/api/biometric-access/?location=armory&location=yard&limit=1').get_json()
+    assert body["total"] == 3 and len(body["logs"]) == 1
+    assert client.get('/api/network-monitoring/?port=ssh').status_code == 400
+
+def test_field_filters_with_text_query(client):
+    store = client.application.extensions['event_stores']['inmate_threats']
+    store.extend([
+        {"inmate_id": inmate, "name": "Edward Nigma", "threat_level": "high", "last_known_location": "yard",
+         "incident_flag": flag, "recommendation": "isolation", "timestamp": format_timestamp(START + i)}
+        for i, (inmate, flag) in enumerate([("ARK-099", "contraband possession"), ("ARK-001", "contraband possession"),
+                                            ("ARK-099", "attempted escape")])
+    ])
+    body = client.get('/api/inmate-threats/?inmate_id=ARK-099&q=contraband').get_json()
+    assert body["total"] == 1
+    assert body["logs"][0]["incident_flag"] == "contraband possession"
+
+def test_network_address_filters(client):
+    store = client.application.extensions['event_stores']['network']
+    store.extend([
+        flow(0, "10.0.0.5", "172.16.0.1", 3306, "blocked"),
+        flow(1, "10.0.0.6", "172.16.0.1", 3306),
+        flow(2, "192.168.0.1", "172.16.0.9", 3306, "blocked"),
+    ])
+    body = client.get('/api/network-monitoring/?src_cidr=10.0.0.0/8&port=3306&action=blocked').get_json()
+    assert body["total"] == 1 and body["logs"][0]["source_ip"] == "10.0.0.5"
+    assert client.get('/api/network-monitoring/?destination_ip=172.16.0.9').get_json()["total"] == 1
+    assert client.get('/api/network-monitoring/?dst_cidr=172.16.0.0/16&src_cidr=10.0.0.6').get_json()["total"] == 1
+    response = client.get('/api/network-monitoring/?src_cidr=10.0.0.0/99')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "invalid CIDR range: 10.0.0.0/99"}
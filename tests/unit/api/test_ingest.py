@@ -0,0 +1,111 @@
+import gzip
+import json
+import pytest
+from app import create_app
+from app.api.event_store import format_timestamp
+from app.api.ingest import MAX_LINE_BYTES, validate
+from app.api.writer import EventWriter
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def access(i, user_id="warden"):
+    return {"scanner_id": "biometric-2F", "user_id": user_id, "access_result": "granted",
+            "reason": "successful authentication", "location": "armory",
+            "timestamp": format_timestamp(START + i)}
+
+def ndjson(events):
+    return b''.join(json.dumps(event).encode() + b'\n' for event in events)
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0, 'EVENT_STORE_CAPACITY': 5000})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+def test_validate_against_schema():
+    assert validate("biometric_access", access(0)) is None
+    assert validate("biometric_access", [1]) == "event must be a JSON object"
+    assert validate("biometric_access", {**access(0), "extra": 1}) == "unknown field: extra"
+    event = access(0)
+    del event["location"]
+    assert validate("biometric_access", event) == "missing field: location"
+    assert validate("network", {"source_ip": "10.0.0.1", "destination_ip": "10.0.0.300", "protocol": "TCP", "port": 22,
+                                "action": "blocked", "threat_level": "high", "timestamp": format_timestamp(START)}) \
+        == "invalid ip value for destination_ip"
+    assert validate("network", {"source_ip": "10.0.0.1", "destination_ip": "10.0.0.3", "protocol": "TCP", "port": "22",
+                                "action": "blocked", "threat_level": "high", "timestamp": format_timestamp(START)}) \
+        == "invalid int value for port"
+    assert validate("network", {"source_ip": "10.0.0.1", "destination_ip": "10.0.0.3", "protocol": "TCP", "port": 2 ** 63,
+                                "action": "blocked", "threat_level": "high", "timestamp": format_timestamp(START)}) \
+        == "invalid int value for port"
+    assert validate("biometric_access", {**access(0), "timestamp": "yesterday"}) == "invalid timestamp value for timestamp"
+    future = {**access(0), "timestamp": format_timestamp(START + 3600)}
+    assert validate("biometric_access", future, now=START) == "timestamp is more than 300 seconds in the future"
+    assert validate("biometric_access", {**access(0), "timestamp": format_timestamp(START + 60)}, now=START) is None
+
+def test_gzip_ndjson_batch_is_stored(app, client):
+    events = [access(i) for i in range(2500)]
+    response = client.post('/api/ingest/biometric_access', data=gzip.compress(ndjson(events)),
+                           headers={'Content-Encoding': 'gzip', 'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.get_json() == {"accepted": 2500, "rejected": 0, "errors": []}
+    assert app.extensions['event_writer'].flush(timeout=5)
+    store = app.extensions['event_stores']['biometric_access']
+    assert len(store) == 2500
+    assert store.latest(1)[0] == events[-1]
+    stats = client.get('/api/ingest/stats').get_json()
+    assert stats["writer"]["events"] == 2500
+    assert stats["writer"]["queue_depth"] == 0
+    stats = stats["categories"]["biometric_access"]
+    assert stats["requests"] == 1
+    assert stats["accepted"] == 2500
+    assert stats["bytes_decoded"] == len(ndjson(events))
+    assert stats["events_per_second"] > 0
+
+def test_invalid_lines_are_reported_and_skipped(app, client):
+    body = ndjson([access(0)]) + b'{not json\n\n' + ndjson([{**access(1), "user_id": 7}, access(2)])
+    body = client.post('/api/ingest/biometric_access', data=body).get_json()
+    assert body["accepted"] == 2
+    assert body["rejected"] == 2
+    assert body["errors"] == [{"line": 2, "error": "invalid JSON"},
+                              {"line": 4, "error": "invalid enum value for user_id"}]
+
+def test_broken_bodies_are_rejected(client):
+    compressed = gzip.compress(ndjson([access(i) for i in range(100)]))
+    response = client.post('/api/ingest/biometric_access', data=compressed[:len(compressed) // 2],
+                           headers={'Content-Encoding': 'gzip'})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "truncated gzip body"
+    response = client.post('/api/ingest/biometric_access', data=b'x' * (MAX_LINE_BYTES * 2))
+    assert response.status_code == 400
+    assert client.post('/api/ingest/biometric_access', data=b'garbage', headers={'Content-Encoding': 'gzip'}).status_code == 400
+    assert client.post('/api/ingest/biometric_access', data=b'', headers={'Content-Encoding': 'br'}).status_code == 415
+    assert client.post('/api/ingest/nope', data=b'').status_code == 404
+
+def test_full_queue_gets_429(app, client):
+    # A writer that is never started, so nothing drains its queue
+    writer = app.extensions['event_writer'] = EventWriter(app.extensions['event_stores'], capacity=1500)
+    app.config['INGEST_QUEUE_TIMEOUT'] = 0.01
+    response = client.post('/api/ingest/biometric_access', data=ndjson([access(i) for i in range(2500)]))
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()["accepted"] == 1000
+    # Refused up front once the queue is full
+    writer.submit('biometric_access', [access(0)] * 500)
+    response = client.post('/api/ingest/biometric_access', data=ndjson([access(0)]))
+    assert response.status_code == 429
+    assert response.get_json() == {"error": "ingest queue is full, retry later"}
+    assert client.get('/api/ingest/stats').get_json()["categories"]["biometric_access"]["throttled"] == 2
+
+def test_ingest_token():
+    app = create_app({'SAMPLE_PRODUCER': False, 'INGEST_TOKEN': 's3cret'})
+    with app.test_client() as client:
+        data = ndjson([access(0)])
+        assert client.post('/api/ingest/biometric_access', data=data).status_code == 401
+        response = client.post('/api/ingest/biometric_access', data=data, headers={'Authorization': 'Bearer s3cret'})
+        assert response.status_code == 200
@@ -0,0 +1,42 @@
+import pytest
+from app import create_app
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_list_response_carries_cursor_header(client):
+    response = client.get('/api/network-monitoring/')
+    assert response.status_code == 200
+    assert response.headers['X-Event-Cursor'] == '50'
+
+def test_after_cursor_returns_only_new_logs(client):
+    store = client.application.extensions['event_stores']['network']
+    response = client.get('/api/network-monitoring/?after=50')
+    assert response.get_json() == {"logs": [], "cursor": 50, "truncated": False}
+
+    log = dict(store.latest(1)[0])
+    store.append(log)
+    data = client.get('/api/network-monitoring/?after=50').get_json()
+    assert data["logs"] == [log]
+    assert data["cursor"] == 51
+
+def test_after_cursor_with_limit(client):
+    data = client.get('/api/server-logs/?after=0&limit=10').get_json()
+    assert len(data["logs"]) == 10
+    assert data["cursor"] == 10
+
+def test_since_timestamp_cursor(client):
+    data = client.get('/api/internal-comms/?since=1970-01-01T00:00:00Z').get_json()
+    assert len(data["logs"]) == 50
+    assert data["cursor"] == 50
+    assert data["truncated"] is False
+
+@pytest.mark.parametrize("query", ["after=abc", "after=-1", "since=yesterday", "after=1&limit=-5"])
+def test_invalid_cursor_is_rejected(client, query):
+    response = client.get(f'/api/biometric-access/?{query}')
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,104 @@
+import pytest
+from app import create_app
+from app.api.event_store import EventStore, format_timestamp
+from app.api.rollups import Rollups, parse_range
+
+NOW = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def event(offset, **fields):
+    return dict(fields, timestamp=format_timestamp(NOW + offset))
+
+@pytest.fixture
+def rollups():
+    rollups = Rollups()
+    store = EventStore("network", capacity=100)
+    rollups.attach({"network": store})
+    store.extend([
+        event(-5, threat_level="low", action="allowed"),
+        event(-4, threat_level="critical", action="blocked"),
+        event(-125, threat_level="low", action="allowed"),
+        event(-4000, threat_level="high", action="blocked"),
+    ])
+    return rollups
+
+def test_parse_range():
+    assert parse_range("30s") == 30
+    assert parse_range("10m") == 600
+    assert parse_range("24h") == 86400
+    for value in ("", "0m", "10", "5d", "-1h"):
+        with pytest.raises(ValueError):
+            parse_range(value)
+
+def test_summary_counts_the_range(rollups):
+    summary = rollups.summary(60, now=NOW)
+    assert summary["resolution"] == "10s"
+    assert summary["totals"]["network"] == {
+        "events": 2,
+        "threat_level": {"low": 1, "critical": 1},
+        "action": {"allowed": 1, "blocked": 1},
+    }
+    assert summary["totals"]["server_logs"] == {"events": 0}
+    assert [b["counts"] for b in summary["buckets"]] == [{"network": 2}]
+
+def test_longer_ranges_use_coarser_buckets(rollups):
+    summary = rollups.summary(3600, now=NOW)
+    assert summary["resolution"] == "10s"
+    assert summary["totals"]["network"]["events"] == 3
+    day = rollups.summary(86400, now=NOW)
+    assert day["resolution"] == "1m"
+    assert day["totals"]["network"]["events"] == 4
+    quarter = rollups.summary(90 * 86400, now=NOW)
+    assert quarter["resolution"] == "1h"
+    assert quarter["totals"]["network"]["threat_level"] == {"low": 2, "critical": 1, "high": 1}
+
+def test_tiers_memory_stays_flat():
+    rollups = Rollups()
+    store = EventStore("network", capacity=10)
+    rollups.attach({"network": store})
+
+    def run_for(days, start):
+        # one event every 30 minutes
+        for minute in range(0, days * 24 * 60, 30):
+            store.append(event(start + minute * 60, threat_level="low", action="allowed"))
+
+    run_for(100, 0)
+    after_100_days = rollups.stats()
+    run_for(100, 100 * 86400)
+    assert rollups.stats() == after_100_days
+    # events older than the 1 hour tier are gone from it, the 90 day tier still counts them
+    now = NOW + 200 * 86400  # 30 minutes after the last event
+    assert rollups.summary(3600, now=now)["totals"]["network"]["events"] == 1
+    # the hour now is in has no events yet
+    assert rollups.summary(90 * 86400, now=now)["totals"]["network"]["events"] == (90 * 24 - 1) * 2
+
+def test_values_past_the_limit_are_counted_together():
+    rollups = Rollups(max_values=2)
+    store = EventStore("network", capacity=10)
+    rollups.attach({"network": store})
+    store.extend([event(-1, threat_level=f"level-{i}", action="allowed") for i in range(1000)])
+    totals = rollups.summary(60, now=NOW)["totals"]["network"]
+    assert totals["threat_level"] == {"level-0": 1, "level-1": 1, "(other)": 998}
+    assert totals["action"] == {"allowed": 1000}
+    # The key table, and so every bucket, stays small
+    assert len(rollups._keys) == 5
+
+def test_old_buckets_fall_out_of_the_range(rollups):
+    store = EventStore("network", capacity=10)
+    rollups.attach({"network": store})
+    store.append(event(600, threat_level="medium"))
+    summary = rollups.summary(600, now=NOW + 600)
+    # the events of ten minutes ago fell out of the 10 second ring
+    assert summary["totals"]["network"]["events"] == 1
+
+def test_summary_endpoint():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    with app.test_client() as client:
+        response = client.get('/api/summary/?range=10m')
+        body = response.get_json()
+        assert body["resolution"] == "10s"
+        # the backfilled events are counted
+        assert body["totals"]["biometric_access"]["events"] == 50
+        assert sum(body["totals"]["biometric_access"]["access_result"].values()) == 50
+        cached = client.get('/api/summary/?range=10m', headers={'If-None-Match': response.headers['ETag']})
+        assert cached.status_code == 304
+        assert client.get('/api/summary/?range=forever').status_code == 400
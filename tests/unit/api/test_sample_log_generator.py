@@ -0,0 +1,71 @@
+import datetime
+import pytest
+from app.api import sample_log_generator as generator
+from app.api.sample_log_generator import Distribution, LogBatch
+
+CATEGORIES = ["network", "server", "video_surveillance", "biometric_access",
+              "physical_security", "internal_comms", "inmate_threat"]
+
+NOW = datetime.datetime(2025, 4, 30, 12, 0, 0, tzinfo=datetime.timezone.utc)
+
+@pytest.mark.parametrize("name", CATEGORIES)
+def test_bulk_logs_have_the_per_record_keys(name):
+    single = getattr(generator, f"generate_{name}_log")
+    bulk = getattr(generator, f"generate_{name}_logs")
+    batch = bulk(500, seed=1)
+    assert len(batch) == 500
+    base_keys = set(single().keys()) - {"details"}
+    for log in batch:
+        assert base_keys <= set(log.keys())
+
+@pytest.mark.parametrize("name", CATEGORIES)
+def test_bulk_generation_is_deterministic_for_a_seed(name):
+    bulk = getattr(generator, f"generate_{name}_logs")
+    assert bulk(200, seed=7, now=NOW).to_dicts() == bulk(200, seed=7, now=NOW).to_dicts()
+    assert bulk(200, seed=7, now=NOW).to_dicts() != bulk(200, seed=8, now=NOW).to_dicts()
+
+def test_bulk_timestamps_within_ten_seconds():
+    batch = generator.generate_server_logs(1000, seed=1, now=NOW)
+    allowed = {(NOW - datetime.timedelta(seconds=s)).isoformat() + 'Z' for s in range(11)}
+    assert set(batch.columns["timestamp"]) <= allowed
+
+def test_bulk_network_conditional_rules():
+    for log in generator.generate_network_logs(5000, seed=3):
+        if log["threat_level"] in ("high", "critical"):
+            assert log["action"] == "blocked"
+            assert log["destination_ip"] in ("192.168.1.1", "10.0.0.5", "172.16.0.10")
+        if log["threat_level"] == "critical":
+            assert log["protocol"] in ("TCP", "UDP")
+            assert log["port"] in (22, 443, 3306)
+        if "details" in log:
+            assert log["threat_level"] == "critical"
+            assert log["protocol"] == "TCP"
+            assert log["port"] in (22, 443)
+    details = generator.generate_network_logs(5000, seed=3).columns["details"]
+    assert any(d is not None for d in details)
+
+def test_bulk_internal_comms_overrides():
+    for log in generator.generate_internal_comms_logs(2000, seed=4):
+        assert isinstance(log["recipients"], list)
+        if log["type"] == "security breach":
+            assert log["recipients"] == ["security_team", "warden"]
+            assert log["sent_by"] == "automated-system"
+        elif log["type"] == "lockdown alert":
+            assert log["recipients"] == ["security_team", "admin_office", "all_personnel"]
+        else:
+            assert 1 <= len(log["recipients"]) <= 3
+            assert len(set(log["recipients"])) == len(log["recipients"])
+
+def test_bulk_inmate_names_match_ids():
+    ids, names = generator.arkham_data["inmate_ids"], generator.arkham_data["inmate_names"]
+    for log in generator.generate_inmate_threat_logs(500, seed=5):
+        assert names[ids.index(log["inmate_id"])] == log["name"]
+
+def test_distribution_collapses_weighted_lists():
+    dist = Distribution(["low"] * 10 + ["medium"] * 5 + ["high"])
+    assert dist.values == ["low", "medium", "high"]
+    assert dist.cum_weights == [10, 15, 16]
+
+def test_log_batch_omits_missing_optional_fields():
+    batch = LogBatch(["a", "b"], {"a": [1, 2], "b": [None, 3]}, optional=("b",))
+    assert batch.to_dicts() == [{"a": 1}, {"a": 2, "b": 3}]
@@ -0,0 +1,201 @@
+import json
+import os
+import pytest
+from app import create_app
+from app.api.event_store import EventStore, format_timestamp
+from app.api.segment_log import LogLocked, SegmentLog, RECORD_HEADER
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def record(i, key=None):
+    return (START + i if key is None else key), json.dumps({"n": i}).encode()
+
+def numbers(payloads):
+    return [json.loads(p)["n"] for p in payloads]
+
+def test_append_and_read_range(tmp_path):
+    log = SegmentLog(str(tmp_path), index_interval=64)
+    log.extend(record(i) for i in range(100))
+    assert numbers(log.read(START + 10, START + 14)[0]) == [10, 11, 12, 13, 14]
+    payloads, truncated = log.read(START + 90, limit=5)
+    assert numbers(payloads) == [90, 91, 92, 93, 94]
+    assert truncated is True
+    assert numbers(log.read()[0]) == list(range(100))
+
+def test_segments_roll_by_size_and_time(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_bytes=1000, index_interval=100)
+    log.extend(record(i) for i in range(200))
+    assert log.stats()["segments"] > 5
+    assert numbers(log.read(START + 150, START + 152)[0]) == [150, 151, 152]
+    log.close()
+
+    by_time = SegmentLog(str(tmp_path / "time"), segment_seconds=60)
+    by_time.extend(record(i * 10) for i in range(30))
+    assert by_time.stats()["segments"] == 5
+    by_time.close()
+
+def test_late_records_keep_keys_monotonic(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    log.extend([record(5), record(6, key=START), record(7)])
+    assert numbers(log.read(START + 5, START + 5)[0]) == [5, 6]
+
+def test_reopen_uses_sealed_indexes(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_bytes=2000)
+    log.extend(record(i) for i in range(300))
+    log.close()
+    assert any(name.endswith('.idx') for name in os.listdir(tmp_path))
+    reopened = SegmentLog(str(tmp_path), segment_bytes=2000)
+    assert numbers(reopened.read(START + 200, START + 202)[0]) == [200, 201, 202]
+    assert reopened.last_key == START + 299
+    reopened.extend([record(300)])
+    assert numbers(reopened.read(START + 299)[0]) == [299, 300]
+
+def test_corrupt_tail_is_truncated_on_open(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    log.extend(record(i) for i in range(10))
+    log.close()
+    path = os.path.join(tmp_path, "00000001.log")
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        # a torn write: a header promising more bytes than were written
+        f.write(RECORD_HEADER.pack(500, 0, START + 10) + b'{"n": 1')
+    reopened = SegmentLog(str(tmp_path))
+    assert os.path.getsize(path) == size
+    assert numbers(reopened.read()[0]) == list(range(10))
+    reopened.extend([record(10)])
+    assert numbers(reopened.read(START + 9)[0]) == [9, 10]
+
+def test_flipped_byte_is_detected(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    log.extend(record(i) for i in range(10))
+    log.close()
+    path = os.path.join(tmp_path, "00000001.log")
+    with open(path, "r+b") as f:
+        f.seek(os.path.getsize(path) - 3)
+        f.write(b"X")
+    assert numbers(SegmentLog(str(tmp_path)).read()[0]) == list(range(9))
+
+def test_sealed_segments_are_deleted_past_the_limits(tmp_path):
+    by_size = SegmentLog(str(tmp_path / "size"), segment_bytes=1000, max_bytes=5000)
+    by_size.extend(record(i) for i in range(500))
+    stats = by_size.stats()
+    assert stats["bytes"] <= 5000 + 1000
+    assert stats["first_key"] > START
+    assert numbers(by_size.read(START + 499)[0]) == [499]
+    assert len([name for name in os.listdir(tmp_path / "size") if name.endswith('.log')]) == stats["segments"]
+
+    by_age = SegmentLog(str(tmp_path / "age"), segment_seconds=60, max_age=300)
+    by_age.extend(record(i * 10) for i in range(100))
+    # Deleted when a segment is sealed, so the log reaches back max_age and at most two segments more
+    assert START + 990 - 300 - 2 * 60 <= by_age.stats()["first_key"] <= START + 990 - 300
+
+def test_a_log_is_written_by_one_process_only(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    with pytest.raises(LogLocked):
+        SegmentLog(str(tmp_path))
+    log.close()
+    SegmentLog(str(tmp_path)).close()
+
+    config = {'SAMPLE_PRODUCER': False, 'EVENT_LOG_DIR': str(tmp_path), 'EVENT_STORE_BACKFILL': 0}
+    app = create_app(config)
+    # A second app (another worker of the same server) keeps no log of its own
+    assert 'event_logs' not in create_app(config).extensions
+    app.extensions['event_log_flusher'].stop()
+
+def test_read_only_logs_follow_the_writer(tmp_path):
+    writer = SegmentLog(str(tmp_path), segment_bytes=1000, max_bytes=5000)
+    writer.extend(record(i) for i in range(10))
+    writer.flush()
+    reader = SegmentLog(str(tmp_path), read_only=True)
+    assert numbers(reader.read()[0]) == list(range(10))
+    # Buffered records are seen once written, sealed and deleted segments are followed
+    writer.extend(record(i) for i in range(10, 300))
+    writer.flush()
+    assert numbers(reader.read(START + 297)[0]) == [297, 298, 299]
+    assert reader.stats()["segments"] == writer.stats()["segments"]
+    assert numbers(reader.read()[0]) == numbers(writer.read()[0])
+    with pytest.raises(ValueError):
+        reader.extend([record(300)])
+
+    # A record being written is not read, nor truncated away
+    path = writer.active.path
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(500, 0, START + 300))
+    size = os.path.getsize(path)
+    assert numbers(reader.read(START + 299)[0]) == [299]
+    assert os.path.getsize(path) == size
+    reader.close()
+
+def test_invalid_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentLog(str(tmp_path), fsync="sometimes")
+
+def test_store_history_survives_restart(tmp_path):
+    config = {'SAMPLE_PRODUCER': False, 'EVENT_LOG_DIR': str(tmp_path), 'EVENT_STORE_BACKFILL': 20}
+    app = create_app(config)
+    store = app.extensions['event_stores']['server_logs']
+    logged = store.latest()
+    app.extensions['event_log_flusher'].stop()
+    for log in app.extensions['event_logs'].values():
+        log.close()
+
+    restarted = create_app(config)
+    restored = restarted.extensions['event_stores']['server_logs']
+    assert restored.latest() == logged
+    # nothing was backfilled on top of the restored history
+    assert len(restored) == 20
+    restarted.extensions['event_log_flusher'].stop()
+
+def test_time_range_query_reads_the_log(tmp_path):
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_LOG_DIR': str(tmp_path), 'EVENT_STORE_BACKFILL': 0})
+    store = app.extensions['event_stores']['server_logs']
+    store.extend([{"timestamp": format_timestamp(START + i), "attempts": i} for i in range(30)])
+    store.clear()  # only the log has them now
+    with app.test_client() as client:
+        query = {'from': format_timestamp(START + 10), 'to': format_timestamp(START + 12)}
+        body = client.get('/api/server-logs/', query_string=query).get_json()
+        assert [log["attempts"] for log in body["logs"]] == [10, 11, 12]
+        assert body["truncated"] is False
+    app.extensions['event_log_flusher'].stop()
+
+def test_time_range_etag_follows_the_log(tmp_path):
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_LOG_DIR': str(tmp_path), 'EVENT_STORE_BACKFILL': 0})
+    store = app.extensions['event_stores']['server_logs']
+    log = app.extensions['event_logs']['server_logs']
+    store.extend([{"timestamp": format_timestamp(START + i), "attempts": i} for i in range(10)])
+    with app.test_client() as client:
+        query = {'from': format_timestamp(START)}
+        etag = client.get('/api/server-logs/', query_string=query).headers['ETag']
+        assert client.get('/api/server-logs/', query_string=query, headers={'If-None-Match': etag}).status_code == 304
+        # The log moves on without the store, as a worker's read-only log does
+        log.extend([(START + 10, b'{"attempts":10}')])
+        response = client.get('/api/server-logs/', query_string=query, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert len(response.get_json()["logs"]) == 11
+    app.extensions['event_log_flusher'].stop()
+
+    reader = SegmentLog(str(tmp_path / 'server_logs'), read_only=True)
+    version = reader.version()
+    log.extend([(START + 11, b'{"attempts":11}')])
+    assert reader.version() == version
+    log.flush()
+    assert reader.version() != version
+    reader.close()
+
+def test_time_range_query_without_log():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0})
+    store = app.extensions['event_stores']['server_logs']
+    store.extend([{"timestamp": format_timestamp(START + i), "attempts": i} for i in range(30)])
+    with app.test_client() as client:
+        body = client.get('/api/server-logs/', query_string={'from': format_timestamp(START + 25), 'limit': 2}).get_json()
+        assert [log["attempts"] for log in body["logs"]] == [25, 26]
+        assert body["truncated"] is True
+        assert client.get('/api/server-logs/?from=yesterday').status_code == 400
+        assert client.get('/api/server-logs/?to=2025-04-30T12:00:00Z&limit=5000').status_code == 400
+
+def test_store_between():
+    store = EventStore("server_logs", capacity=100)
+    store.extend([{"timestamp": format_timestamp(START + i), "attempts": i} for i in range(10)])
+    events, truncated = store.between(START + 3, START + 5)
+    assert [e["attempts"] for e in events] == [3, 4, 5]
+    assert truncated is False
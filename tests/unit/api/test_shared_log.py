@@ -0,0 +1,101 @@
+import multiprocessing
+import pytest
+from app.api.event_store import EventStore, format_timestamp
+from app.api.shared_log import MIN_SIZE, Follower, Overrun, SharedLog
+from app.api.stream import EventHub
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+CATEGORIES = ["server_logs", "network"]
+
+def events(n, offset=0, text=""):
+    return [{"timestamp": format_timestamp(START + offset + i), "attempts": offset + i, "event": text}
+            for i in range(n)]
+
+def make_stores(capacity=100):
+    return {category: EventStore(category, capacity=capacity) for category in CATEGORIES}
+
+@pytest.fixture
+def log():
+    log = SharedLog(CATEGORIES, MIN_SIZE)
+    yield log
+    log.close()
+
+def test_replica_serves_the_same_events_and_cursors(log):
+    source = make_stores()
+    source["server_logs"].extend(events(3))  # before attaching: not replicated
+    log.attach(source)
+    source["server_logs"].extend(events(5, offset=3))
+    source["network"].extend([{"timestamp": format_timestamp(START), "port": 22}])
+    source["server_logs"].extend(events(2, offset=8))
+
+    replica = make_stores()
+    hub = EventHub()
+    replica_hub = EventHub()
+    hub.attach(source)
+    replica_hub.attach(replica)
+    follower = Follower(log, replica, replica_hub)
+    assert follower.poll() == 8
+    for category in CATEGORIES:
+        assert replica[category].version == source[category].version
+    assert replica["server_logs"].since_seq(5, raw=True) == source["server_logs"].since_seq(5, raw=True)
+    assert len(replica["server_logs"]) == 7  # seqs 4 to 10
+    # Stream frames are numbered after the shared log records, in every replica
+    assert replica_hub.last_id == 8
+
+    source["network"].extend([{"timestamp": format_timestamp(START + 1), "port": 80}])
+    assert follower.poll() == 1
+    assert follower.poll() == 0
+    assert replica["network"].latest(1) == source["network"].latest(1)
+    assert replica_hub.last_id == 9
+
+def test_ring_wraps_and_lagging_readers_resynchronize(log):
+    source = make_stores(capacity=10000)
+    log.attach(source)
+    replica = make_stores(capacity=10000)
+    follower = Follower(log, replica)
+    # About 3 times the ring
+    for batch in range(30):
+        source["server_logs"].extend(events(100, offset=batch * 100, text="x" * 900))
+    assert log.tail > 0
+    with pytest.raises(Overrun):
+        log.read(0)
+    follower.poll()
+    assert follower.overruns == 1
+    store = replica["server_logs"]
+    # Only what the ring still holds, under the source's sequence numbers
+    assert 0 < len(store) < 3000
+    assert store.last_seq == 3000
+    assert store.since_seq(2990, raw=True) == source["server_logs"].since_seq(2990, raw=True)
+
+    source["server_logs"].extend(events(5, offset=3000))
+    follower.poll()
+    assert store.version == source["server_logs"].version
+
+def test_records_are_shared_with_forked_processes(log):
+    source = make_stores()
+    log.attach(source)
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+
+    def child():
+        replica = make_stores()
+        follower = Follower(log, replica)
+        while replica["server_logs"].last_seq < 4:
+            follower.poll()
+        sender.send([event["attempts"] for event in replica["server_logs"].latest()])
+
+    process = context.Process(target=child)
+    process.start()
+    # Written after the fork: only the shared mapping carries them to the child
+    source["server_logs"].extend(events(4))
+    assert receiver.poll(10)
+    assert receiver.recv() == [3, 2, 1, 0]
+    process.join(timeout=5)
+    assert process.exitcode == 0
+
+def test_too_large_events_are_refused(log):
+    source = make_stores()
+    log.attach(source)
+    with pytest.raises(ValueError):
+        log.append_events("server_logs", [{}], [b"x" * MIN_SIZE])
+    assert log.head == 0
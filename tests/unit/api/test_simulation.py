@@ -0,0 +1,78 @@
+import gzip
+import json
+import pytest
+from app.api.event_store import create_stores, parse_timestamp
+from app.api.ingest import validate
+from app.api.rollups import Rollups
+from app.api.segment_log import open_logs, restore
+from app.api.simulation import DEFAULT_RATES, hourly_rate, simulate, simulate_into, write_event_log, write_ndjson
+
+START = 1745971200  # 2025-04-30T00:00:00Z
+HOUR = 3600
+
+def collect(*args, **kwargs):
+    return [(category, event) for category, events in simulate(*args, **kwargs) for event in events]
+
+def test_simulation_is_deterministic_for_a_seed():
+    assert collect(START, HOUR, seed=3) == collect(START, HOUR, seed=3)
+    assert collect(START, HOUR, seed=3) != collect(START, HOUR, seed=4)
+
+def test_events_are_valid_ordered_and_within_the_span():
+    last = {}
+    for category, event in collect(START, 2 * HOUR, seed=1):
+        assert validate(category, event) is None
+        epoch = parse_timestamp(event["timestamp"])
+        assert START <= epoch < START + 2 * HOUR
+        assert epoch >= last.get(category, START)
+        last[category] = epoch
+    assert set(last) == set(DEFAULT_RATES)
+
+def test_rates_follow_the_day():
+    rates = {"biometric_access": (3600, 0.8, 8)}
+    peak = len(collect(START + 7 * HOUR, 2 * HOUR, rates))
+    trough = len(collect(START + 19 * HOUR, 2 * HOUR, rates))
+    assert peak > 4 * trough
+    assert hourly_rate((100, 0.5, 12), START + 12 * HOUR) == 150
+
+def test_simulate_into_stores_feeds_the_rollups():
+    stores = create_stores(capacity=100000)
+    rollups = Rollups()
+    rollups.attach(stores)
+    rates = {"server_logs": (600, 0.3, 2), "internal_comms": (120, 0.7, 10)}
+    total = simulate_into(stores, START, 6 * HOUR, rates)
+    assert total == len(stores["server_logs"]) + len(stores["internal_comms"])
+    assert len(stores["network"]) == 0
+    totals = rollups.summary(7 * HOUR, now=START + 6 * HOUR)["totals"]
+    assert totals["server_logs"]["events"] + totals["internal_comms"]["events"] == total
+
+def test_write_ndjson(tmp_path):
+    rates = {"inmate_threats": (600, 0.5, 22)}
+    counts = write_ndjson(str(tmp_path), START, HOUR, rates, seed=2, compress=True)
+    with gzip.open(tmp_path / "inmate_threats.ndjson.gz") as f:
+        events = [json.loads(line) for line in f]
+    assert counts == {"inmate_threats": len(events)}
+    assert events == [event for _, event in collect(START, HOUR, rates, seed=2)]
+
+def test_write_event_log_is_restored(tmp_path):
+    rates = {"physical_security": (300, 0.3, 20)}
+    logs = open_logs(str(tmp_path), rates)
+    counts = write_event_log(logs, START, 24 * HOUR, rates)
+    assert counts["physical_security"] > 24 * 300 * 0.9
+    stores = create_stores(capacity=100000, retention=HOUR)
+    restore({"physical_security": stores["physical_security"]}, logs)
+    restored = [parse_timestamp(event["timestamp"]) for event in stores["physical_security"].tail(100000)[0]]
+    assert 0 < len(restored) < counts["physical_security"] / 10
+    # Only the retained hour is reloaded
+    assert min(restored) >= max(restored) - HOUR
+    for log in logs.values():
+        log.close()
+
+def test_write_event_log_refuses_a_log_with_events(tmp_path):
+    rates = {"physical_security": (300, 0.3, 20)}
+    logs = open_logs(str(tmp_path), rates)
+    logs["physical_security"].extend([(START + 24 * HOUR, b'{}')])
+    with pytest.raises(ValueError):
+        write_event_log(logs, START, HOUR, rates)
+    assert len(logs["physical_security"].read(START)[0]) == 1
+    for log in logs.values():
+        log.close()
@@ -0,0 +1,101 @@
+import json
+import pytest
+from app import create_app
+from app.api.stream import EventHub, parse_categories
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False, 'STREAM_KEEPALIVE': 0.05})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+def sample_event(n):
+    return {"n": n, "timestamp": "2025-04-30T12:00:00+00:00Z"}
+
+def parse_frames(chunk):
+    frames = []
+    for block in chunk.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append(fields)
+    return frames
+
+def test_hub_encodes_each_event_once_with_global_ids():
+    hub = EventHub(capacity=10)
+    hub.publish("network", [sample_event(1)])
+    hub.publish("server_logs", [sample_event(2)])
+    chunk, last_id = hub.wait(0, {"network", "server_logs"}, timeout=0)
+    frames = parse_frames(chunk)
+    assert last_id == 2
+    assert [f["id"] for f in frames] == ["1", "2"]
+    assert [f["event"] for f in frames] == ["network", "server_logs"]
+    assert json.loads(frames[0]["data"]) == sample_event(1)
+
+def test_hub_filters_categories_and_resumes():
+    hub = EventHub(capacity=10)
+    for n in range(4):
+        hub.publish("network" if n % 2 else "inmate_threats", [sample_event(n)])
+    chunk, last_id = hub.wait(1, {"network"}, timeout=0)
+    assert [f["id"] for f in parse_frames(chunk)] == ["2", "4"]
+    assert last_id == 4
+
+def test_hub_wait_times_out_without_new_frames():
+    hub = EventHub(capacity=10)
+    assert hub.wait(0, {"network"}, timeout=0.01) == (b"", 0)
+
+def test_hub_replays_only_retained_frames():
+    hub = EventHub(capacity=2)
+    for n in range(5):
+        hub.publish("network", [sample_event(n)])
+    chunk, _ = hub.wait(0, {"network"}, timeout=0)
+    assert [f["id"] for f in parse_frames(chunk)] == ["4", "5"]
+
+def test_parse_categories():
+    assert parse_categories(None) == parse_categories("")
+    assert parse_categories("network, server_logs") == {"network", "server_logs"}
+    assert parse_categories("network,bogus") is None
+
+def test_stream_pushes_new_events(app, client):
+    response = client.get('/api/stream/?categories=network')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 3000\n\n"
+
+    store = app.extensions['event_stores']['network']
+    store.append(sample_event(7))
+    app.extensions['event_stores']['server_logs'].append(sample_event(8))
+    frames = parse_frames(next(chunks))
+    assert len(frames) == 1
+    assert frames[0]["event"] == "network"
+    assert json.loads(frames[0]["data"]) == sample_event(7)
+    response.close()
+
+def test_stream_resumes_from_last_event_id(app, client):
+    stores = app.extensions['event_stores']
+    stores['network'].append(sample_event(1))
+    stores['network'].append(sample_event(2))
+    stores['network'].append(sample_event(3))
+
+    response = client.get('/api/stream/', headers={'Last-Event-ID': '1'})
+    chunks = iter(response.response)
+    next(chunks)  # retry hint
+    frames = parse_frames(next(chunks))
+    assert [json.loads(f["data"])["n"] for f in frames] == [2, 3]
+    response.close()
+
+def test_stream_sends_keepalive(client):
+    response = client.get('/api/stream/')
+    chunks = iter(response.response)
+    next(chunks)
+    assert next(chunks) == b": keepalive\n\n"
+    response.close()
+
+@pytest.mark.parametrize("query", ["categories=bogus", "last_event_id=abc"])
+def test_stream_rejects_invalid_parameters(client, query):
+    response = client.get(f'/api/stream/?{query}')
+    assert response.status_code == 400
@@ -0,0 +1,104 @@
+import pytest
+from app import create_app
+from app.api.event_store import EventStore, format_timestamp
+from app.api.text_index import TextIndex, parse_query, tokenize
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def comms(i, message):
+    return {"type": "general", "recipients": ["all staff"], "message": message,
+            "sent_by": "warden", "timestamp": format_timestamp(START + i)}
+
+@pytest.fixture
+def store():
+    store = EventStore("internal_comms", capacity=100)
+    store.add_index('text', TextIndex(("message",)))
+    return store
+
+def test_tokenize_and_parse_query():
+    assert tokenize("Cell Block B: contraband!") == ["cell", "block", "b", "contraband"]
+    assert parse_query("SSH contra*") == [("ssh", False), ("contra", True)]
+    with pytest.raises(ValueError):
+        parse_query("a b c d e f g h i")
+
+def test_all_terms_must_match_newest_first(store):
+    store.extend([
+        comms(0, "Lockdown in Cell Block B"),
+        comms(1, "Cell Block A is clear"),
+        comms(2, "Contraband found in Cell Block B"),
+    ])
+    events, total = store.search({'text': "cell block b"})
+    assert [e["message"] for e in events] == ["Contraband found in Cell Block B", "Lockdown in Cell Block B"]
+    assert total == 2
+    assert store.search({'text': "CELL"})[1] == 3
+    assert store.search({'text': "cell escape"}) == ([], 0)
+    assert store.search({'text': ""}) == ([], 0)
+
+def test_prefix_terms(store):
+    store.extend([comms(0, "contraband seized"), comms(1, "contractor on site"), comms(2, "all quiet")])
+    assert store.search({'text': "contra*"})[1] == 2
+    assert store.search({'text': "contra"})[1] == 0
+    events, total = store.search({'text': "contra* seiz*"}, limit=5)
+    assert [e["message"] for e in events] == ["contraband seized"]
+
+def test_limit_keeps_total(store):
+    store.extend([comms(i, "breach attempt") for i in range(10)])
+    events, total = store.search({'text': "breach"}, limit=3, raw=True)
+    assert len(events) == 3 and isinstance(events[0], bytes)
+    assert total == 10
+
+def test_entries_expire_with_the_events():
+    store = EventStore("internal_comms", capacity=5)
+    index = TextIndex(("message",))
+    store.add_index('text', index)
+    store.extend([comms(i, "breach" if i < 3 else "all quiet") for i in range(8)])
+    assert store.search({'text': "breach"}) == ([], 0)
+    assert index.stats() == {"events": 5, "keys": 2, "postings": 10}
+    store.clear()
+    assert index.stats() == {"events": 0, "keys": 0, "postings": 0}
+    store.append(comms(9, "breach"))
+    assert store.search({'text': "breach"})[1] == 1
+
+def test_index_added_to_a_filled_store():
+    store = EventStore("internal_comms", capacity=100)
+    store.extend([comms(i, f"message {i}") for i in range(10)])
+    store.add_index('text', TextIndex(("message",)))
+    assert store.search({'text': "message"})[1] == 10
+    assert store.search({'text': "7"})[0][0]["message"] == "message 7"
+
+def test_large_posting_lists_are_compacted():
+    store = EventStore("internal_comms", capacity=100)
+    store.add_index('text', TextIndex(("message",)))
+    store.extend([comms(i, "routine check") for i in range(5000)])
+    assert store.search({'text': "routine"}, limit=1)[1] == 100
+    postings = store.index('text')._postings["routine"]
+    assert len(postings.seqs) < 2200
+
+@pytest.fixture
+def client():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0})
+    app.config['TESTING'] = True
+    stores = app.extensions['event_stores']
+    stores['internal_comms'].extend([comms(i, "Contraband found in Cell Block B") for i in range(3)])
+    stores['network'].append({"source_ip": "10.0.0.1", "destination_ip": "10.0.0.2", "protocol": "TCP",
+                              "port": 22, "action": "blocked", "threat_level": "high",
+                              "details": "Multiple failed SSH login attempts detected.",
+                              "timestamp": format_timestamp(START)})
+    with app.test_client() as client:
+        yield client
+
+def test_category_q_parameter(client):
+    body = client.get('/api/internal-comms/?q=contraband&limit=2').get_json()
+    assert body["total"] == 3
+    assert len(body["logs"]) == 2
+    assert client.get('/api/network-monitoring/?q=ssh').get_json()["total"] == 1
+    assert client.get('/api/biometric-access/?q=ssh').status_code == 400
+    assert client.get('/api/internal-comms/?q=x&limit=-1').status_code == 400
+
+def test_cross_category_search(client):
+    body = client.get('/api/search/?q=ssh*').get_json()
+    assert list(body["results"]) == ["network_log"]
+    assert body["results"]["network_log"]["total"] == 1
+    assert client.get('/api/search/?q=nothing').get_json() == {"q": "nothing", "results": {}}
+    response = client.get('/api/search/?q=ssh')
+    assert client.get('/api/search/?q=ssh', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
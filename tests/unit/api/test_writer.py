@@ -0,0 +1,90 @@
+import multiprocessing
+import threading
+import pytest
+from app.api.event_store import EventStore, format_timestamp
+from app.api.writer import EventWriter, ForwardingWriter, QueueFull, SubmissionReceiver
+
+START = 1746014400.0  # 2025-04-30T12:00:00Z
+
+def events(n, offset=0):
+    return [{"timestamp": format_timestamp(START + offset + i), "attempts": offset + i} for i in range(n)]
+
+@pytest.fixture
+def stores():
+    return {"server_logs": EventStore("server_logs", capacity=10000), "network": EventStore("network")}
+
+def test_submitted_events_become_visible(stores):
+    writer = EventWriter(stores)
+    writer.start()
+    writer.submit("server_logs", events(10))
+    assert writer.flush(timeout=5)
+    assert [e["attempts"] for e in stores["server_logs"].latest(3)] == [9, 8, 7]
+    stats = writer.stats()
+    assert stats["events"] == 10
+    assert stats["queue_depth"] == 0
+    assert stats["latency_ms"]["max"] > 0
+    writer.stop()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+
+def test_submissions_are_batched(stores):
+    # Not started yet: queue everything, then let one batch take it
+    writer = EventWriter(stores, batch_size=1000, batch_delay=0)
+    calls = []
+    stores["server_logs"].subscribe(lambda category, new, encoded: calls.append(len(new)))
+    for i in range(30):
+        writer.submit("server_logs", events(50, offset=i * 50))
+    writer.start()
+    assert writer.flush(timeout=5)
+    # 30 submissions, two batches of whole submissions, one listener call each
+    assert calls == [1000, 500]
+    assert writer.stats()["max_batch"] == 1000
+    assert stores["server_logs"].last_seq == 1500
+    writer.stop()
+
+def test_full_queue_raises(stores):
+    writer = EventWriter(stores, capacity=100)
+    writer.submit("server_logs", events(100))
+    with pytest.raises(QueueFull):
+        writer.submit("server_logs", events(1), timeout=0.01)
+    assert writer.full
+    with pytest.raises(KeyError):
+        writer.submit("nope", events(1))
+
+def test_blocked_submitter_resumes_when_the_writer_catches_up(stores):
+    writer = EventWriter(stores, capacity=100, batch_delay=0)
+    writer.submit("server_logs", events(100))
+    done = threading.Event()
+
+    def submit():
+        writer.submit("server_logs", events(50, offset=100), timeout=5)
+        done.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert not done.wait(0.05)
+    writer.start()
+    assert done.wait(5)
+    assert writer.flush(timeout=5)
+    assert stores["server_logs"].last_seq == 150
+    writer.stop()
+
+def test_forwarded_submissions_reach_the_writer(stores):
+    queue = multiprocessing.get_context('fork').Queue(1)
+    forwarding = ForwardingWriter(queue)
+    forwarding.submit("server_logs", events(5))
+    # Nobody drains the queue yet
+    assert forwarding.full
+    with pytest.raises(QueueFull):
+        forwarding.submit("server_logs", events(5, offset=5), timeout=0.05)
+    writer = EventWriter(stores)
+    writer.start()
+    receiver = SubmissionReceiver(queue, writer)
+    receiver.start()
+    forwarding.submit("server_logs", events(5, offset=5), timeout=5)
+    receiver.stop()
+    receiver.join(timeout=5)
+    assert writer.flush(timeout=5)
+    assert [e["attempts"] for e in stores["server_logs"].latest(10)] == list(range(9, -1, -1))
+    assert forwarding.stats()["events"] == 10
+    writer.stop()
@@ -0,0 +1,51 @@
+import gzip
+import re
+import pytest
+from app import create_app
+from app.assets import get_manifest, IMMUTABLE
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+def test_hashed_asset_is_precompressed_and_immutable(app, client):
+    with app.test_request_context():
+        asset = get_manifest().get('css/style.css')
+    response = client.get(f'/assets/{asset.hashed_name}', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    response = client.get(f'/assets/{asset.hashed_name}', headers={'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(response.data) == asset.encodings['identity']
+
+def test_plain_name_must_be_revalidated(client):
+    response = client.get('/assets/js/utils.js')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response.headers
+    again = client.get('/assets/js/utils.js', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+def test_module_imports_use_hashed_names(app):
+    with app.test_request_context():
+        manifest = get_manifest()
+    source = manifest.get('js/dashboard-view.js').encodings['identity'].decode()
+    core = manifest.get('js/core.js').hashed_name.split('/')[-1]
+    assert f'from "./{core}"' in source
+    assert not re.search(r'from "\./core\.js"', source)
+
+def test_unknown_asset_is_404(client):
+    assert client.get('/assets/js/missing.js').status_code == 404
+
+def test_templates_link_hashed_assets(app):
+    with app.test_request_context():
+        html = app.jinja_env.from_string("{{ asset_url('js/dashboard.js') }}").render()
+        assert re.fullmatch(r'/assets/js/dashboard\.[0-9a-f]{16}\.js', html)
+        assert app.jinja_env.from_string("{{ asset_url('nope.js') }}").render() == '/static/nope.js'
@@ -284,3 +284,103 @@ def test_logout(mock_url_for, mock_redirect, mock_flash, app_context):
         mock_url_for.assert_called_once_with('auth.login')
         mock_redirect.assert_called_once_with('/auth/login')
         assert response == "Redirected to Login"
+
+
+# --- Tests for the user stores ---
+
+from app.auth import JsonUserStore, SqliteUserStore, get_user_store
+
+def test_load_users_is_cached_until_file_changes(mock_users_file_path):
+    """Test load_users only re-parses the file when it changes."""
+    save_users({'user1': {'password': 'hash1'}})
+    with patch('app.auth.json.load', wraps=json.load) as mock_json_load:
+        assert load_users() == {'user1': {'password': 'hash1'}}
+        assert load_users() == {'user1': {'password': 'hash1'}}
+        assert mock_json_load.call_count == 1
+        save_users({'user1': {'password': 'hash1'}, 'user2': {'password': 'hash2'}})
+        assert 'user2' in load_users()
+        assert mock_json_load.call_count == 2
+
+def test_load_users_is_read_only(mock_users_file_path):
+    """Test the cached users can't be modified by callers."""
+    save_users({'user1': {'password': 'hash1'}})
+    with pytest.raises(TypeError):
+        load_users()['user2'] = {'password': 'hash2'}
+
+def test_save_users_leaves_no_temp_files(mock_users_file_path, tmp_path):
+    """Test save_users replaces the file atomically and cleans up."""
+    path = str(tmp_path / 'users.json')
+    with patch('app.auth.USERS_FILE', path):
+        save_users({'user1': {'password': 'hash1'}})
+        save_users({'user2': {'password': 'hash2'}})
+        assert os.listdir(tmp_path) == ['users.json']
+        assert load_users() == {'user2': {'password': 'hash2'}}
+
+def test_json_store_concurrent_adds_lose_no_users(mock_users_file_path, tmp_path):
+    """Test concurrent registrations through the JSON store all persist."""
+    import threading
+    with patch('app.auth.USERS_FILE', str(tmp_path / 'users.json')):
+        store = JsonUserStore()
+        threads = [threading.Thread(target=store.add, args=(f'user{i}', {'password': 'hash'}))
+                   for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(load_users()) == 20
+        assert store.add('user0', {'password': 'other'}) is False
+
+def test_json_store_concurrent_adds_in_processes_lose_no_users(mock_users_file_path, tmp_path):
+    """Test registrations in several processes (server workers) all persist."""
+    import multiprocessing
+    context = multiprocessing.get_context('fork')
+    with patch('app.auth.USERS_FILE', str(tmp_path / 'users.json')):
+        def register_users(worker):
+            store = JsonUserStore()
+            for i in range(10):
+                store.add(f'user{worker}-{i}', {'password': 'hash'})
+
+        processes = [context.Process(target=register_users, args=(worker,)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            assert process.exitcode == 0
+        assert len(load_users()) == 40
+
+def test_save_users_keeps_the_file_mode(mock_users_file_path, tmp_path):
+    """Test replacing users.json keeps its permissions."""
+    path = str(tmp_path / 'users.json')
+    with patch('app.auth.USERS_FILE', path):
+        save_users({'user1': {'password': 'hash1'}})
+        assert os.stat(path).st_mode & 0o777 == 0o644
+        os.chmod(path, 0o640)
+        save_users({'user2': {'password': 'hash2'}})
+        assert os.stat(path).st_mode & 0o777 == 0o640
+
+def test_sqlite_store(tmp_path):
+    """Test the SQLite store adds and looks up users by username."""
+    store = SqliteUserStore(str(tmp_path / 'users.db'))
+    assert store.get('user1') is None
+    assert store.add('user1', {'password': 'hash1'}) is True
+    assert store.add('user1', {'password': 'hash2'}) is False
+    assert store.get('user1') == {'password': 'hash1'}
+    store.import_users({'user1': {'password': 'x'}, 'user2': {'password': 'hash2'}})
+    assert store.count() == 2
+    assert store.get('user1') == {'password': 'hash1'}
+
+def test_get_user_store_sqlite_migrates_json(mock_users_file_path, tmp_path):
+    """Test the SQLite backend imports users.json on first use."""
+    save_users({'user1': {'password': 'hash1'}})
+    app = Flask(__name__)
+    app.config['USER_STORE'] = 'sqlite'
+    app.config['USER_DB'] = str(tmp_path / 'users.db')
+    with app.app_context():
+        store = get_user_store()
+        assert isinstance(store, SqliteUserStore)
+        assert store.get('user1') == {'password': 'hash1'}
+        assert get_user_store() is store
+
+def test_get_user_store_defaults_to_json(app_context):
+    """Test the JSON backend is used without configuration."""
+    assert isinstance(get_user_store(), JsonUserStore)
@@ -0,0 +1,63 @@
+import gzip
+import json
+import pytest
+from app import create_app
+from app.compression import CompressedCache, compress, compress_chunks
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 1000})
+    app.config['TESTING'] = True
+    return app
+
+def test_identical_bodies_are_compressed_once(app):
+    cache = app.extensions['compress'].compressed_cache
+    with app.test_client() as client:
+        first = client.get('/api/server-logs/', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/api/server-logs/', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.data == second.data
+    assert json.loads(gzip.decompress(first.data))
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+def test_route_compression_level(app):
+    app.config['COMPRESS_ROUTE_LEVELS'] = {'server_logs_api': {'gzip': 1}}
+    with app.test_client() as client:
+        fast = client.get('/api/server-logs/?after=0&limit=500', headers={'Accept-Encoding': 'gzip'}).data
+    app.config['COMPRESS_ROUTE_LEVELS'] = {'server_logs_api': {'gzip': 9}}
+    with app.test_client() as client:
+        small = client.get('/api/server-logs/?after=0&limit=500', headers={'Accept-Encoding': 'gzip'}).data
+    assert gzip.decompress(fast) == gzip.decompress(small)
+    assert len(small) < len(fast)
+
+def test_large_history_is_compressed_as_a_stream(app):
+    app.config['RESPONSE_STREAM_THRESHOLD'] = 10000
+    with app.test_client() as client:
+        response = client.get('/api/network-monitoring/?after=0', headers={'Accept-Encoding': 'br'})
+        assert response.is_streamed
+        assert response.headers['Content-Encoding'] == 'br'
+        gzipped = client.get('/api/network-monitoring/?after=0', headers={'Accept-Encoding': 'gzip'})
+        assert gzipped.is_streamed
+        assert gzipped.headers['Content-Encoding'] == 'gzip'
+        assert len(json.loads(gzip.decompress(gzipped.data))["logs"]) == 1000
+        plain = client.get('/api/network-monitoring/?after=0')
+        assert len(plain.get_json()["logs"]) == 1000
+
+def test_compress_chunks_matches_one_shot():
+    data = b'{"event":"reboot"}' * 5000
+    for algorithm in ('gzip', 'deflate', 'br'):
+        chunks = b''.join(compress_chunks([data[:1000], data[1000:]], algorithm, 5))
+        assert len(chunks) < len(data)
+    assert gzip.decompress(b''.join(compress_chunks([data], 'gzip', 5))) == data
+    assert compress(data, 'gzip', 6) == compress(data, 'gzip', 6)
+
+def test_compressed_cache_is_bounded():
+    cache = CompressedCache(max_bytes=100)
+    for i in range(50):
+        cache.compress(str(i).encode() * 100, 'gzip', 6)
+    assert cache.stats()["bytes"] <= 100
+
+def test_unsupported_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        create_app({'SAMPLE_PRODUCER': False, 'COMPRESS_ALGORITHM': ['zstd', 'gzip']})
@@ -0,0 +1,40 @@
+import json
+from unittest.mock import patch
+import pytest
+from flask import jsonify
+from app import create_app
+from app.encoding import JSONProvider, dumps, join_array, join_object, orjson
+
+def test_dumps_is_compact_and_sorted():
+    assert dumps({"b": 1, "a": [1, "x"]}) == b'{"a":[1,"x"],"b":1}'
+
+def test_join_helpers_build_valid_json():
+    body = join_object([("logs", join_array([dumps({"a": 1}), dumps({"a": 2})])), ("cursor", dumps(2))])
+    assert json.loads(body) == {"logs": [{"a": 1}, {"a": 2}], "cursor": 2}
+    assert join_array([]) == b'[]'
+
+def test_app_uses_custom_json_provider():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    assert isinstance(app.json, JSONProvider)
+    with app.app_context():
+        assert json.loads(app.json.dumps({"b": (1, 2), "a": None})) == {"a": None, "b": [1, 2]}
+        assert json.loads(app.json.dumps({1: "x", 2: "y"})) == {"1": "x", "2": "y"}
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_jsonify_encodes_with_orjson():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    with app.app_context(), patch('app.encoding.orjson.dumps', wraps=orjson.dumps) as orjson_dumps:
+        assert jsonify({"b": 1, "a": [1, 2]}).get_data() == b'{"a":[1,2],"b":1}\n'
+        assert orjson_dumps.call_count == 1
+        app.debug = True
+        pretty = jsonify({"b": 1, "a": 2}).get_data(as_text=True)
+        assert orjson_dumps.call_count == 2
+    assert pretty == '{\n  "a": 2,\n  "b": 1\n}\n'
+
+def test_list_endpoint_matches_store_contents():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    store = app.extensions['event_stores']['server_logs']
+    with app.test_client() as client:
+        response = client.get('/api/server-logs/')
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == store.latest(50)
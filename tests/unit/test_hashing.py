@@ -0,0 +1,58 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from werkzeug.security import check_password_hash, generate_password_hash
+from app import create_app
+from app.hashing import HasherBusy, PasswordHasher
+
+@pytest.fixture
+def pool_hasher():
+    hasher = PasswordHasher(workers=1, max_queue=0, timeout=5.0)
+    yield hasher
+    hasher.shutdown()
+
+def test_inline_hasher_runs_on_calling_thread():
+    hasher = PasswordHasher(workers=0)
+    assert hasher.run(pow, 2, 10) == 1024
+    stats = hasher.stats()
+    assert stats["completed"] == 1
+    assert stats["latency_p50"] is not None
+
+def test_pool_hasher_hashes_and_verifies(pool_hasher):
+    pwhash = pool_hasher.run(generate_password_hash, 'secret')
+    assert check_password_hash(pwhash, 'secret')
+    assert pool_hasher.run(check_password_hash, pwhash, 'secret') is True
+    assert pool_hasher.run(check_password_hash, pwhash, 'wrong') is False
+    assert pool_hasher.stats()["in_flight"] == 0
+
+def test_saturated_pool_rejects_immediately(pool_hasher):
+    pool_hasher.run(pow, 2, 2)  # start the worker process
+    busy = threading.Thread(target=pool_hasher.run, args=(time.sleep, 0.5))
+    busy.start()
+    time.sleep(0.1)
+    with pytest.raises(HasherBusy):
+        pool_hasher.run(pow, 2, 2)
+    busy.join()
+    assert pool_hasher.stats()["rejected"] == 1
+    assert pool_hasher.run(pow, 2, 2) == 4
+
+def test_slow_hash_times_out():
+    hasher = PasswordHasher(workers=1, max_queue=0, timeout=0.05)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.run(time.sleep, 1)
+        assert hasher.stats()["timeouts"] == 1
+    finally:
+        hasher.shutdown()
+
+def test_login_answers_503_when_pool_is_busy():
+    app = create_app({'SAMPLE_PRODUCER': False, 'PASSWORD_HASH_WORKERS': 0})
+    app.config['TESTING'] = True
+    with app.test_client() as client, \
+            patch('app.auth.get_user_store') as mock_store, \
+            patch('app.auth.verify_password', side_effect=HasherBusy()):
+        mock_store.return_value.get.return_value = {'password': 'hash'}
+        response = client.post('/auth/login', data={'username': 'user', 'password': 'pw'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
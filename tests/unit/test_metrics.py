@@ -0,0 +1,96 @@
+import re
+import threading
+import pytest
+from app import create_app
+from app.metrics import Registry
+
+@pytest.fixture
+def app():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 1000})
+    app.config['TESTING'] = True
+    return app
+
+def samples(text):
+    """{'name{labels}': value} of a Prometheus text exposition."""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    return samples(response.get_data(as_text=True))
+
+def test_requests_are_counted_per_endpoint_and_status(app):
+    with app.test_client() as client:
+        client.get('/api/server-logs/')
+        client.get('/api/server-logs/')
+        client.get('/')  # login_required redirect
+        client.get('/no-such-page')
+        metrics = scrape(client)
+    assert metrics['http_requests_total{endpoint="server_logs_api.get_server_logs",method="GET",status="200"}'] == 2
+    assert metrics['http_requests_total{endpoint="frontend.dashboard",method="GET",status="302"}'] == 1
+    assert metrics['http_requests_total{endpoint="unmatched",method="GET",status="404"}'] == 1
+    assert metrics['http_request_duration_seconds_count{endpoint="server_logs_api.get_server_logs"}'] == 2
+    assert metrics['http_request_duration_seconds_bucket{endpoint="server_logs_api.get_server_logs",le="+Inf"}'] == 2
+    assert metrics['http_request_duration_seconds_sum{endpoint="server_logs_api.get_server_logs"}'] > 0
+    # The scrape itself is in flight
+    assert metrics['http_requests_in_flight'] == 1
+
+def test_request_phases_and_sizes(app):
+    with app.test_client() as client:
+        client.get('/api/summary/?range=10m', headers={'Accept-Encoding': 'gzip'})
+        compressed = client.get('/api/network-monitoring/', headers={'Accept-Encoding': 'gzip'})
+        metrics = scrape(client)
+    summary = 'endpoint="summary_api.get_summary"'
+    for phase in ('handler', 'serialization', 'compression'):
+        assert metrics[f'http_request_phase_seconds_count{{{summary},phase="{phase}"}}'] == 1
+    assert metrics[f'http_request_phase_seconds_sum{{{summary},phase="serialization"}}'] > 0
+    network = 'endpoint="network_api.get_network_logs"'
+    assert metrics[f'http_response_size_bytes_sum{{{network}}}'] == len(compressed.data)
+
+def test_component_counters(app):
+    store = app.extensions['event_stores']['network']
+    with app.test_client() as client:
+        client.get('/api/server-logs/', headers={'Accept-Encoding': 'gzip'})
+        metrics = scrape(client)
+    assert metrics['event_store_events{category="network"}'] == len(store)
+    assert metrics['event_store_appended_total{category="network"}'] == 1000
+    assert metrics['event_writer_queue_depth'] == 0
+    assert metrics['compression_cache_lookups_total{result="miss"}'] == 1
+
+def test_appended_events_are_counted_exactly():
+    app = create_app({'SAMPLE_PRODUCER': False, 'EVENT_STORE_BACKFILL': 0})
+    store = app.extensions['event_stores']['network']
+    store.extend([{"timestamp": 1746014400 + i, "port": i} for i in range(50)])
+    with app.test_client() as client:
+        metrics = scrape(client)
+    assert metrics['event_store_appended_total{category="network"}'] == 50
+    assert metrics['event_store_events{category="network"}'] == 50
+    assert metrics['event_store_appended_total{category="server_logs"}'] == 0
+
+def test_metrics_can_be_disabled():
+    app = create_app({'SAMPLE_PRODUCER': False, 'METRICS': False})
+    with app.test_client() as client:
+        assert client.get('/metrics').status_code == 404
+
+def test_registry_sums_thread_shards_and_reuses_them():
+    registry = Registry()
+    registry.counter('jobs_total', "Jobs.")
+
+    def work():
+        for _ in range(1000):
+            registry.shard().inc(('jobs_total', ()))
+
+    for _ in range(3):
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    counters, _, in_flight = registry.collect()
+    assert counters[('jobs_total', ())] == 12000
+    assert in_flight == 0
+    # Shards of finished threads are handed to new threads
+    assert len(registry._shards) <= 4
+    assert re.search(r'^jobs_total 12000$', registry.render(), re.M)
@@ -0,0 +1,90 @@
+import os
+import pstats
+import threading
+import pytest
+from app import create_app
+from app.profiling import StackSampler, profile_token, valid_token
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SAMPLE_PRODUCER': False,
+        'PROFILE_DIR': str(tmp_path),
+        'PROFILE_SECRET': 'profiling-secret',
+        'PROFILE_ADMINS': ('warden',),
+    })
+    app.config['TESTING'] = True
+    return app
+
+def test_tokens_expire_and_are_tied_to_the_secret():
+    token = profile_token('secret', ttl=60, now=1000)
+    assert valid_token('secret', token, now=1050)
+    assert not valid_token('secret', token, now=1061)
+    assert not valid_token('other', token, now=1050)
+    assert not valid_token('secret', '9999999999.forged')
+
+def test_signed_request_is_profiled(app, tmp_path):
+    with app.test_client() as client:
+        response = client.get('/api/server-logs/', headers={'X-Profile-Token': profile_token('profiling-secret')})
+        plain = client.get('/api/server-logs/')
+        forged = client.get('/api/server-logs/', headers={'X-Profile-Token': profile_token('guess')})
+    assert response.status_code == 200
+    name = response.headers['X-Profile']
+    assert name.endswith('-server_logs_api.get_server_logs.prof')
+    stats = pstats.Stats(str(tmp_path / name))
+    assert any(function == 'logs_response' for _, _, function in stats.stats)
+    assert 'X-Profile' not in plain.headers
+    assert 'X-Profile' not in forged.headers
+    assert os.listdir(tmp_path) == [name]
+
+def test_admins_profile_with_a_query_flag(app):
+    with app.test_client() as client:
+        assert 'X-Profile' not in client.get('/api/sample-logs/?profile=1').headers
+        with client.session_transaction() as session:
+            session['user_id'] = 'warden'
+        assert 'X-Profile' in client.get('/api/sample-logs/?profile=1').headers
+        assert 'X-Profile' not in client.get('/api/sample-logs/').headers
+
+def test_nothing_is_registered_when_disabled():
+    app = create_app({'SAMPLE_PRODUCER': False})
+    assert 'request_profiler' not in app.extensions
+    assert 'stack_sampler' not in app.extensions
+    with app.test_client() as client:
+        response = client.get('/api/sample-logs/?profile=1', headers={'X-Profile-Token': profile_token('x')})
+    assert 'X-Profile' not in response.headers
+
+def test_sampler_collapses_the_stacks_of_requests(tmp_path):
+    sampler = StackSampler(str(tmp_path / 'stacks.collapsed'))
+    inside, done = threading.Event(), threading.Event()
+
+    def handle_request():
+        sampler.requests[threading.get_ident()] = 'network_api.get_network_logs'
+        inside.set()
+        done.wait()
+
+    thread = threading.Thread(target=handle_request)
+    thread.start()
+    inside.wait()
+    for _ in range(3):
+        sampler.sample_once()
+    done.set()
+    thread.join()
+    sampler.stop()
+    with open(tmp_path / 'stacks.collapsed') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1
+    stack, count = lines[0].rsplit(' ', 1)
+    frames = stack.split(';')
+    assert count == '3'
+    assert frames[0] == 'network_api.get_network_logs'
+    assert 'handle_request' in ' '.join(frames)
+
+def test_sampling_is_wired_to_the_requests(tmp_path):
+    app = create_app({'SAMPLE_PRODUCER': False, 'PROFILE_DIR': str(tmp_path), 'PROFILE_SAMPLE_INTERVAL': 60})
+    sampler = app.extensions['stack_sampler']
+    assert sampler.request_started in app.before_request_funcs[None]
+    assert sampler.request_finished in app.teardown_request_funcs[None]
+    with app.test_client() as client:
+        assert client.get('/api/network-monitoring/').status_code == 200
+    assert sampler.requests == {}
+    sampler.stop()